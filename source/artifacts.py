@@ -0,0 +1,169 @@
+import os
+import inspect
+import datetime
+import traceback
+
+RUNS_DIRECTORY = "runs"
+
+# The directory of a headless run, or None when running interactively
+run_directory = None
+
+# The experiment whose artifacts are being written
+experiment = None
+
+
+def start_headless(script: str) -> str:
+    """ Switches to headless mode: figures are rendered off-screen and saved
+    alongside the result tables, in a new directory for this run, rather
+    than shown. Returns that directory """
+
+    global run_directory
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+    run_directory = os.path.join(RUNS_DIRECTORY, f"{script}-{timestamp}")
+    os.makedirs(run_directory, exist_ok=True)
+    return run_directory
+
+
+def begin(name: str):
+    """ Starts an experiment, whose artifacts go in a directory of its own
+    when headless """
+
+    global experiment
+    experiment = name
+
+
+def path(name: str) -> str:
+    """ Returns where an artifact should be written; the current directory
+    when running interactively """
+
+    if run_directory is None:
+        return name
+
+    directory = os.path.join(run_directory, experiment or "")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def redirect(default: str) -> str:
+    """ Returns where to write a file that interactive runs write to the
+    given path; headless runs keep it with their artifacts instead, so a
+    batch job never replaces files kept in the repository """
+
+    if run_directory is None:
+        return default
+    return path(os.path.basename(default))
+
+
+def show(name: str):
+    """ Shows the current figure, or saves it when headless """
+
+    import matplotlib.pyplot as plt
+
+    if run_directory is None:
+        plt.show()
+    else:
+        plt.savefig(path(f"{name}.png"), dpi=150, bbox_inches="tight")
+        plt.close("all")
+
+
+def save_table(name: str, table):
+    """ Writes a results table as CSV; interactive runs only keep tables
+    that were always written """
+
+    table.to_csv(path(f"{name}.csv"))
+
+
+def keep_table(name: str, table):
+    """ Keeps a results table, when headless """
+
+    if run_directory is not None:
+        save_table(name, table)
+
+
+def _accepted(function: callable, options: dict) -> dict:
+    """ Returns the options an experiment takes, converted to the types its
+    parameters are annotated with; a flag given without a value is true """
+
+    parameters = inspect.signature(function).parameters
+
+    accepted = {}
+    for name, value in options.items():
+        if name not in parameters:
+            continue
+
+        kind = parameters[name].annotation
+        if kind is bool:
+            value = value is True or value.lower() in ("true", "yes", "1")
+        elif value is True:
+            raise ValueError(f"option needs a value: {name}")
+        elif kind in (int, float):
+            value = kind(value)
+        accepted[name] = value
+    return accepted
+
+
+def parse(script: str, experiments: dict, arguments: list) -> tuple:
+    """ Reads a script's arguments: the names of experiments to run in
+    turn, optionally the flag --headless, and options for the experiments
+    as --name=value, or --name for a flag. Returns the names, whether to
+    run headless, and the options """
+
+    names = []
+    options = {}
+    for argument in arguments:
+        if argument == "--headless":
+            continue
+        if argument.startswith("--"):
+            name, _, value = argument[2:].partition("=")
+            options[name.replace("-", "_")] = value or True
+        else:
+            names.append(argument)
+    assert names, "no experiments given"
+
+    for name in names:
+        if name not in experiments:
+            raise ValueError(f"invalid {script} argument: {name}")
+
+    # Check the options before anything runs; each must be taken by one of
+    # the experiments, and convert to its type
+    taken = set()
+    for name in names:
+        taken.update(_accepted(experiments[name], options))
+
+    for name in options:
+        if name not in taken:
+            raise ValueError(f"invalid {script} option: {name}")
+
+    return names, "--headless" in arguments, options
+
+
+def run(script: str,
+        experiments: dict,
+        names: list,
+        headless: bool = False,
+        options: dict = None) -> int:
+
+    """ Runs the named experiments in turn, each with the options it takes;
+    a failed experiment doesn't stop those queued after it. Returns an exit
+    status """
+
+    if headless:
+        print(f"writing artifacts to {start_headless(script)}")
+
+    failures = []
+    for name in names:
+        begin(name)
+        try:
+            experiment = experiments[name]
+            experiment(**_accepted(experiment, options or {}))
+        except Exception:
+            traceback.print_exc()
+            failures.append(name)
+
+    if failures:
+        print(f"failed experiments: {', '.join(failures)}")
+    return 1 if failures else 0
@@ -0,0 +1,447 @@
+import sys
+import os; os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+import json
+import time
+import platform
+import subprocess
+
+import numpy as np
+
+from game.game import Game
+from game.random_source import RandomSource
+from game.actors.random_peasant import RandomPeasant
+
+# Baselines are specific to a machine, so none is kept in the repository;
+# record one before comparing against it
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+        "..", "resources", "benchmarks", "baseline.json")
+
+# A run regresses if a median latency exceeds its baseline by this fraction
+TOLERANCE = 0.25
+
+COHORT_SIZES = (10, 100, 1000, 10000)
+PLAY_STEPS = 1000
+SCALING_SIZES = (10, 100, 1000, 10000, 100000)
+FILL_LEVELS = (1000, 10000, 100000)
+BATCH_SIZE = 32
+
+# Modules whose import time is measured; the entry points, the core game
+# package that pool workers load, and a bare interpreter to compare against
+STARTUP_MODULES = ("main", "profile", "train", "benchmark", "game.game", None)
+
+seed = 100
+
+
+def _peasants(size: int) -> list:
+    generator = np.random.default_rng(seed)
+    return [RandomPeasant(10, random=RandomSource(generator, 256))
+            for _ in range(size)]
+
+
+def _game(peasants: list, **arguments) -> Game:
+    random = RandomSource(np.random.default_rng(seed))
+    return Game(peasants,
+            round_limit=-1,
+            telemetry="none",
+            random=random,
+            **arguments)
+
+
+def measure(prepare: callable,
+        call: callable,
+        samples: int,
+        operations: int = 1,
+        warmup: int = 3) -> dict:
+
+    """ Times samples calls, each made after an untimed call to prepare.
+    A call may do several operations, which latencies are given per """
+
+    for _ in range(warmup):
+        prepare()
+        call()
+
+    times = np.zeros(samples)
+    for sample in range(samples):
+        prepare()
+        start = time.perf_counter_ns()
+        call()
+        times[sample] = time.perf_counter_ns() - start
+
+    latencies = times / operations / 1e3
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        "ops-per-second": 1e6 / latencies.mean(),
+        "p50": p50,
+        "p90": p90,
+        "p99": p99,
+        "samples": samples,
+    }
+
+
+def benchmark_game_step(size: int) -> dict:
+    game = None
+
+    def prepare():
+        nonlocal game
+        if game is None or not game.cohort.peasants:
+            game = _game(_peasants(size))
+
+    def call():
+        nonlocal game
+        finished, _ = game.step()
+        if finished:
+            game = None
+
+    return measure(prepare, call, samples=2000)
+
+
+def benchmark_game_play(size: int) -> dict:
+    """ Times runs of steps through whole games, as main.py plays them,
+    starting a new game whenever one finishes; latencies are per step, so
+    their inverse is the game's throughput in steps per second """
+
+    game = None
+
+    def call():
+        nonlocal game
+        for _ in range(PLAY_STEPS):
+            if game is None:
+                game = _game(_peasants(size))
+            finished, _ = game.step()
+            if finished:
+                game = None
+
+    return measure(lambda: None, call,
+            samples=max(30, min(300, 3000000 // (PLAY_STEPS * size))),
+            operations=PLAY_STEPS)
+
+
+def benchmark_game_end_turn(size: int) -> dict:
+    game = None
+
+    def prepare():
+        nonlocal game
+        if game is None:
+            game = _game(_peasants(size))
+
+        # Play the turn, without ending it
+        state = game.state()
+        while game.cohort.cursor < len(game.cohort.peasants):
+            peasant, _ = game.cohort.iterate()
+            game.resolve(peasant, peasant.action(state), 0.0)
+
+    def call():
+        nonlocal game
+        finished, _ = game.end_turn()
+        if finished:
+            game = None
+
+    return measure(prepare, call, samples=max(30, min(500, 50000 // size)))
+
+
+def benchmark_game_turn(size: int) -> dict:
+    """ Times whole turns, as Game.run plays them with the vectorized fast
+    path; latencies are per peasant, so they hold steady as the cohort
+    grows if a turn costs O(cohort) """
+
+    game = None
+
+    def prepare():
+        nonlocal game
+        if game is None:
+            game = _game(_peasants(size), vectorize=True)
+
+    def call():
+        nonlocal game
+        if game.vectorizable():
+            finished, _ = game.play_turn()
+        else:
+            while game.cohort.cursor < len(game.cohort.peasants) - 1:
+                game.step()
+            finished, _ = game.step()
+
+        if finished:
+            game = None
+
+    return measure(prepare, call,
+            samples=max(10, min(500, 200000 // size)),
+            operations=size)
+
+
+def benchmark_cohort_iterate(size: int) -> dict:
+    cohort = _game(_peasants(size)).cohort
+
+    def call():
+        for _ in range(size):
+            cohort.iterate()
+
+    return measure(cohort.shuffle, call,
+            samples=max(30, min(1000, 100000 // size)),
+            operations=size)
+
+
+def benchmark_ddpg_action(size: int, keras: bool = False) -> dict:
+    """ Times a frozen peasant's decisions, through its NumPy policy, or
+    through its Keras actor as it did before it had one """
+
+    from game.actors.ddpg_peasant import DDPGPeasant
+
+    peasant = DDPGPeasant(10, train=False)
+    if keras:
+        peasant.policy = None
+
+    game = _game(_peasants(size - 1) + [peasant])
+    state = game.state()
+
+    def prepare():
+        peasant.stamina = 5
+        peasant.health = 5
+
+    return measure(prepare, lambda: peasant.action(state), samples=300)
+
+
+def _fill(buffer, count: int):
+    generator = np.random.default_rng(seed)
+    states = generator.uniform(size=(count, 9))
+    actions = generator.uniform(size=(count, 2))
+    rewards = generator.integers(-5, 2, size=count)
+    for index in range(count):
+        buffer.record(states[index], actions[index], rewards[index],
+                states[(index + 1) % count])
+
+
+def benchmark_ddpg_update(fill: int) -> dict:
+    from game.actors.ddpg_peasant import DDPGPeasant
+
+    peasant = DDPGPeasant(10)
+    _fill(peasant.buffer, fill)
+
+    batch = None
+
+    def prepare():
+        nonlocal batch
+        batch = peasant.buffer.sample(BATCH_SIZE)
+
+    return measure(prepare, lambda: peasant.update(*batch), samples=300)
+
+
+def benchmark_ddpg_train_step(fused: bool) -> dict:
+    """ Times a whole training step: the gradient update and both target
+    rebalances, compiled together or run in turn """
+
+    from game.actors.ddpg_peasant import DDPGPeasant
+
+    peasant = DDPGPeasant(10, fused=fused)
+    _fill(peasant.buffer, FILL_LEVELS[0])
+
+    batch = None
+
+    def prepare():
+        nonlocal batch
+        batch = peasant.buffer.sample(BATCH_SIZE)
+
+    def call():
+        if fused:
+            peasant.train_step(*batch)
+        else:
+            peasant.update(*batch)
+            peasant.update_target(peasant.target_actor, peasant.actor)
+            peasant.update_target(peasant.target_critic, peasant.critic)
+
+    return measure(prepare, call, samples=300)
+
+
+def benchmark_ddpg_learn(prefetch: int) -> dict:
+    """ Times the learner's work per action, recording the transition and
+    training on a batch, with minibatches drawn in turn or prefetched """
+
+    from game.actors.ddpg_peasant import DDPGPeasant
+
+    peasant = DDPGPeasant(10, prefetch=prefetch)
+    _fill(peasant.buffer, FILL_LEVELS[0])
+
+    generator = np.random.default_rng(seed)
+
+    def prepare():
+        peasant.previous_state = generator.uniform(size=9)
+        peasant.previous_action = generator.uniform(size=2)
+
+    try:
+        return measure(prepare,
+                lambda: peasant.learn(-1, generator.uniform(size=9)),
+                samples=300)
+    finally:
+        peasant.close()
+
+
+def benchmark_buffer_sample(fill: int) -> dict:
+    from learning.experience_buffer import ExperienceBuffer
+
+    buffer = ExperienceBuffer(2, 9)
+    _fill(buffer, fill)
+
+    return measure(lambda: None, lambda: buffer.sample(BATCH_SIZE),
+            samples=1000)
+
+
+def benchmark_startup(module: str) -> dict:
+    """ Times a fresh interpreter importing a module, from the source
+    directory; entry points don't run when imported """
+
+    command = [sys.executable, "-c", f"import {module}" if module else "pass"]
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    def call():
+        subprocess.run(command, cwd=directory, check=True)
+
+    return measure(lambda: None, call, samples=5, warmup=1)
+
+
+def benchmarks(suite: str = "all") -> dict:
+    """ Returns the benchmarks of a suite, "game", "scaling", "startup",
+    "learning" or "all", by name, each as a function taking no arguments """
+
+    cases = {}
+    if suite in ("game", "all"):
+        for size in COHORT_SIZES:
+            cases[f"game-step/{size}"] = \
+                    lambda size=size: benchmark_game_step(size)
+            cases[f"game-play/{size}"] = \
+                    lambda size=size: benchmark_game_play(size)
+            cases[f"game-end-turn/{size}"] = \
+                    lambda size=size: benchmark_game_end_turn(size)
+            cases[f"cohort-iterate/{size}"] = \
+                    lambda size=size: benchmark_cohort_iterate(size)
+
+    if suite in ("scaling", "all"):
+        for size in SCALING_SIZES:
+            cases[f"game-turn/{size}"] = \
+                    lambda size=size: benchmark_game_turn(size)
+
+    if suite in ("startup", "all"):
+        for module in STARTUP_MODULES:
+            cases[f"startup/{module or 'python'}"] = \
+                    lambda module=module: benchmark_startup(module)
+
+    if suite in ("learning", "all"):
+        for size in COHORT_SIZES:
+            cases[f"ddpg-action/{size}"] = \
+                    lambda size=size: benchmark_ddpg_action(size)
+            cases[f"ddpg-action-keras/{size}"] = \
+                    lambda size=size: benchmark_ddpg_action(size, keras=True)
+        for fill in FILL_LEVELS:
+            cases[f"ddpg-update/{fill}"] = \
+                    lambda fill=fill: benchmark_ddpg_update(fill)
+            cases[f"buffer-sample/{fill}"] = \
+                    lambda fill=fill: benchmark_buffer_sample(fill)
+        cases["ddpg-train-step"] = lambda: benchmark_ddpg_train_step(True)
+        cases["ddpg-train-step-legacy"] = \
+                lambda: benchmark_ddpg_train_step(False)
+        for prefetch in (0, 2):
+            cases[f"ddpg-learn/prefetch-{prefetch}"] = \
+                    lambda prefetch=prefetch: benchmark_ddpg_learn(prefetch)
+
+    if not cases:
+        raise ValueError(f"invalid benchmark suite: {suite}")
+    return cases
+
+
+def run(suite: str = "all") -> dict:
+    results = {}
+    for name, benchmark in benchmarks(suite).items():
+        results[name] = benchmark()
+        result = results[name]
+        print(f"{name:<24}"
+                f"{result['ops-per-second']:>14,.0f} ops/s"
+                f"{result['p50']:>12,.1f}"
+                f"{result['p90']:>12,.1f}"
+                f"{result['p99']:>12,.1f} us (p50/p90/p99)",
+                flush=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """ Returns the names of the benchmarks whose median latency regressed
+    beyond the tolerance, printing the change of each """
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        change = result["p50"] / baseline[name]["p50"] - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+
+        flag = "  REGRESSED" if regressed else ""
+        print(f"{name:<24}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def save(results: dict, path: str = BASELINE_FILE):
+    """ Saves results as the baseline, keeping the results of benchmarks
+    this run didn't cover from the one before, if it was recorded on the
+    same machine """
+
+    merged = {}
+    if os.path.exists(path):
+        baseline = load(path)
+        if baseline["machine"] == machine():
+            merged = baseline["results"]
+    merged.update(results)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({"machine": machine(), "results": merged}, file, indent=4)
+
+
+def load(path: str = BASELINE_FILE) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def main(arguments: list, path: str = BASELINE_FILE) -> int:
+    """ Records a baseline, or runs against one; returns the exit status,
+    non-zero if there's no baseline or a benchmark regressed """
+
+    assert len(arguments) in (1, 2)
+    suite = arguments[1] if len(arguments) == 2 else "all"
+
+    # Record a new baseline
+    if arguments[0] == "baseline":
+        save(run(suite), path)
+        print(f"saved baseline to {os.path.normpath(path)}")
+        return 0
+
+    # Compare against the baseline, failing on regressions
+    elif arguments[0] == "run":
+        if not os.path.exists(path):
+            print(f"no baseline at {os.path.normpath(path)}; "
+                    "record one with 'benchmark.py baseline' first")
+            return 1
+
+        results = run(suite)
+        baseline = load(path)
+        if baseline["machine"] != machine():
+            print("warning: baseline was recorded on a different machine")
+
+        print()
+        regressions = compare(results, baseline["results"])
+        return 1 if regressions else 0
+
+    else:
+        raise ValueError(f"invalid benchmark argument: {arguments[0]}")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,5 +1,6 @@
 class Action:
+    __slots__ = ("attack", "defence")
 
     def __init__(self, attack: float, defence: float):
         self.attack = attack
-        self.defence = defence
\ No newline at end of file
+        self.defence = defence
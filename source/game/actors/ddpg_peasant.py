@@ -3,18 +3,22 @@ import numpy as np
 
 from tensorflow import keras
 
-from game.action import Action
-from game.state import State
+from game import instrumentation
 
-from game.actors.peasant import Peasant
+from game.actors.policy_peasant import PolicyPeasant, STATE_COUNT, ACTION_COUNT
 
-from learning.actor import Actor
-from learning.critic import Critic
+from learning import models
+from learning.policy import Policy
 from learning.ornstein_uhlenbeck_noise import OrnsteinUhlenbeckNoise
 from learning.experience_buffer import ExperienceBuffer
+from learning.prioritized_buffer import PrioritizedExperienceBuffer
+from learning.prefetch_sampler import PrefetchSampler
 
 
-class DDPGPeasant(Peasant):
+class DDPGPeasant(PolicyPeasant):
+    """ A policy peasant that learns its policy with DDPG. Once frozen
+    (train=False) it acts through a NumPy copy of its actor instead, which
+    skips TensorFlow on every decision """
 
     def __init__(self, 
             level: float,
@@ -26,123 +30,108 @@ class DDPGPeasant(Peasant):
             critic_alpha: float = 0.001,
             rebalance_tau: float = 0.005,
             discount_gamma: float = 0.99,
-            noise_deviation: float = 0.2):
+            noise_deviation: float = 0.2,
+            fused: bool = True,
+            prefetch: int = 0,
+            prioritized: bool = False):
         
         # DDPG stuff
-        state_count = 9
-        action_count = 2
+        state_count = STATE_COUNT
+        action_count = ACTION_COUNT
 
-        self.actor = Actor(state_count, action_count)
-        self.critic = Critic(state_count, action_count)
-
-        self.target_actor = Actor(state_count, action_count)
-        self.target_critic = Critic(state_count, action_count)
+        # Frozen peasants only ever evaluate their actor, so build nothing else
+        self.actor = models.actor(state_count, action_count)
 
         self.train = train
-        if weight_file is None:
-            self.target_actor.model.set_weights(self.actor.model.get_weights())
-            self.target_critic.model.set_weights(self.critic.model.get_weights())
+        if train:
+            self.critic = models.critic(state_count, action_count)
+            self.target_actor = models.actor(state_count, action_count)
+            self.target_critic = models.critic(state_count, action_count)
+
+            self.actor_optimizer = \
+                    keras.optimizers.Adam(learning_rate=actor_alpha)
+            self.critic_optimizer = \
+                    keras.optimizers.Adam(learning_rate=critic_alpha)
         else:
-            self.actor.model.load_weights(f"{weight_file}-actor.h5")
-            self.critic.model.load_weights(f"{weight_file}-critic.h5")
-            self.target_actor.model.load_weights(f"{weight_file}-target-actor.h5")
-            self.target_critic.model.load_weights(f"{weight_file}-target-critic.h5")
-
-        self.actor_optimizer = \
-                keras.optimizers.Adam(learning_rate=actor_alpha)
-        self.critic_optimizer = \
-                keras.optimizers.Adam(learning_rate=critic_alpha)
+            self.critic = None
+            self.target_actor = None
+            self.target_critic = None
+
+            self.actor_optimizer = None
+            self.critic_optimizer = None
         
-        self.buffer = ExperienceBuffer(action_count, state_count)
+        # Whether to replay transitions by how wrong the critic was about
+        # them, rather than uniformly
+        self.prioritized = prioritized
+        buffer = PrioritizedExperienceBuffer if prioritized else ExperienceBuffer
+        self.buffer = buffer(action_count,
+                state_count,
+                capacity=memory_capacity)
         self.batch_size = batch_size
-        
-        self.noise_generator = \
-                OrnsteinUhlenbeckNoise(deviation=noise_deviation)
 
+        # How many batches a background thread keeps ready, from the first
+        # training step on until close(); none samples in the training step
+        # itself, which keeps seeded runs reproducible
+        self.prefetch = prefetch
+        self.sampler = None
+        
         self.tau = rebalance_tau
         self.gamma = discount_gamma
 
-        self.previous_state = None
-        self.previous_action = None
+        # Whether to train with the single compiled step, or the gradient
+        # update and target rebalances in turn; compiling takes a few
+        # seconds, which only pays off over a long training run
+        self.fused = fused
 
-        self.previous_stamina = 0
-        self.previous_health = 0
-        self.previous_round = 0
-        self.previous_turn = 0
-        self.previous_level = 0
+        noise_generator = OrnsteinUhlenbeckNoise(deviation=noise_deviation)
+        super().__init__(level, noise_generator=noise_generator)
 
-        self.reward_total = 0
-        self.rewards = []
+        if weight_file is not None:
+            self.load(weight_file)
+        else:
+            if train:
+                self.target_actor.model.set_weights(self.actor.model.get_weights())
+                self.target_critic.model.set_weights(self.critic.model.get_weights())
+            self.refresh()
 
-        # Peasant attributes
-        self.level = level
-        super().__init__(0, 0, 0, 0)
+    def load(self, weight_file: str):
+        """ Loads the weights written by save(); a frozen peasant only has
+        its actor's """
 
-        self.reset()
+        models.load_weights(self.actor.model, f"{weight_file}-actor.h5")
+        if self.train:
+            models.load_weights(self.critic.model, f"{weight_file}-critic.h5")
+            models.load_weights(self.target_actor.model, f"{weight_file}-target-actor.h5")
+            models.load_weights(self.target_critic.model, f"{weight_file}-target-critic.h5")
 
-    def reset(self):
-        self.previous_state = None
-        self.previous_action = None
+        self.refresh()
 
-        self.stamina = self.level * np.random.uniform(0.25, 0.75)
-        self.health = self.level - self.stamina
+    def refresh(self):
+        """ Takes a frozen peasant's NumPy copy of its actor again. The copy
+        is a snapshot, so after setting the actor's weights directly, call
+        this for the peasant to act on them; load() does """
 
-        self.attack = self.level * np.random.uniform(0.25, 0.75)
-        self.defence = self.level - self.attack
+        if not self.train:
+            self.policy = Policy.from_model(self.actor.model)
 
-        self.previous_stamina = self.stamina
-        self.previous_health = self.health
-        self.previous_round = 0
-        self.previous_turn = 0
-        self.previous_level = (self.stamina 
-                + self.health 
-                + self.attack 
-                + self.defence)
+    def evaluate(self, state_vectors: np.ndarray) -> np.ndarray:
+        if self.policy is not None:
+            return super().evaluate(state_vectors)
 
-        self.reward_total = 0
-        self.rewards = []
-    
-    def create_state_tensor(self, state: State) -> tf.Tensor:
-        """ Transforms a state object into a trainable tensor """
-
-        combatant_count = len(state.combatants)
-        abstainer_count = len(state.abstainers)
-        peasant_count = len(state.cohort.peasants)
-
-        result = [
-            state.action.attack / state.monster.health,
-            state.action.defence / state.monster.attack,
-
-            combatant_count / peasant_count,
-            abstainer_count / peasant_count,
-            (combatant_count + abstainer_count) / peasant_count,
-
-            self.stamina / state.monster.health,
-            self.health / state.monster.attack,
-            self.attack / self.stamina,
-            self.defence / self.stamina,
-        ]
-        
-        result = tf.expand_dims(tf.convert_to_tensor(result), 0)
-        return result
-    
-    def create_action_object(self, tensor: np.ndarray) -> Action:
-        stamina_use, action_ratio = tensor
-
-        stamina = self.stamina * 0.99 * stamina_use
-        attack = stamina * action_ratio
-        defence = stamina - attack
-
-        return Action(attack, defence)
+        state_tensor = tf.convert_to_tensor(state_vectors)
+        return self.actor.model(state_tensor).numpy()
     
     @tf.function
     def update(self,
             states: tf.Tensor,
             actions: tf.Tensor,
             rewards: tf.Tensor,
-            new_states: tf.Tensor):
+            new_states: tf.Tensor,
+            weights: tf.Tensor = None) -> tf.Tensor:
         
-        """ TensorFlow wrapped gradient update function """
+        """ TensorFlow wrapped gradient update function; weights scale each
+        transition's critic loss, and the critic's absolute TD errors are
+        returned """
 
         # Train critic
         with tf.GradientTape() as tape:
@@ -157,7 +146,10 @@ class DDPGPeasant(Peasant):
             critic_inputs = [states, actions]
             critic_values = self.critic.model(critic_inputs, training=True)
             
-            values_mean = tf.math.square(target_critic_values - critic_values)
+            errors = target_critic_values - critic_values
+            values_mean = tf.math.square(errors)
+            if weights is not None:
+                values_mean = weights * values_mean
             critic_loss = tf.math.reduce_mean(values_mean)
 
         # Apply critic gradients
@@ -181,6 +173,7 @@ class DDPGPeasant(Peasant):
                 self.actor.model.trainable_variables)
         self.actor_optimizer.apply_gradients(actor_gradients)
 
+        return tf.math.abs(tf.squeeze(errors, axis=1))
 
     def update_target(self, 
             target: keras.Model, 
@@ -196,68 +189,196 @@ class DDPGPeasant(Peasant):
             target_weights.assign(source_weights * self.tau 
                     + target_weights * (1 - self.tau))
 
-    def action(self, state: State) -> Action:
-        state_tensor = self.create_state_tensor(state)
-        assert not np.isnan(state_tensor.numpy()).any()
-
-        # Sample action, with noise
-        samples = tf.squeeze(self.actor.model(state_tensor)).numpy() 
-        samples += self.noise_generator()
-
-        # Create new action object from model
-        action_tensor = np.asarray(np.squeeze(np.clip(samples, 0.0, 1.0)))
-        assert not np.isnan(action_tensor).any()
-        action = self.create_action_object(action_tensor)
-
-        # Calculate reward
-        reward = (int(self.stamina < self.previous_stamina) * -1
-                + int(self.health < self.previous_health) * -2
-                + int(self.health < 1.0) * -2
-                + int(state.round > self.previous_round)
-                + int(state.turn > self.previous_turn))
-        # reward = (self.stamina 
-        #         + self.health 
-        #         + self.attack 
-        #         + self.defence) - self.previous_level
-        self.reward_total += reward
-        self.rewards.append(reward)
-
-        # Train
-        if self.previous_state is not None:
-            
-            # Store experience
-            self.buffer.record(self.previous_state,
-                    self.previous_action,
-                    reward,
-                    state_tensor.numpy())
-
-            if self.train and self.buffer.pointer >= self.batch_size:
-
-                # Learn
-                states, actions, rewards, new_states = \
-                        self.buffer.sample(self.batch_size)
-                self.update(states, actions, rewards, new_states)
-                self.update_target(self.target_actor, self.actor)
-                self.update_target(self.target_critic, self.critic)
-
-        # Track state for updating reward
-        self.previous_action = action_tensor
-        self.previous_state = state_tensor.numpy()
-
-        self.previous_stamina = self.stamina
-        self.previous_health = self.health
-        self.previous_round = state.round
-        self.previous_turn = state.turn
-        self.previous_level = (self.stamina 
-                + self.health 
-                + self.attack 
-                + self.defence)
-
-        # Return result
-        return action
+    @tf.function(jit_compile=True)
+    def train_step(self,
+            states: tf.Tensor,
+            actions: tf.Tensor,
+            rewards: tf.Tensor,
+            new_states: tf.Tensor,
+            weights: tf.Tensor = None) -> tf.Tensor:
+
+        """ The gradient update and both target rebalances, compiled into
+        one XLA step; tau and gamma are baked in when it's first traced """
+
+        errors = self.update(states, actions, rewards, new_states, weights)
+
+        targets = (self.target_actor.model.variables
+                + self.target_critic.model.variables)
+        sources = self.actor.model.variables + self.critic.model.variables
+        for target, source in zip(targets, sources):
+            target.assign(source * self.tau + target * (1 - self.tau))
+
+        return errors
+
+    def record(self,
+            state: np.ndarray,
+            action: np.ndarray,
+            reward: int,
+            new_state: np.ndarray):
+
+        """ Stores a transition in the experience buffer """
+
+        timed = instrumentation.enabled
+        if timed:
+            mark = instrumentation.clock()
+
+        self.buffer.record(state, action, reward, new_state)
+        if timed:
+            instrumentation.record("ddpg/record", mark)
+
+    def optimise(self) -> bool:
+        """ Trains the networks on a batch of experience, once there is
+        enough of it; returns whether it did """
+
+        if self.buffer.pointer < self.batch_size:
+            return False
+
+        timed = instrumentation.enabled
+        if timed:
+            mark = instrumentation.clock()
+
+        if self.prefetch and self.sampler is None:
+            self.sampler = PrefetchSampler(self.buffer,
+                    self.batch_size,
+                    depth=self.prefetch)
+
+        if self.sampler is not None:
+            batch = self.sampler.sample()
+        else:
+            batch = self.buffer.sample(self.batch_size)
+        if timed:
+            mark = instrumentation.record("ddpg/sample", mark)
+
+        # Prioritized batches also carry weights, and the indices sampled
+        states, actions, rewards, new_states = batch[:4]
+        weights = batch[4] if self.prioritized else None
+
+        if self.fused:
+            errors = self.train_step(states, actions, rewards, new_states,
+                    weights)
+            if timed:
+                mark = instrumentation.record("ddpg/update", mark)
+        else:
+            errors = self.update(states, actions, rewards, new_states,
+                    weights)
+            if timed:
+                mark = instrumentation.record("ddpg/update", mark)
+
+            self.update_target(self.target_actor, self.actor)
+            self.update_target(self.target_critic, self.critic)
+            if timed:
+                mark = instrumentation.record("ddpg/update-target", mark)
+
+        if self.prioritized:
+            self.buffer.update_priorities(batch[5], errors.numpy())
+            if timed:
+                instrumentation.record("ddpg/priorities", mark)
+
+        return True
+
+    def close(self):
+        """ Stops the prefetching thread, if there is one; training again
+        starts a new one """
+
+        if self.sampler is not None:
+            self.sampler.close()
+            self.sampler = None
+
+    def learn(self, reward: int, state_vector: np.ndarray):
+        if not self.train or self.previous_state is None:
+            return
+
+        self.record(self.previous_state,
+                self.previous_action,
+                reward,
+                state_vector)
+        self.optimise()
 
     def save(self, name: str):
+        assert self.train, "frozen peasants have no critic to save"
+
         self.actor.model.save_weights(f"{name}-actor.h5")
         self.critic.model.save_weights(f"{name}-critic.h5")
         self.target_actor.model.save_weights(f"{name}-target-actor.h5")
-        self.target_critic.model.save_weights(f"{name}-target-critic.h5")
\ No newline at end of file
+        self.target_critic.model.save_weights(f"{name}-target-critic.h5")
+
+        # A TensorFlow free copy of the actor, for learning.policy.Policy
+        Policy.from_model(self.actor.model).save(f"{name}-policy.npz")
+
+    def networks(self) -> dict:
+        return {
+            "actor": self.actor.model,
+            "critic": self.critic.model,
+            "target-actor": self.target_actor.model,
+            "target-critic": self.target_critic.model,
+        }
+
+    def optimizers(self) -> dict:
+        """ Returns each optimiser, with the model it trains """
+
+        return {
+            "actor-optimizer": (self.actor_optimizer, self.actor.model),
+            "critic-optimizer": (self.critic_optimizer, self.critic.model),
+        }
+
+    def checkpoint(self) -> dict:
+        """ Returns copies of everything training changes, by name: the
+        networks, the optimisers' moments, the experience buffer and the
+        exploration noise """
+
+        assert self.train, "frozen peasants don't train"
+
+        arrays = {}
+        for name, model in self.networks().items():
+            for index, weight in enumerate(model.get_weights()):
+                arrays[f"{name}-{index}"] = weight
+
+        for name, (optimizer, _) in self.optimizers().items():
+            for index, variable in enumerate(_variables(optimizer)):
+                arrays[f"{name}-{index}"] = variable.numpy()
+
+        for key, array in self.buffer.checkpoint().items():
+            arrays[f"buffer-{key}"] = array
+
+        arrays["noise"] = np.array(self.noise_generator.previous_value)
+        return arrays
+
+    def restore(self, arrays: dict):
+        """ Restores a peasant built with the same arguments to a checkpoint """
+
+        assert self.train, "frozen peasants don't train"
+
+        for name, model in self.networks().items():
+            model.set_weights(_numbered(arrays, name))
+
+        for name, (optimizer, model) in self.optimizers().items():
+            values = _numbered(arrays, name)
+
+            # Optimisers create their moments on first use
+            if len(values) > len(_variables(optimizer)):
+                optimizer.build(model.trainable_variables)
+
+            variables = _variables(optimizer)
+            assert len(variables) == len(values), "optimizer state invalid"
+            for variable, value in zip(variables, values):
+                variable.assign(value)
+
+        self.buffer.restore({key[len("buffer-"):]: array
+                for key, array in arrays.items() if key.startswith("buffer-")})
+
+        self.noise_generator.previous_value = arrays["noise"].copy()
+
+
+def _variables(optimizer: keras.optimizers.Optimizer) -> list:
+    # A method in some Keras versions, and a property in others
+    variables = optimizer.variables
+    return variables() if callable(variables) else variables
+
+
+def _numbered(arrays: dict, name: str) -> list:
+    """ Returns the arrays name-0, name-1 and so on, in order """
+
+    values = []
+    while f"{name}-{len(values)}" in arrays:
+        values.append(arrays[f"{name}-{len(values)}"])
+    return values
@@ -1,4 +1,5 @@
 class Monster:
+    __slots__ = ("base_health", "health", "attack", "level", "lifetime")
 
     def __init__(self, health: float, attack: float):
         self.base_health = health
@@ -7,4 +8,3 @@ class Monster:
         
         self.level = health + attack
         self.lifetime = 1
-        
\ No newline at end of file
@@ -1,12 +1,20 @@
 import uuid
 
-import numpy as np
-
 from game.action import Action
 from game.state import State
 
 
 class Peasant:
+    """ A peasant's attributes are plain slots, which are quickest to read
+    and write a step at a time; a cohort copies them into arrays of its own
+    when it works on many peasants at once. index is the peasant's place in
+    its cohort """
+
+    __slots__ = ("stamina", "health", "attack", "defence", "index", "id")
+
+    # True for policies that decide without reading the game's state; such
+    # peasants provide actions(), which decides for many of them at once
+    stateless = False
 
     def __init__(self, 
             stamina: float, 
@@ -16,9 +24,10 @@ class Peasant:
         
         self.stamina = stamina
         self.health = health
-        self.attack = health
+        self.attack = attack
         self.defence = defence
 
+        self.index = 0
         self.id = uuid.uuid4().hex[:10]
 
     def action(self, state: State) -> Action:
@@ -41,4 +50,4 @@ class Peasant:
         
         self.stamina += experience * (2 / 3)
         self.attack += experience * (1 / 6)
-        self.defence += experience * (1 / 6)
\ No newline at end of file
+        self.defence += experience * (1 / 6)
@@ -0,0 +1,198 @@
+import numpy as np
+
+from game import instrumentation
+from game.action import Action
+from game.state import State
+
+from game.actors.peasant import Peasant
+
+
+STATE_COUNT = 9
+ACTION_COUNT = 2
+
+
+class PolicyPeasant(Peasant):
+    """ A peasant that acts on a learned policy: any callable taking a batch
+    of state vectors to actions, such as learning.policy.Policy, which needs
+    only NumPy. Keeps the reward bookkeeping learners need, and calls learn()
+    on every decision, which does nothing here """
+
+    def __init__(self,
+            level: float,
+            policy: callable = None,
+            noise_generator: callable = None):
+
+        self.policy = policy
+        self.noise_generator = noise_generator
+
+        self.previous_state = None
+        self.previous_action = None
+
+        self.previous_stamina = 0
+        self.previous_health = 0
+        self.previous_round = 0
+        self.previous_turn = 0
+        self.previous_level = 0
+
+        self.reward_total = 0
+        self.rewards = []
+
+        # Peasant attributes
+        self.level = level
+        super().__init__(0, 0, 0, 0)
+
+        self.reset()
+
+    def reset(self):
+        self.previous_state = None
+        self.previous_action = None
+
+        self.stamina = self.level * np.random.uniform(0.25, 0.75)
+        self.health = self.level - self.stamina
+
+        self.attack = self.level * np.random.uniform(0.25, 0.75)
+        self.defence = self.level - self.attack
+
+        self.previous_stamina = self.stamina
+        self.previous_health = self.health
+        self.previous_round = 0
+        self.previous_turn = 0
+        self.previous_level = (self.stamina
+                + self.health
+                + self.attack
+                + self.defence)
+
+        self.reward_total = 0
+        self.rewards = []
+
+    def create_state_vector(self, state: State) -> np.ndarray:
+        """ Transforms a state object into the policy's input """
+
+        combatant_count = len(state.combatants)
+        abstainer_count = len(state.abstainers)
+        peasant_count = len(state.cohort.peasants)
+
+        stamina = self.stamina
+
+        result = [
+            state.action.attack / state.monster.health,
+            state.action.defence / state.monster.attack,
+
+            combatant_count / peasant_count,
+            abstainer_count / peasant_count,
+            (combatant_count + abstainer_count) / peasant_count,
+
+            stamina / state.monster.health,
+            self.health / state.monster.attack,
+            self.attack / stamina,
+            self.defence / stamina,
+        ]
+
+        return np.array(result, dtype=np.float32)
+
+    def create_action_object(self, tensor: np.ndarray) -> Action:
+        stamina_use, action_ratio = tensor
+
+        stamina = self.stamina * 0.99 * stamina_use
+        attack = stamina * action_ratio
+        defence = stamina - attack
+
+        return Action(attack, defence)
+
+    def evaluate(self, state_vectors: np.ndarray) -> np.ndarray:
+        """ Evaluates the policy for a (batch, state count) array of states """
+
+        return self.policy(state_vectors)
+
+    def sample(self, state_vector: np.ndarray) -> np.ndarray:
+        """ Evaluates the policy for a state, adding exploration noise """
+
+        samples = self.evaluate(state_vector[np.newaxis])[0]
+        if self.noise_generator is not None:
+            samples += self.noise_generator()
+        return samples
+
+    def evaluate_reward(self, state: State) -> int:
+        """ Rewards the peasant for how things went since its last action """
+
+        return (int(self.stamina < self.previous_stamina) * -1
+                + int(self.health < self.previous_health) * -2
+                + int(self.health < 1.0) * -2
+                + int(state.round > self.previous_round)
+                + int(state.turn > self.previous_turn))
+
+    def learn(self, reward: int, state_vector: np.ndarray):
+        """ Called on every decision with the reward since the last, and the
+        new state; previous_state and previous_action still hold the last """
+
+        pass
+
+    def remember(self,
+            state: State,
+            state_vector: np.ndarray,
+            action_tensor: np.ndarray):
+
+        """ Tracks the state the peasant acted in, for the next reward """
+
+        self.previous_action = action_tensor
+        self.previous_state = state_vector
+
+        self.previous_stamina = self.stamina
+        self.previous_health = self.health
+        self.previous_round = state.round
+        self.previous_turn = state.turn
+        self.previous_level = (self.stamina
+                + self.health
+                + self.attack
+                + self.defence)
+
+    def decide(self,
+            state: State,
+            state_vector: np.ndarray,
+            samples: np.ndarray) -> Action:
+
+        """ Acts on policy samples for a state, which needn't have come from
+        sample(); a batch of peasants can be evaluated at once """
+
+        timed = instrumentation.enabled
+        if timed:
+            mark = instrumentation.clock()
+
+        # Create new action object from the policy
+        action_tensor = np.clip(samples, 0.0, 1.0)
+        assert not np.isnan(action_tensor).any()
+        action = self.create_action_object(action_tensor)
+
+        # Calculate reward
+        reward = self.evaluate_reward(state)
+        self.reward_total += reward
+        self.rewards.append(reward)
+        if timed:
+            mark = instrumentation.record("policy/reward", mark)
+
+        self.learn(reward, state_vector)
+        if timed:
+            mark = instrumentation.clock()
+
+        self.remember(state, state_vector, action_tensor)
+        if timed:
+            instrumentation.record("policy/bookkeeping", mark)
+
+        return action
+
+    def action(self, state: State) -> Action:
+        timed = instrumentation.enabled
+        if timed:
+            mark = instrumentation.clock()
+
+        state_vector = self.create_state_vector(state)
+        assert not np.isnan(state_vector).any()
+        if timed:
+            mark = instrumentation.record("policy/state", mark)
+
+        # Sample action, with noise
+        samples = self.sample(state_vector)
+        if timed:
+            instrumentation.record("policy/inference", mark)
+
+        return self.decide(state, state_vector, samples)
@@ -7,10 +7,14 @@ from game.state import State
 
 
 class RandomPeasant(Peasant):
+    __slots__ = ("level", "random")
 
-    def __init__(self, level: float):
+    stateless = True
+
+    def __init__(self, level: float, random=np.random):
         super().__init__(0, 0, 0, 0)
         self.level = level
+        self.random = random
         self.reset()
 
     def action(self, state: State) -> Action:
@@ -18,10 +22,10 @@ class RandomPeasant(Peasant):
         defence = 0
 
         # Attack/defend with a random amount of stamina, half of the time
-        if np.random.uniform() > 0.5:
-            attack = self.attack * np.random.uniform()
-        if np.random.uniform() > 0.5:
-            defence = self.defence * np.random.uniform()
+        if self.random.uniform() > 0.5:
+            attack = self.attack * self.random.uniform()
+        if self.random.uniform() > 0.5:
+            defence = self.defence * self.random.uniform()
         
         # Cap the amount of stamina needed for both actions; do some floating
         # point underflow prevention
@@ -32,9 +36,42 @@ class RandomPeasant(Peasant):
 
         return Action(attack, defence)
 
+    @staticmethod
+    def actions(peasants: list,
+            stamina: np.ndarray,
+            attack: np.ndarray,
+            defence: np.ndarray) -> tuple:
+
+        """ Decides the actions of many peasants at once, as action() does,
+        given arrays of their attributes. Returns arrays of attack and
+        defence; four numbers are drawn per peasant, where action() draws
+        two to four, from a shared random source in one go if they have
+        one. The actions are alike in distribution, not draw for draw """
+
+        random = peasants[0].random
+        if all(peasant.random is random for peasant in peasants):
+            draws = random.uniform(size=(len(peasants), 4))
+        else:
+            draws = np.array([peasant.random.uniform(size=4)
+                    for peasant in peasants])
+
+        attacks = np.where(draws[:, 0] > 0.5, attack * draws[:, 1], 0.0)
+        defences = np.where(draws[:, 2] > 0.5, defence * draws[:, 3], 0.0)
+
+        # Cap the amount of stamina needed for both actions
+        stamina_needed = (attacks + defences) * 1.01
+        capped = stamina_needed > stamina
+        ratio = np.divide(stamina, stamina_needed,
+                out=np.ones_like(stamina_needed),
+                where=capped)
+        attacks *= ratio
+        defences *= ratio
+
+        return attacks, defences
+
     def reset(self):
-        self.stamina = self.level * np.random.uniform(0.25, 0.75)
+        self.stamina = self.level * self.random.uniform(0.25, 0.75)
         self.health = self.level - self.stamina
 
-        self.attack = self.level * np.random.uniform(0.25, 0.75)
+        self.attack = self.level * self.random.uniform(0.25, 0.75)
         self.defence = self.level - self.attack
\ No newline at end of file
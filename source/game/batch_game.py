@@ -0,0 +1,327 @@
+import numpy as np
+
+from game.game import COLUMNS
+from game.options import TELEMETRY_LEVELS, REWARD_SCHEMES
+from game.recorder import Recorder
+
+
+class BatchGame:
+    """ Runs many independent games of random peasants in lockstep. Every
+    per-peasant attribute is held in a (game_count, cohort_size) array, and
+    each call to step() has one peasant in every unfinished game act """
+
+    def __init__(self,
+            game_count: int,
+            cohort_size: int,
+            level: float = 10,
+            reward_scheme: str = "uniform",
+            experience_factor: float = 0.9,
+            round_limit: int = 100,
+            monster_base_level: int = 10,
+            monster_level_factor: int = 1.05,
+            telemetry: str = "turn",
+            random=np.random):
+
+        if reward_scheme not in REWARD_SCHEMES:
+            raise ValueError(f"invalid reward scheme: {reward_scheme}")
+        if telemetry not in TELEMETRY_LEVELS:
+            raise ValueError(f"invalid telemetry level: {telemetry}")
+
+        self.monster_base_level = monster_base_level
+        self.monster_level_factor = monster_level_factor
+
+        self.reward_scheme = reward_scheme
+        self.experience_factor = experience_factor
+
+        self.random = random
+
+        self.round_limit = round_limit
+        self.round = np.zeros(game_count, dtype=int)
+        self.turn = np.zeros(game_count, dtype=int)
+        self.finished = np.zeros(game_count, dtype=bool)
+
+        shape = (game_count, cohort_size)
+
+        # Peasant attributes, as RandomPeasant.reset
+        self.stamina = level * self.random.uniform(0.25, 0.75, shape)
+        self.health = level - self.stamina
+        self.attack = level * self.random.uniform(0.25, 0.75, shape)
+        self.defence = level - self.attack
+
+        self.alive = np.ones(shape, dtype=bool)
+        self.combatant = np.zeros(shape, dtype=bool)
+
+        # Turn order; living peasants are shuffled to the front of each row
+        self.order = np.zeros(shape, dtype=int)
+        self.position = np.zeros(game_count, dtype=int)
+        self.cohort_size = np.full(game_count, cohort_size)
+
+        # Group action totals
+        self.action_attack = np.zeros(game_count)
+        self.action_defence = np.zeros(game_count)
+
+        # Monster attributes
+        self.monster_base_health = np.zeros(game_count)
+        self.monster_health = np.zeros(game_count)
+        self.monster_attack = np.zeros(game_count)
+        self.monster_level = np.zeros(game_count)
+
+        # Running totals used for the lifetime mean
+        self.lifetime_total = np.zeros(game_count)
+        self.lifetime_count = np.zeros(game_count, dtype=int)
+
+        self.telemetry = telemetry
+        self.recorders = [Recorder(COLUMNS) for _ in range(game_count)]
+
+        games = np.arange(game_count)
+        self.shuffle(games)
+        self.spawn_monsters(games)
+
+    def shuffle(self, games: np.ndarray):
+        """ Draws a new turn order for the given games """
+
+        keys = self.random.uniform(size=(len(games), self.order.shape[1]))
+        keys[~self.alive[games]] = np.inf
+        self.order[games] = np.argsort(keys, axis=1)
+        self.position[games] = 0
+
+    def spawn_monsters(self, games: np.ndarray):
+        level = self.monster_base_level \
+                    * (self.round[games] + 1) \
+                    * self.monster_level_factor
+        health = level * self.random.uniform(0.25, 0.75, len(games))
+        attack = level - health
+
+        self.monster_base_health[games] = health
+        self.monster_health[games] = health
+        self.monster_attack[games] = attack
+        self.monster_level[games] = health + attack
+
+    def grant_experience(self, games: np.ndarray, experience: np.ndarray):
+        """ Vectorized Peasant.grant_experience, for a (games, cohort)
+        matrix of experience """
+
+        stamina = self.stamina[games]
+        attack = self.attack[games]
+        defence = self.defence[games]
+
+        defecit = stamina - 2 * (attack + defence)
+        delta = np.where(defecit > 0, np.minimum(experience, defecit), 0)
+        experience = experience - delta
+
+        ratio = np.divide(attack, defence,
+                out=np.zeros_like(attack),
+                where=delta != 0)
+        attack += delta * ratio
+        defence += delta * (1 - ratio)
+
+        self.stamina[games] = stamina + experience * (2 / 3)
+        self.attack[games] = attack + experience * (1 / 6)
+        self.defence[games] = defence + experience * (1 / 6)
+
+    def distribute_experience(self,
+            games: np.ndarray,
+            survivors: np.ndarray,
+            cohort_sizes: np.ndarray,
+            experience: np.ndarray):
+
+        # Rewards all peasants equally
+        if self.reward_scheme == "uniform":
+            survivor_counts = survivors.sum(axis=1)
+            shares = np.divide(experience, survivor_counts,
+                    out=np.zeros_like(experience),
+                    where=survivor_counts > 0)
+
+        # Rewards all combatants equally; since survivors and combatants
+        # together span the cohort, that's every member of the cohort
+        elif self.reward_scheme == "combatant-uniform":
+            shares = experience / cohort_sizes
+
+        # Matches Game, which currently grants everyone a single point
+        else:
+            shares = np.ones_like(experience)
+
+        grants = np.where(survivors, shares[:, None], 0)
+        self.grant_experience(games, grants)
+
+    def end_turn(self, games: np.ndarray) -> np.ndarray:
+        """ Ends the current turn for the given games, returning which of
+        them finished """
+
+        alive = self.alive[games]
+        cohort_sizes = self.cohort_size[games]
+        rounds = self.round[games]
+
+        # Consider all peasants combatants if none fought
+        combatant = self.combatant[games] & alive
+        idle = ~combatant.any(axis=1)
+        combatant[idle] = alive[idle]
+        abstainer = alive & ~combatant
+
+        combatant_counts = combatant.sum(axis=1)
+        abstainer_counts = abstainer.sum(axis=1)
+
+        attack = self.action_attack[games]
+        defence = self.action_defence[games]
+        monster_health = self.monster_health[games]
+        monster_attack = self.monster_attack[games]
+
+        # Track how much damage was dealt
+        monster_killed = monster_health - attack <= 0
+        damage_dealt = np.where(monster_killed, monster_health, attack)
+
+        # Track how much damage was avoided
+        blocked = monster_attack - defence <= 0
+        damage_avoided = np.where(blocked, monster_attack, defence)
+        damage_avoided = np.where(monster_killed, 0, damage_avoided)
+
+        # Deal damage to the monster
+        monster_health = np.maximum(monster_health - attack, 0)
+        self.monster_health[games] = monster_health
+        monster_alive = monster_health > 0
+
+        # Give some health back to those who didn't fight
+        health = self.health[games] + abstainer
+
+        # Deal damage to peasants, track survivors
+        damage_taken = np.maximum(0, monster_attack - defence)
+        damage_taken = np.where(monster_alive, damage_taken, 0)
+
+        wounded = combatant & monster_alive[:, None]
+        health -= np.where(wounded,
+                (damage_taken / combatant_counts)[:, None],
+                0)
+        self.health[games] = health
+
+        died = wounded & (health <= 0)
+        survivors = alive & ~died
+        self.alive[games] = survivors
+
+        death_counts = died.sum(axis=1)
+        self.lifetime_total[games] += death_counts * rounds
+        self.lifetime_count[games] += death_counts
+
+        # Evaluate and distribute experience reward
+        experience = damage_dealt / self.monster_base_health[games]
+        experience += damage_avoided / monster_attack
+        experience *= self.monster_level[games] * self.experience_factor
+        self.distribute_experience(games,
+                survivors,
+                cohort_sizes,
+                experience)
+
+        # Start a new round, if the game hasn't finished
+        survivor_counts = survivors.sum(axis=1)
+        pit_escaped = self.round_limit != -1 \
+                and rounds + 1 >= self.round_limit
+        finished = pit_escaped | (survivor_counts == 0)
+
+        def average(values: np.ndarray,
+                counts: np.ndarray,
+                fallback: np.ndarray) -> np.ndarray:
+
+            return np.divide(values, counts,
+                    out=fallback.astype(float),
+                    where=counts > 0)
+
+        stamina_totals = np.where(survivors, self.stamina[games], 0).sum(1)
+        health_totals = np.where(survivors, self.health[games], 0).sum(1)
+
+        # Record some round information
+        status = np.column_stack([
+            rounds,
+            self.turn[games],
+            cohort_sizes,
+            combatant_counts,
+            abstainer_counts,
+            self.monster_level[games],
+            monster_health,
+            experience,
+            damage_dealt,
+            damage_avoided,
+            damage_taken,
+            average(stamina_totals, survivor_counts, rounds),
+            average(health_totals, survivor_counts, rounds),
+            average(self.lifetime_total[games],
+                    self.lifetime_count[games],
+                    rounds),
+        ])
+        # Keep the rows the telemetry level calls for
+        recorded = np.full(len(games), self.telemetry == "turn")
+        if self.telemetry == "round":
+            recorded |= monster_killed
+        if self.telemetry != "none":
+            recorded |= finished
+
+        for game, row in zip(games[recorded], status[recorded]):
+            self.recorders[game].append(*row)
+
+        self.finished[games[finished]] = True
+
+        # Set up the next turn for the games still running
+        continuing = games[~finished]
+        self.action_attack[continuing] = 0
+        self.action_defence[continuing] = 0
+        self.combatant[continuing] = False
+        self.cohort_size[continuing] = survivor_counts[~finished]
+        self.turn[continuing] += 1
+
+        # As in Game, the monster is spawned before the round advances
+        new_round = games[~finished & monster_killed]
+        self.spawn_monsters(new_round)
+        self.round[new_round] += 1
+
+        self.shuffle(continuing)
+
+        return finished
+
+    def step(self) -> np.ndarray:
+        """ Has the next peasant in each unfinished game act, returning the
+        indices of games whose turn ended """
+
+        games = np.flatnonzero(~self.finished)
+        peasants = self.order[games, self.position[games]]
+
+        stamina = self.stamina[games, peasants]
+
+        # Attack/defend with a random amount of stamina, half of the time,
+        # as RandomPeasant.action
+        draws = self.random.uniform(size=(4, len(games)))
+        attack = np.where(draws[0] > 0.5,
+                self.attack[games, peasants] * draws[1],
+                0)
+        defence = np.where(draws[2] > 0.5,
+                self.defence[games, peasants] * draws[3],
+                0)
+
+        # Cap the amount of stamina needed for both actions
+        stamina_needed = (attack + defence) * 1.01
+        capped = stamina_needed > stamina
+        scale = np.divide(stamina, stamina_needed,
+                out=np.ones_like(stamina),
+                where=capped)
+        attack *= scale
+        defence *= scale
+
+        self.action_attack[games] += attack
+        self.action_defence[games] += defence
+        self.stamina[games, peasants] = stamina - (attack + defence)
+
+        # Keep track of combatants
+        self.combatant[games, peasants] = (attack != 0) | (defence != 0)
+
+        self.position[games] += 1
+        spanned = games[self.position[games] == self.cohort_size[games]]
+        if len(spanned):
+            self.end_turn(spanned)
+
+        return spanned
+
+    def run(self) -> list:
+        """ Runs every game to completion, returning one DataFrame of
+        per-turn statistics for each """
+
+        while not self.finished.all():
+            self.step()
+
+        return [recorder.dataframe() for recorder in self.recorders]
@@ -1,26 +1,90 @@
 import numpy as np
 
-from game.actors.peasant import Peasant
+from game.peasant_store import PeasantStore
 
 
 class Cohort:
+    """ The peasants still in a game, and the order they act in. Each turn
+    order is a shuffle of their places, walked from the front; survivors
+    keep their places' order when the dead are dropped. So for a given
+    seed, the order peasants act in, and a game's results, depend on both
+    of these, not only on the random numbers drawn """
 
-    def __init__(self, peasants: list):
+    def __init__(self, peasants: list, random=np.random):
         self.position = 0
+        self.random = random
+
+        self.peasants = list(peasants)
+        for index, peasant in enumerate(self.peasants):
+            peasant.index = index
+
+        # The peasants' attributes as arrays, in their places, for work on
+        # the whole cohort at once; only current after gather()
+        self.store = PeasantStore(len(peasants))
+
+        self.indices = np.arange(len(peasants))
+        self.cursor = 0
+        self.shuffle()
+
+    def shuffle(self):
+        """ Draws a new order for the peasants, and restarts iteration """
+
+        size = len(self.peasants)
+        self.indices[:size] = np.arange(size)
+        self.random.shuffle(self.indices[:size])
+        self.cursor = 0
+
+    def gather(self) -> PeasantStore:
+        """ Copies the peasants' attributes into the store, and returns it """
+
+        peasants = self.peasants
+        store = self.store
+        size = len(peasants)
+
+        store.stamina[:size] = [peasant.stamina for peasant in peasants]
+        store.health[:size] = [peasant.health for peasant in peasants]
+        store.attack[:size] = [peasant.attack for peasant in peasants]
+        store.defence[:size] = [peasant.defence for peasant in peasants]
+        return store
+
+    def scatter(self):
+        """ Copies the store's attributes back to the peasants """
+
+        size = len(self.peasants)
+        columns = (array[:size].tolist() for array in self.store.arrays())
+        for peasant, stamina, health, attack, defence in zip(self.peasants,
+                *columns):
+            peasant.stamina = stamina
+            peasant.health = health
+            peasant.attack = attack
+            peasant.defence = defence
+
+    def compact(self, kept: list):
+        """ Keeps only the peasants flagged in kept, a list of booleans by
+        place, moving them to the front of the cohort in order """
+
+        # Everyone before the first dropped peasant stays where they are
+        if all(kept):
+            return
+
+        count = first = kept.index(False)
+        for peasant, keep in zip(self.peasants[first:], kept[first:]):
+            if keep:
+                self.peasants[count] = peasant
+                peasant.index = count
+                count += 1
+
+        del self.peasants[count:]
 
-        self.peasants = peasants
-        self.indices = list(range(len(peasants)))
-        np.random.shuffle(self.indices)
-    
     def iterate(self) -> tuple:
-        assert self.indices
+        assert self.cursor < len(self.peasants)
 
-        index = self.indices[-1]
-        self.indices = self.indices[:-1]
+        index = self.indices.item(self.cursor)
+        self.cursor += 1
 
         peasant = self.peasants[index]
-        done = not self.indices
+        done = self.cursor == len(self.peasants)
 
         self.position += 1
-        
-        return peasant, done
\ No newline at end of file
+
+        return peasant, done
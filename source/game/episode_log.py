@@ -0,0 +1,229 @@
+import os
+import struct
+
+import numpy as np
+
+from game.game import Game
+from game.options import REWARD_SCHEMES
+from game.action import Action
+from game.actors.monster import Monster
+from game.actors.peasant import Peasant
+
+
+VERSION = 2
+
+# The header's key, which marks a file as an episode log
+MAGIC = 0x534f4d41
+
+# Record kinds
+HEADER = 0
+CONFIGURATION = 1
+PEASANT = 2
+SPAWN = 3
+DECISION = 4
+
+# Every record is a kind, a peasant index (or other key), and four values:
+#   HEADER          version, keyed by MAGIC
+#   CONFIGURATION   game settings, four at a time, keyed by block
+#   PEASANT         stamina, health, attack, defence
+#   SPAWN           monster health, monster attack
+#   DECISION        attack, defence, reward
+RECORD = struct.Struct("<Bi4d")
+DTYPE = np.dtype([
+    ("kind", "<u1"),
+    ("peasant", "<i4"),
+    ("values", "<f8", (4,)),
+])
+
+
+class EpisodeLog:
+    """ Writes a game to an append-only binary log of fixed-width records:
+    its configuration and starting peasants, then every decision and monster
+    spawn in the order they happen. Pass one to Game as its log """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "wb")
+        self.indices = {}
+
+        self.write(HEADER, MAGIC, VERSION)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def write(self, kind: int, peasant: int, *values):
+        values += (0.0,) * (4 - len(values))
+        self.file.write(RECORD.pack(kind, peasant, *values))
+
+    def begin(self, game: Game):
+        """ Records the game's configuration, and its peasants, numbering
+        them in their starting order """
+
+        weights = [float(weight) for weight in game.weights]
+        assert len(weights) == 7, "weight dimensions invalid"
+
+        self.write(CONFIGURATION, 0,
+                REWARD_SCHEMES.index(game.reward_scheme),
+                game.experience_factor,
+                game.round_limit,
+                game.monster_base_level)
+        self.write(CONFIGURATION, 1, game.monster_level_factor, *weights[:3])
+        self.write(CONFIGURATION, 2, *weights[3:])
+
+        self.indices = {}
+        for index, peasant in enumerate(game.cohort.peasants):
+            self.indices[peasant.id] = index
+            self.write(PEASANT, index,
+                    peasant.stamina,
+                    peasant.health,
+                    peasant.attack,
+                    peasant.defence)
+
+    def spawn(self, monster: Monster):
+        self.write(SPAWN, -1, monster.base_health, monster.attack)
+
+    def decision(self, peasant: Peasant, action: Action, reward: float):
+        self.write(DECISION, self.indices[peasant.id],
+                action.attack, action.defence, reward)
+
+
+class ReplayGame(Game):
+    """ A game that plays back the decisions and monster spawns of a log,
+    instead of asking actors and drawing random numbers """
+
+    def __init__(self, records: np.ndarray, **arguments):
+        self.records = records
+        self.cursor = 0
+
+        kinds = records["kind"]
+        values = records["values"]
+
+        self.peasant_list = []
+        for index in np.flatnonzero(kinds == PEASANT):
+            stamina, health, attack, defence = values[index].tolist()
+            peasant = Peasant(stamina, health, attack, defence)
+            self.peasant_list.append(peasant)
+
+        # Decisions and spawns, in the order they were made
+        self.events = np.flatnonzero((kinds == SPAWN) | (kinds == DECISION))
+
+        super().__init__(list(self.peasant_list), **arguments)
+
+    def next_event(self, kind: int) -> tuple:
+        if self.cursor == len(self.events):
+            raise ValueError("episode log exhausted")
+
+        record = self.records[self.events[self.cursor]]
+        if record["kind"] != kind:
+            raise ValueError(f"episode log out of step at event {self.cursor}")
+
+        self.cursor += 1
+        return int(record["peasant"]), record["values"].tolist()
+
+    def spawn_monster(self) -> Monster:
+        _, (health, attack, _, _) = self.next_event(SPAWN)
+        return Monster(health, attack)
+
+    def step(self) -> tuple:
+        index, (attack, defence, reward, _) = self.next_event(DECISION)
+        peasant = self.peasant_list[index]
+
+        self.resolve(peasant, Action(attack, defence), reward)
+
+        cohort_spanned = (len(self.combatants) + len(self.abstainers)
+                == len(self.cohort.peasants))
+        return self.end_turn() if cohort_spanned else (False, None)
+
+    def run(self):
+        finished = False
+        while not finished:
+            finished, _ = self.step()
+        return self.recorder.dataframe()
+
+
+class Replayer:
+    """ Reads an episode log through a memory map, and rebuilds the game it
+    recorded at any turn, without calling any actors """
+
+    def __init__(self, path: str):
+        size = os.path.getsize(path)
+        if size < DTYPE.itemsize or size % DTYPE.itemsize:
+            raise ValueError(f"not an episode log: {path}")
+
+        self.records = np.memmap(path, dtype=DTYPE, mode="r")
+
+        header = self.records[0]
+        if header["kind"] != HEADER or header["peasant"] != MAGIC:
+            raise ValueError(f"not an episode log: {path}")
+        version = int(header["values"][0])
+        if version != VERSION:
+            raise ValueError(f"unsupported episode log version: {version}")
+
+    def configuration(self) -> dict:
+        """ Returns the keyword arguments the game was created with """
+
+        blocks = self.records[self.records["kind"] == CONFIGURATION]
+        values = np.concatenate(blocks["values"][np.argsort(blocks["peasant"])])
+
+        return {
+            "reward_scheme": REWARD_SCHEMES[int(values[0])],
+            "experience_factor": float(values[1]),
+            "round_limit": int(values[2]),
+            "monster_base_level": float(values[3]),
+            "monster_level_factor": float(values[4]),
+            "reward_weights": values[5:12].tolist(),
+        }
+
+    def decisions(self) -> np.ndarray:
+        """ Returns every decision as a structured array of peasant index,
+        attack, defence and reward """
+
+        records = self.records[self.records["kind"] == DECISION]
+
+        result = np.zeros(len(records), dtype=[
+            ("peasant", np.int32),
+            ("attack", float),
+            ("defence", float),
+            ("reward", float),
+        ])
+        result["peasant"] = records["peasant"]
+        result["attack"] = records["values"][:, 0]
+        result["defence"] = records["values"][:, 1]
+        result["reward"] = records["values"][:, 2]
+        return result
+
+    def game(self, telemetry: str = "turn") -> ReplayGame:
+        """ Returns a fresh game, at the start of the recording. Its random
+        source is never drawn from, except for shuffles that don't affect
+        the replay """
+
+        return ReplayGame(self.records,
+                telemetry=telemetry,
+                random=np.random.default_rng(0),
+                **self.configuration())
+
+    def replay(self, turn: int, telemetry: str = "turn") -> ReplayGame:
+        """ Returns the game as it stood at the start of the given turn """
+
+        game = self.game(telemetry)
+        while game.turn < turn:
+            finished, _ = game.step()
+            if finished:
+                raise ValueError(f"game finished before turn {turn}")
+        return game
+
+    def state(self, turn: int):
+        """ Returns the state peasants saw at the start of the given turn """
+
+        return self.replay(turn, telemetry="none").state()
+
+    def run(self, telemetry: str = "turn"):
+        """ Replays the whole game, recomputing its statistics """
+
+        return self.game(telemetry).run()
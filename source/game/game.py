@@ -1,16 +1,45 @@
-import yaml
-
 import numpy as np
-import pandas as pd
 
 from game.cohort import Cohort
+from game.peasant_store import PeasantStore
 from game.state import State
 from game.action import Action
+from game.recorder import Recorder
+from game.reward import RewardEvaluator
+from game.options import TELEMETRY_LEVELS, BACKENDS, REWARD_SCHEMES
+from game import kernel
+from game import instrumentation
 
 from game.actors.monster import Monster
 from game.actors.peasant import Peasant
 
 
+# Below this many peasants, playing a turn one by one is quicker
+VECTORIZE_MIN_SIZE = 16
+
+# Below this many peasants, ending a turn peasant by peasant is quicker
+# than through the cohort's arrays
+ARRAY_MIN_SIZE = 192
+
+# Per-turn statistics recorded by the game, and their types
+COLUMNS = [
+    ("round", int),
+    ("turn", int),
+    ("cohort-size", int),
+    ("combatants", int),
+    ("abstainers", int),
+    ("monster-level", float),
+    ("monster-health", float),
+    ("experience-gained", float),
+    ("damage-dealt", float),
+    ("damage-avoided", float),
+    ("damage-taken", float),
+    ("stamina-mean", float),
+    ("health-mean", float),
+    ("lifetime-mean", float),
+]
+
+
 class Game:
 
     def __init__(self, 
@@ -20,8 +49,20 @@ class Game:
             round_limit: int = 100,
             monster_base_level: int = 10,
             monster_level_factor: int = 1.05,
-            reward_weights: tuple = [1] * 7):
+            reward_weights: tuple = [1] * 7,
+            telemetry: str = "turn",
+            random=np.random,
+            backend: str = "python",
+            log=None,
+            vectorize: bool = False):
         
+        if reward_scheme not in REWARD_SCHEMES:
+            raise ValueError(f"invalid reward scheme: {reward_scheme}")
+        if telemetry not in TELEMETRY_LEVELS:
+            raise ValueError(f"invalid telemetry level: {telemetry}")
+        if backend not in BACKENDS:
+            raise ValueError(f"invalid backend: {backend}")
+
         self.monster_base_level = monster_base_level
         self.monster_level_factor = monster_level_factor
 
@@ -33,60 +74,172 @@ class Game:
         self.round = 0
         self.turn = 0
 
-        self.cohort = Cohort(peasants)
+        # The source of randomness for cohort shuffles and monster spawns;
+        # anything with NumPy's uniform() and shuffle(), by default the
+        # global NumPy state
+        self.random = random
+        self.backend = backend
+
+        # Whether run() may play whole turns at once, when every peasant
+        # left is of the same stateless type and there are at least
+        # VECTORIZE_MIN_SIZE of them; smaller cohorts are played a step at
+        # a time, flag or not. Batched actions draw their random numbers
+        # differently from one by one actions, so a seeded game plays out
+        # differently with it; it's off unless asked for
+        self.vectorize = vectorize
+        self.stateless = False
+
+        self.cohort = Cohort(peasants, random=random)
+
+        # An optional EpisodeLog, which records the starting peasants, then
+        # every decision and monster spawn
+        self.log = log
+        if log is not None:
+            log.begin(self)
+
         self.monster = self.spawn_monster()
         self.action = Action(0, 0)
 
         self.combatants = []
         self.abstainers = []
 
-        self.lifetimes = []
+        # Flags combatants by their place in the cohort
+        self.combatant_mask = np.zeros(len(self.cohort.peasants), dtype=bool)
+
+        # The cohort's store, if a whole turn was played through it and it's
+        # still current; the turn's end then works on it without gathering
+        self.gathered = None
+
         self.rewards = {}
+
+        # Running totals used for the lifetime mean
+        self.lifetime_total = 0
+        self.lifetime_count = 0
+
+        self.telemetry = telemetry
+        self.recorder = Recorder(COLUMNS)
+
+        self.view = State(self)
+        self.evaluator = RewardEvaluator(self, reward_weights)
     
-    def distribute_experience(self, peasants: list, experience: float):
+    def distribute_experience(self,
+            survivors: list,
+            experience: float,
+            store: PeasantStore = None):
+
+        """ Grants the turn's experience, given the survivors flagged by
+        their place in the cohort; through the store's arrays if one's
+        given, else peasant by peasant """
+
+        size = len(survivors)
 
         # Rewards all peasants equally
         if self.reward_scheme == "uniform":
-            peasant_count = len(peasants)
-            for peasant in peasants:
-                peasant.grant_experience(experience / peasant_count)
+            recipients = survivors
+            survivor_count = survivors.count(True)
+            if not survivor_count:
+                return
+            share = experience / survivor_count
         
-        # Rewards all combatants equally
+        # Rewards all combatants equally; survivors and combatants together
+        # always span the cohort
         elif self.reward_scheme == "combatant-uniform":
-            combatants = list(set(self.combatants).union(set(peasants)))
-            combatant_count = len(combatants)
-            for peasant in combatants:
-                peasant.grant_experience(experience / combatant_count)
+            recipients = None
+            share = experience / size
         
         # Rewards combatants in proportion to their contributions
-        # To-do: clean up
+        # To-do: weight by reward; for now, everybody gets a point
         elif self.reward_scheme == "socially-conscious":
-            rewards = list(self.rewards.values())
-            minimum = min(rewards)
-            offset = -minimum if minimum < 0 else 0
-
-            total = sum([reward + offset for reward in rewards])
-
-            rewards = {}
-            for id, reward in self.rewards.items():
-                offset_reward = reward + offset
-                proportion = total / offset_reward if offset_reward else 0
-                rewards[id] = proportion * experience
-            
-            for peasant in self.cohort.peasants:
-                # reward = rewards[peasant.id] if peasant.id in rewards else 0
-                peasant.grant_experience(1)
+            recipients = None
+            share = 1
 
         else:
             raise ValueError(f"invalid reward scheme: {self.reward_scheme}")
+
+        if store is not None:
+            if recipients is None:
+                store.grant_experience(np.ones(size, dtype=bool), share)
+            else:
+                store.grant_experience(np.array(recipients), share)
+        elif recipients is None:
+            for peasant in self.cohort.peasants:
+                peasant.grant_experience(share)
+        else:
+            for peasant, receives in zip(self.cohort.peasants, recipients):
+                if receives:
+                    peasant.grant_experience(share)
+
+    def settle(self, combatant: np.ndarray, damage: float, experience: float):
+        """ Heals the abstainers, hurts the combatants by damage each, unless
+        it's None, and grants the experience, peasant by peasant. Returns the
+        survivors flagged by place, and their total stamina and health """
+
+        survivors = []
+        for peasant, fought in zip(self.cohort.peasants, combatant.tolist()):
+            if not fought:
+                peasant.health += 1
+                survivors.append(True)
+            elif damage is None:
+                survivors.append(True)
+            else:
+                peasant.health -= damage
+                survivors.append(peasant.health > 0)
+
+        self.distribute_experience(survivors, experience)
+
+        stamina_total = 0
+        health_total = 0
+        for peasant, survived in zip(self.cohort.peasants, survivors):
+            if survived:
+                stamina_total += peasant.stamina
+                health_total += peasant.health
+
+        return survivors, stamina_total, health_total
+
+    def settle_arrays(self,
+            combatant: np.ndarray,
+            damage: float,
+            experience: float,
+            store: PeasantStore = None):
+
+        """ settle(), through the cohort's arrays; store, if given, is the
+        cohort's store and already current """
+
+        if store is None:
+            store = self.cohort.gather()
+        size = len(combatant)
+
+        health = store.health[:size]
+        health[~combatant] += 1
+        if damage is None:
+            alive = np.ones(size, dtype=bool)
+        else:
+            health[combatant] -= damage
+            alive = ~combatant | (health > 0)
+
+        survivors = alive.tolist()
+        self.distribute_experience(survivors, experience, store)
+        self.cohort.scatter()
+
+        return (survivors,
+                store.stamina[:size][alive].sum(),
+                health[alive].sum())
     
     def end_turn(self) -> tuple:
         """ Ends the current turn """
 
+        if instrumentation.enabled:
+            start = instrumentation.clock()
+
+        size = len(self.cohort.peasants)
+        combatant = self.combatant_mask[:size]
+        store, self.gathered = self.gathered, None
+
         # Consider all peasants combatants if none fought
         if not self.combatants:
-            self.combatants = self.cohort.peasants
-            self.abstainers = []
+            self.combatants.extend(self.cohort.peasants)
+            self.abstainers.clear()
+            combatant[:] = True
 
         # Track how much damage was dealt
         damage_dealt = self.action.attack 
@@ -104,210 +257,271 @@ class Game:
         # Deal damage to the monster
         self.monster.health -= self.action.attack
         self.monster.health = max(self.monster.health, 0)
-        
-        # Give some health back to those who didn't fight
-        for peasant in self.abstainers:
-            peasant.health += 1
 
-        # Deal damage to peasants, track survivors
-        death_count = 0
+        # The damage each combatant takes; if the monster died, nobody does
         damage_taken = 0
-        survivors = [peasant for peasant in self.abstainers]
+        damage = None
         if self.monster.health > 0:
             damage_taken = max(0, self.monster.attack - self.action.defence)
+            damage = damage_taken / len(self.combatants)
 
-            combatant_count = len(self.combatants)
-            for peasant in self.combatants:
-                peasant.health -= damage_taken / combatant_count
-
-                if peasant.health > 0:
-                    survivors.append(peasant)
-                else:
-                    death_count += 1
-                    self.lifetimes.append(self.round)
-        
-        # If the monster died, nobody takes damage
-        else:
-            survivors = self.cohort.peasants
-            
-        # Evaluate and distribute experience reward
+        # Evaluate the experience reward
         experience = damage_dealt / self.monster.base_health
         experience += damage_avoided / self.monster.attack
         experience *= self.monster.level * self.experience_factor
-        self.distribute_experience(survivors, experience)
+
+        # Give some health back to those who didn't fight, deal damage to
+        # the rest, and distribute the experience, flagging survivors by
+        # their place in the cohort
+        if store is None and size < ARRAY_MIN_SIZE:
+            survivors, stamina_total, health_total = self.settle(combatant,
+                    damage,
+                    experience)
+        else:
+            survivors, stamina_total, health_total = self.settle_arrays(
+                    combatant,
+                    damage,
+                    experience,
+                    store)
+
+        survivor_count = survivors.count(True)
+        death_count = size - survivor_count
+        self.lifetime_total += death_count * self.round
+        self.lifetime_count += death_count
     
         # Start a new round, if the game hasn't finished
         pit_escaped = self.round_limit != -1 and self.round + 1 >= self.round_limit
-        finished = pit_escaped or not survivors
+        finished = pit_escaped or not survivor_count
 
-        survivor_staminas = [peasant.stamina for peasant in survivors]
-        survivor_healths = [peasant.health for peasant in survivors]
+        # Record some round information, if the telemetry level calls for it
+        status = None
+        if (self.telemetry == "turn"
+                or (self.telemetry == "round" and monster_killed)
+                or (self.telemetry != "none" and finished)):
 
-        def average(values: list) -> float:
-            return sum(values) / len(values) if values else self.round
-        
-        # Display some round information
-        status = {
-            "round": self.round,
-            "turn": self.turn,
-            
-            "cohort-size": len(self.cohort.peasants),
+            def average(total: float, count: int) -> float:
+                return total / count if count else self.round
+
+            status = {
+                "round": self.round,
+                "turn": self.turn,
+                
+                "cohort-size": size,
 
-            "combatants": len(self.combatants),
-            "abstainers": len(self.abstainers),
+                "combatants": len(self.combatants),
+                "abstainers": len(self.abstainers),
 
-            "monster-level": self.monster.level,
-            "monster-health": self.monster.health,
+                "monster-level": self.monster.level,
+                "monster-health": self.monster.health,
 
-            "experience-gained": experience,
+                "experience-gained": experience,
 
-            "damage-dealt": damage_dealt,
-            "damage-avoided": damage_avoided,
-            "damage-taken": damage_taken,
-            "experience-gained": experience,
+                "damage-dealt": damage_dealt,
+                "damage-avoided": damage_avoided,
+                "damage-taken": damage_taken,
 
-            "stamina-mean": average(survivor_staminas),
-            "health-mean": average(survivor_healths),
-            "lifetime-mean": average(self.lifetimes) if self.lifetimes else self.round,
-        }
+                "stamina-mean": average(stamina_total, survivor_count),
+                "health-mean": average(health_total, survivor_count),
+                "lifetime-mean": average(self.lifetime_total, 
+                        self.lifetime_count),
+            }
 
-        # print(yaml.dump(status))
+            self.recorder.record(status)
 
         if not finished:
-            self.action = Action(0, 0)
-            self.cohort = Cohort(survivors)
+            self.action.attack = 0
+            self.action.defence = 0
 
-            self.combatants = []
-            self.abstainers = []
+            # Drop the dead from the cohort, and draw a new turn order
+            if death_count:
+                self.cohort.compact(survivors)
+            self.cohort.shuffle()
 
-            self.rewards = {}
+            self.combatants.clear()
+            self.abstainers.clear()
+            self.combatant_mask[:] = False
+
+            self.rewards.clear()
 
             self.turn += 1
 
             if monster_killed:
                 self.monster = self.spawn_monster()
                 self.round += 1
+
+            self.evaluator.invalidate()
+
+        if instrumentation.enabled:
+            instrumentation.record("end-turn", start)
         
         return finished, status
     
-    def run(self) -> pd.DataFrame:
-        keys = []
-        statistics = []
-        
-        while True:
-            finished, turn_statistics = self.step()
-
-            if turn_statistics:
-                values = list(turn_statistics.values())
-                statistics.append(values)
-                if finished:
-                    keys = list(turn_statistics.keys())
-            
-            if finished:
-                break
+    def run(self):
+        finished = False
+
+        # Hand the game to the kernel, if it can play it; peasants with
+        # their own logic need the reference engine
+        if self.backend == "kernel" and kernel.supports(self):
+            finished = kernel.run(self)
+
+        while not finished:
+            if self.cohort.cursor == 0 and self.vectorizable():
+                finished, _ = self.play_turn()
+            else:
+                finished, _ = self.step()
         
-        dataframe = pd.DataFrame(statistics, columns=keys)
-        return dataframe
+        return self.recorder.dataframe()
+
+    def vectorizable(self) -> bool:
+        """ True if whole turns can be played at once; the cohort only
+        shrinks, so once its peasants are all alike, they stay that way """
+
+        if not self.vectorize or self.log is not None:
+            return False
+        if len(self.cohort.peasants) < VECTORIZE_MIN_SIZE:
+            return False
+
+        if not self.stateless:
+            peasants = self.cohort.peasants
+            kind = type(peasants[0])
+            self.stateless = kind.stateless and all(
+                    type(peasant) is kind for peasant in peasants)
+
+        return self.stateless
+
+    def play_turn(self) -> tuple:
+        """ Plays a whole turn of stateless peasants at once, as step() would
+        one by one, in the cohort's order, then ends it """
+
+        if instrumentation.enabled:
+            start = instrumentation.clock()
+
+        cohort = self.cohort
+        store = cohort.gather()
+        peasants = cohort.peasants
+        size = len(peasants)
+
+        order = cohort.indices[:size]
+        members = [peasants[index] for index in order.tolist()]
+
+        stamina = store.stamina[order]
+        health = store.health[order]
+        attack = store.attack[order]
+        defence = store.defence[order]
+
+        attacks, defences = type(members[0]).actions(members,
+                stamina, attack, defence)
+
+        # The group's totals as each peasant acts, then once all have
+        group_attack = np.cumsum(np.concatenate(([self.action.attack], attacks)))
+        group_defence = np.cumsum(np.concatenate(([self.action.defence], defences)))
+
+        rewards = self.evaluator.evaluate_batch(stamina,
+                health,
+                attack,
+                defence,
+                attacks,
+                defences,
+                group_attack=group_attack[:-1],
+                group_defence=group_defence[:-1],
+                position=np.arange(size))
+
+        self.rewards.update(zip([peasant.id for peasant in members],
+                rewards.tolist()))
+
+        self.action.attack = group_attack.item(-1)
+        self.action.defence = group_defence.item(-1)
+        # The peasants' own stamina is brought up to date when the turn ends
+        store.stamina[order] = stamina - (attacks + defences)
+
+        # Keep track of combatants
+        acted = (attacks != 0) | (defences != 0)
+        self.combatant_mask[order] = acted
+        for peasant, combatant in zip(members, acted.tolist()):
+            if combatant:
+                self.combatants.append(peasant)
+            else:
+                self.abstainers.append(peasant)
+
+        cohort.cursor = size
+        cohort.position += size
+        self.evaluator.invalidate()
+
+        if instrumentation.enabled:
+            instrumentation.record("play-turn", start)
+
+        self.gathered = store
+        return self.end_turn()
     
     def spawn_monster(self) -> Monster:
         level = self.monster_base_level \
                     * (self.round + 1) \
                     * self.monster_level_factor
-        health = level * np.random.uniform(0.25, 0.75)
+        health = level * self.random.uniform(0.25, 0.75)
         attack = level - health
-        return Monster(health, attack)
+        monster = Monster(health, attack)
+
+        if self.log is not None:
+            self.log.spawn(monster)
+        return monster
 
     def state(self) -> State:
-        return State(self.monster, 
-                self.cohort, 
-                self.action, 
-                self.combatants, 
-                self.abstainers,
-                self.round,
-                self.turn)
+        return self.view
     
     def evaluate_reward(self, peasant: Peasant, action: Action) -> float:
-        group_attack = self.action.attack
-        group_defence = self.action.defence
-
-        combined_attack = group_attack + action.attack
-        combined_defence = group_defence + action.defence
-
-        potential_attack = min(peasant.stamina, peasant.attack)
-        potential_defence = min(peasant.stamina, peasant.defence)
-
-        # True if the peasant's actions killed the monster or saved the group
-        # Note that killing the monster also saves the group
-        killed_monster = (self.action.attack < self.monster.health 
-                and combined_attack >= self.monster.health)
-        saved_group = (killed_monster
-                or (self.monster.attack > self.action.defence 
-                    and combined_defence >= self.monster.attack))
+        return self.evaluator.evaluate(peasant.stamina,
+                peasant.health,
+                peasant.attack,
+                peasant.defence,
+                action.attack,
+                action.defence)
+
+    def evaluate_rewards(self, 
+            attacks: np.ndarray, 
+            defences: np.ndarray) -> np.ndarray:
         
-        # True if the monster is already dead, or the group already saved
-        monster_killed = group_attack >= self.monster.health
-        group_saved = monster_killed or self.monster.attack <= group_defence
-
-        # True if the player is capable of killing the monster
-        monster_killable = not monster_killed and (self.monster.health <= 
-                self.action.attack + potential_attack)
-        group_saveable = not group_saved and (self.monster.attack <= 
-                self.action.defence + potential_defence)
-
-        acted = action.attack or action.defence
-
-        group_size = len(self.cohort.peasants)
-
-        position = len(self.combatants) + len(self.abstainers)
-        completion_percentage = group_size / position if position else 0
-        
-        # True if the monster is stronger than the peasant by a margin
-        health_low = self.monster.health * 0.5 >= peasant.health
-        stamina_low = self.monster.attack * 0.5 >= peasant.stamina
-
-        # Rewarded attributes
-        weak = health_low or stamina_low
-        heroic = killed_monster or saved_group
-        early = acted and completion_percentage < 1 / group_size
-        brave = acted and (health_low or stamina_low) 
-        generous = (not monster_killed 
-                and not group_saved 
-                and (action.attack + action.defence) >= 0.5 * peasant.stamina)
-    
-        # Penalized attributes
-        selfish = ((not monster_killed and monster_killable)
-                or (not group_saved and group_saveable))
-        foolish = ((action.attack and monster_killed)
-                or (action.defence and group_saved))
-
-        criteria = [
-            weak,
-            heroic,
-            early,
-            brave,
-            generous,
-
-            -int(selfish),
-            -int(foolish),
-        ]
-        
-        # Weight attributes and sum result
-        assert len(self.weights) == len(criteria), "weight dimensions invalid"
-        pairs = zip(criteria, self.weights)
-        weighted_criteria = [weight * criteria for (weight, criteria) in pairs]
-        
-        return sum(weighted_criteria)
+        """ Evaluates the reward each peasant in the cohort would get for the
+        given hypothetical action, all at once """
+
+        size = len(self.cohort.peasants)
+        store = self.cohort.gather()
+        return self.evaluator.evaluate_batch(store.stamina[:size],
+                store.health[:size],
+                store.attack[:size],
+                store.defence[:size],
+                attacks,
+                defences)
 
     def step(self) -> tuple:
 
+        timed = instrumentation.enabled
+        if timed:
+            start = mark = instrumentation.clock()
+
         # Fetch a random peasant
         peasant, cohort_spanned = self.cohort.iterate()
 
         # Get their action
         action = peasant.action(self.state())
+        if timed:
+            mark = instrumentation.record("step/action", mark)
 
         # Evaluate experience reward
         reward = self.evaluate_reward(peasant, action)
+        if timed:
+            mark = instrumentation.record("step/reward", mark)
+
+        self.resolve(peasant, action, reward)
+        if timed:
+            instrumentation.record("step/resolve", mark)
+            instrumentation.record("step", start)
+
+        return self.end_turn() if cohort_spanned else (False, None)
+
+    def resolve(self, peasant: Peasant, action: Action, reward: float):
+        """ Applies a peasant's action, and the reward it earned, to the
+        turn in progress """
+
         self.rewards[peasant.id] = reward
 
         self.action.attack += action.attack
@@ -317,7 +531,11 @@ class Game:
         # Keep track of combatants
         if action.attack or action.defence:
             self.combatants.append(peasant)
+            self.combatant_mask[peasant.index] = True
         else:
             self.abstainers.append(peasant)
 
-        return self.end_turn() if cohort_spanned else (False, None)
\ No newline at end of file
+        self.evaluator.invalidate()
+
+        if self.log is not None:
+            self.log.decision(peasant, action, reward)
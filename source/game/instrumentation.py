@@ -0,0 +1,73 @@
+import time
+
+# Off by default; instrumented code checks this flag before reading the
+# clock, so it costs next to nothing when disabled
+enabled = False
+
+clock = time.perf_counter
+
+# Total seconds and call count per phase
+totals = {}
+
+# Called with each phase's name and duration, as it's recorded
+listeners = []
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    totals.clear()
+
+
+def subscribe(listener: callable):
+    listeners.append(listener)
+
+
+def unsubscribe(listener: callable):
+    listeners.remove(listener)
+
+
+def record(phase: str, start: float) -> float:
+    """ Records a phase that began at start, a reading of clock(); returns
+    the time it ended, to start the next phase from """
+
+    end = clock()
+    duration = end - start
+
+    total = totals.get(phase)
+    if total is None:
+        totals[phase] = [duration, 1]
+    else:
+        total[0] += duration
+        total[1] += 1
+
+    for listener in listeners:
+        listener(phase, duration)
+
+    return end
+
+
+def summary() -> list:
+    """ Returns a (phase, seconds, calls, mean seconds) row per phase, in
+    the order they were first recorded """
+
+    return [(phase, seconds, calls, seconds / calls)
+            for phase, (seconds, calls) in totals.items()]
+
+
+def table() -> str:
+    """ Formats the summary as a table, with times in milliseconds """
+
+    lines = [f"{'phase':<24}{'total ms':>12}{'calls':>10}{'mean ms':>12}"]
+    for phase, seconds, calls, mean in summary():
+        lines.append(f"{phase:<24}{seconds * 1e3:>12.1f}{calls:>10}"
+                f"{mean * 1e3:>12.4f}")
+    return "\n".join(lines)
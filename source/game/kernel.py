@@ -0,0 +1,403 @@
+import importlib.util
+
+import numpy as np
+
+from game.options import TELEMETRY_LEVELS, REWARD_SCHEMES
+from game.actors.monster import Monster
+from game.actors.random_peasant import RandomPeasant
+
+
+# True if the kernel can be compiled; without numba it still runs, but more
+# slowly than the reference engine, so games don't use it. Numba itself is
+# only imported once a game first uses the kernel
+available = importlib.util.find_spec("numba") is not None
+compiled = False
+
+# Slots of the integer state array
+ROUND = 0
+TURN = 1
+LIFETIME_COUNT = 2
+FINISHED = 3
+ROW_COUNT = 4
+DRAW_CURSOR = 5
+MEMBER_COUNT = 6
+
+# Slots of the floating point state array
+MONSTER_BASE_HEALTH = 0
+MONSTER_HEALTH = 1
+MONSTER_ATTACK = 2
+MONSTER_LEVEL = 3
+LIFETIME_TOTAL = 4
+GROUP_ATTACK = 5
+GROUP_DEFENCE = 6
+
+
+def grant_experience(stamina: np.ndarray,
+        attack: np.ndarray,
+        defence: np.ndarray,
+        index: int,
+        experience: float):
+
+    """ Peasant.grant_experience, for the peasant at the given index """
+
+    if (attack[index] + defence[index]) * 2 < stamina[index]:
+        defecit = stamina[index] - 2 * (attack[index] + defence[index])
+        delta = min(experience, defecit)
+        experience -= delta
+
+        ratio = attack[index] / defence[index]
+        attack[index] += delta * ratio
+        defence[index] += delta * (1 - ratio)
+
+    stamina[index] += experience * (2 / 3)
+    attack[index] += experience * (1 / 6)
+    defence[index] += experience * (1 / 6)
+
+
+def run_turns(stamina: np.ndarray,
+        health: np.ndarray,
+        attack: np.ndarray,
+        defence: np.ndarray,
+        alive: np.ndarray,
+        combatant: np.ndarray,
+        order: np.ndarray,
+        integers: np.ndarray,
+        floats: np.ndarray,
+        draws: np.ndarray,
+        rows: np.ndarray,
+        reward_scheme: int,
+        experience_factor: float,
+        round_limit: int,
+        monster_base_level: float,
+        monster_level_factor: float,
+        telemetry: int):
+
+    """ Plays whole turns of a game of random peasants, as Game.step and
+    Game.end_turn do, until the game finishes or a turn might run out of
+    random draws or space for statistics. Returns with the game's state
+    updated in place, to be called again """
+
+    size = len(stamina)
+    cursor = integers[DRAW_CURSOR]
+
+    while integers[FINISHED] == 0:
+
+        # Make sure the whole turn can be played
+        count = 0
+        for index in range(size):
+            if alive[index]:
+                order[count] = index
+                count += 1
+
+        if cursor + 5 * count + 1 > len(draws):
+            break
+        if integers[ROW_COUNT] == len(rows):
+            break
+
+        # Shuffle the living peasants
+        for index in range(count - 1, 0, -1):
+            swap = int(draws[cursor] * (index + 1))
+            cursor += 1
+            order[index], order[swap] = order[swap], order[index]
+
+        # Each peasant acts, as RandomPeasant.action
+        group_attack = 0.0
+        group_defence = 0.0
+        combatant_count = 0
+        for position in range(count):
+            index = order[position]
+
+            action_attack = 0.0
+            action_defence = 0.0
+            if draws[cursor] > 0.5:
+                action_attack = attack[index] * draws[cursor + 1]
+            if draws[cursor + 2] > 0.5:
+                action_defence = defence[index] * draws[cursor + 3]
+            cursor += 4
+
+            stamina_needed = (action_attack + action_defence) * 1.01
+            if stamina_needed > stamina[index]:
+                action_attack *= stamina[index] / stamina_needed
+                action_defence *= stamina[index] / stamina_needed
+
+            group_attack += action_attack
+            group_defence += action_defence
+            stamina[index] -= action_attack + action_defence
+
+            combatant[index] = action_attack != 0 or action_defence != 0
+            if combatant[index]:
+                combatant_count += 1
+
+        # Consider all peasants combatants if none fought
+        if combatant_count == 0:
+            for position in range(count):
+                combatant[order[position]] = True
+            combatant_count = count
+        abstainer_count = count - combatant_count
+
+        monster_health = floats[MONSTER_HEALTH]
+        monster_attack = floats[MONSTER_ATTACK]
+
+        # Track how much damage was dealt, and avoided
+        monster_killed = monster_health - group_attack <= 0
+        damage_dealt = monster_health if monster_killed else group_attack
+
+        damage_avoided = 0.0
+        if not monster_killed:
+            damage_avoided = group_defence
+            if monster_attack - group_defence <= 0:
+                damage_avoided = monster_attack
+
+        # Deal damage to the monster
+        monster_health = max(monster_health - group_attack, 0.0)
+        floats[MONSTER_HEALTH] = monster_health
+
+        # Give some health back to those who didn't fight
+        for position in range(count):
+            index = order[position]
+            if not combatant[index]:
+                health[index] += 1
+
+        # Deal damage to peasants, track survivors
+        death_count = 0
+        damage_taken = 0.0
+        if monster_health > 0:
+            damage_taken = max(0.0, monster_attack - group_defence)
+
+            for position in range(count):
+                index = order[position]
+                if combatant[index]:
+                    health[index] -= damage_taken / combatant_count
+                    if health[index] <= 0:
+                        alive[index] = False
+                        death_count += 1
+
+            floats[LIFETIME_TOTAL] += death_count * integers[ROUND]
+            integers[LIFETIME_COUNT] += death_count
+
+        survivor_count = count - death_count
+
+        # Evaluate and distribute experience reward; all but the uniform
+        # scheme reward the whole cohort, including the fallen
+        experience = damage_dealt / floats[MONSTER_BASE_HEALTH]
+        experience += damage_avoided / monster_attack
+        experience *= floats[MONSTER_LEVEL] * experience_factor
+
+        for position in range(count):
+            index = order[position]
+            if reward_scheme == 0:
+                if alive[index]:
+                    grant_experience(stamina, attack, defence, index,
+                            experience / survivor_count)
+            elif reward_scheme == 1:
+                grant_experience(stamina, attack, defence, index,
+                        experience / count)
+            else:
+                grant_experience(stamina, attack, defence, index, 1.0)
+
+        # Start a new round, if the game hasn't finished
+        pit_escaped = (round_limit != -1
+                and integers[ROUND] + 1 >= round_limit)
+        finished = pit_escaped or survivor_count == 0
+
+        if (telemetry == 3
+                or (telemetry == 2 and monster_killed)
+                or (telemetry != 0 and finished)):
+
+            stamina_total = 0.0
+            health_total = 0.0
+            for position in range(count):
+                index = order[position]
+                if alive[index]:
+                    stamina_total += stamina[index]
+                    health_total += health[index]
+
+            fallback = float(integers[ROUND])
+            stamina_mean = fallback
+            health_mean = fallback
+            if survivor_count:
+                stamina_mean = stamina_total / survivor_count
+                health_mean = health_total / survivor_count
+
+            lifetime_mean = fallback
+            if integers[LIFETIME_COUNT]:
+                lifetime_mean = (floats[LIFETIME_TOTAL]
+                        / integers[LIFETIME_COUNT])
+
+            row = rows[integers[ROW_COUNT]]
+            row[0] = integers[ROUND]
+            row[1] = integers[TURN]
+            row[2] = count
+            row[3] = combatant_count
+            row[4] = abstainer_count
+            row[5] = floats[MONSTER_LEVEL]
+            row[6] = monster_health
+            row[7] = experience
+            row[8] = damage_dealt
+            row[9] = damage_avoided
+            row[10] = damage_taken
+            row[11] = stamina_mean
+            row[12] = health_mean
+            row[13] = lifetime_mean
+            integers[ROW_COUNT] += 1
+
+        floats[GROUP_ATTACK] = group_attack
+        floats[GROUP_DEFENCE] = group_defence
+        integers[MEMBER_COUNT] = count
+
+        if finished:
+            integers[FINISHED] = 1
+            break
+
+        integers[TURN] += 1
+
+        # As in Game, the monster is spawned before the round advances
+        if monster_killed:
+            level = (monster_base_level
+                    * (integers[ROUND] + 1)
+                    * monster_level_factor)
+            monster_health = level * (0.25 + 0.5 * draws[cursor])
+            cursor += 1
+
+            monster_attack = level - monster_health
+
+            floats[MONSTER_BASE_HEALTH] = monster_health
+            floats[MONSTER_HEALTH] = monster_health
+            floats[MONSTER_ATTACK] = monster_attack
+            floats[MONSTER_LEVEL] = monster_health + monster_attack
+
+            integers[ROUND] += 1
+
+    integers[DRAW_CURSOR] = cursor
+
+
+def compile_kernel():
+    """ Compiles the kernel with numba, if it's installed and hasn't been
+    already; run_turns picks up the compiled grant_experience """
+
+    global grant_experience, run_turns, compiled
+
+    if compiled or not available:
+        return
+
+    import numba
+    grant_experience = numba.njit(cache=True)(grant_experience)
+    run_turns = numba.njit(cache=True)(run_turns)
+    compiled = True
+
+
+def supports(game) -> bool:
+    """ True if the kernel can play the rest of the given game; it only knows
+    the built-in game and random peasant, starts at the top of a turn, and
+    doesn't write episode logs. It draws everything from the game's source,
+    so peasants with sources of their own need the reference engine, else
+    their results would depend on whether numba is installed. Nor does it
+    keep rewards; subclasses, which could read them mid-game, are left to
+    the engine too """
+
+    # Imported here, since the game module imports this one
+    from game.game import Game
+
+    if not available or game.cohort.cursor != 0:
+        return False
+    if type(game) is not Game or game.log is not None:
+        return False
+
+    for peasant in game.cohort.peasants:
+        if type(peasant) is not RandomPeasant:
+            return False
+        if peasant.random is not game.random:
+            return False
+    return True
+
+
+def run(game, block_size: int = 1 << 14, row_capacity: int = 256) -> bool:
+    """ Plays a game to the end with the kernel, leaving it in the state the
+    reference engine would, except that game.rewards is left empty; draws
+    all randomness from the game's source. Returns True once the game's
+    finished """
+
+    compile_kernel()
+
+    cohort = game.cohort
+    size = len(cohort.peasants)
+    store = cohort.gather()
+
+    alive = np.ones(size, dtype=bool)
+    combatant = np.zeros(size, dtype=bool)
+    order = np.zeros(size, dtype=np.int64)
+
+    integers = np.zeros(7, dtype=np.int64)
+    integers[ROUND] = game.round
+    integers[TURN] = game.turn
+    integers[LIFETIME_COUNT] = game.lifetime_count
+
+    floats = np.zeros(7)
+    floats[MONSTER_BASE_HEALTH] = game.monster.base_health
+    floats[MONSTER_HEALTH] = game.monster.health
+    floats[MONSTER_ATTACK] = game.monster.attack
+    floats[MONSTER_LEVEL] = game.monster.level
+    floats[LIFETIME_TOTAL] = game.lifetime_total
+
+    draws = np.zeros(0)
+    rows = np.zeros((row_capacity, 14))
+    block_size = max(block_size, 5 * size + 1)
+
+    while not integers[FINISHED]:
+
+        # Top up the random draws, keeping any left over
+        remaining = draws[integers[DRAW_CURSOR]:]
+        fresh = game.random.uniform(size=block_size)
+        draws = np.concatenate([remaining, fresh])
+        integers[DRAW_CURSOR] = 0
+        integers[ROW_COUNT] = 0
+
+        run_turns(store.stamina[:size],
+                store.health[:size],
+                store.attack[:size],
+                store.defence[:size],
+                alive,
+                combatant,
+                order,
+                integers,
+                floats,
+                draws,
+                rows,
+                REWARD_SCHEMES.index(game.reward_scheme),
+                game.experience_factor,
+                game.round_limit,
+                game.monster_base_level,
+                game.monster_level_factor,
+                TELEMETRY_LEVELS.index(game.telemetry))
+
+        game.recorder.extend(rows[:integers[ROW_COUNT]])
+
+    # Leave the game as the reference engine would on its final turn
+    game.round = int(integers[ROUND])
+    game.turn = int(integers[TURN])
+    game.lifetime_total = float(floats[LIFETIME_TOTAL])
+    game.lifetime_count = int(integers[LIFETIME_COUNT])
+
+    monster = Monster(floats[MONSTER_BASE_HEALTH], floats[MONSTER_ATTACK])
+    monster.health = floats[MONSTER_HEALTH]
+    monster.level = floats[MONSTER_LEVEL]
+    game.monster = monster
+
+    game.action.attack = floats[GROUP_ATTACK]
+    game.action.defence = floats[GROUP_DEFENCE]
+
+    members = order[:integers[MEMBER_COUNT]]
+    peasants = cohort.peasants
+    game.combatants[:] = [peasants[index] for index in members
+            if combatant[index]]
+    game.abstainers[:] = [peasants[index] for index in members
+            if not combatant[index]]
+
+    cohort.scatter()
+
+    final_cohort = np.zeros(size, dtype=bool)
+    final_cohort[members] = True
+    cohort.compact(final_cohort.tolist())
+
+    game.evaluator.invalidate()
+    return True
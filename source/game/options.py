@@ -0,0 +1,14 @@
+# The options every engine accepts, kept in one place so the reference
+# engine, the batch engine and the kernel agree on them; the kernel and the
+# episode log refer to them by index
+
+
+# How often a game records statistics: never, once it finishes, at the end
+# of each round, or at the end of every turn
+TELEMETRY_LEVELS = ("none", "final", "round", "turn")
+
+# The engines a game can be run with; the kernel compiles whole turns of
+# built-in peasants, if numba's installed
+BACKENDS = ("python", "kernel")
+
+REWARD_SCHEMES = ("uniform", "combatant-uniform", "socially-conscious")
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+class PeasantStore:
+    """ Holds the attributes of a group of peasants in contiguous arrays,
+    for work on all of them at once """
+
+    def __init__(self, capacity: int):
+        self.stamina = np.zeros(capacity)
+        self.health = np.zeros(capacity)
+        self.attack = np.zeros(capacity)
+        self.defence = np.zeros(capacity)
+
+    def arrays(self) -> tuple:
+        return self.stamina, self.health, self.attack, self.defence
+
+    def grant_experience(self, mask: np.ndarray, experience: float):
+        """ Peasant.grant_experience, for every peasant flagged in mask """
+
+        count = len(mask)
+        stamina = self.stamina[:count][mask]
+        attack = self.attack[:count][mask]
+        defence = self.defence[:count][mask]
+
+        defecit = stamina - 2 * (attack + defence)
+        delta = np.where(defecit > 0, np.minimum(experience, defecit), 0)
+        experience = experience - delta
+
+        ratio = np.divide(attack, defence,
+                out=np.zeros_like(attack),
+                where=delta != 0)
+        attack += delta * ratio
+        defence += delta * (1 - ratio)
+
+        self.stamina[:count][mask] = stamina + experience * (2 / 3)
+        self.attack[:count][mask] = attack + experience * (1 / 6)
+        self.defence[:count][mask] = defence + experience * (1 / 6)
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+
+
+class RandomSource:
+    """ Hands out uniform random numbers from blocks drawn in advance, which
+    avoids paying NumPy's per-call overhead for every scalar. Offers the
+    uniform() and shuffle() methods the game and its actors use, so it can
+    stand in for a Generator. For a given generator seed, and the same
+    sequence of calls, the numbers drawn are always the same """
+
+    def __init__(self, generator=None, block_size: int = 1024):
+        if generator is None:
+            generator = np.random.default_rng()
+
+        self.generator = generator
+        self.block_size = block_size
+
+        # Drawn on first use, so an idle source costs next to nothing. The
+        # block is read through a memoryview, which hands out plain floats
+        # more quickly than the array does
+        self.block = np.zeros(0)
+        self.values = memoryview(self.block)
+        self.cursor = 0
+
+    def refill(self):
+        self.block = self.generator.random(self.block_size)
+        self.values = memoryview(self.block)
+        self.cursor = 0
+
+    def take(self, count: int) -> np.ndarray:
+        """ Returns the next count numbers in [0, 1), as an array """
+
+        available = len(self.block) - self.cursor
+        if count > available:
+            # Keep what's left, and draw enough whole blocks for the rest
+            blocks = -(-(count - available) // self.block_size)
+            self.block = np.concatenate([self.block[self.cursor:],
+                    self.generator.random(blocks * self.block_size)])
+            self.values = memoryview(self.block)
+            self.cursor = 0
+
+        values = self.block[self.cursor:self.cursor + count]
+        self.cursor += count
+        return values
+
+    def uniform(self, low: float = 0.0, high: float = 1.0, size=None):
+        if size is not None:
+            if isinstance(size, int):
+                values = self.take(size)
+            else:
+                values = self.take(math.prod(size)).reshape(size)
+
+            if low == 0.0 and high == 1.0:
+                return values.copy()
+            return low + (high - low) * values
+
+        if self.cursor == len(self.block):
+            self.refill()
+
+        value = self.values[self.cursor]
+        self.cursor += 1
+        return low + (high - low) * value
+
+    def shuffle(self, values: np.ndarray):
+        self.generator.shuffle(values)
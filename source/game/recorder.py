@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class Recorder:
+    """ Collects per-turn statistics into typed columns, which are
+    preallocated and doubled in size whenever they fill up """
+
+    def __init__(self, columns: list, capacity: int = 64):
+        self.size = 0
+        self.capacity = capacity
+
+        self.columns = {}
+        for name, dtype in columns:
+            self.columns[name] = np.zeros(capacity, dtype=dtype)
+
+        self.frame = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def grow(self):
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            resized = np.zeros(self.capacity, dtype=column.dtype)
+            resized[:self.size] = column[:self.size]
+            self.columns[name] = resized
+
+    def append(self, *values):
+        """ Records a row, given one value per column in column order """
+
+        if self.size == self.capacity:
+            self.grow()
+
+        for column, value in zip(self.columns.values(), values):
+            column[self.size] = value
+
+        self.size += 1
+        self.frame = None
+
+    def extend(self, rows: np.ndarray):
+        """ Records a (rows, columns) array of rows at once """
+
+        while self.size + len(rows) > self.capacity:
+            self.grow()
+
+        end = self.size + len(rows)
+        for index, column in enumerate(self.columns.values()):
+            column[self.size:end] = rows[:, index]
+
+        self.size = end
+        self.frame = None
+
+    def record(self, values: dict):
+        """ Records a row, given a value for each column by name """
+
+        self.append(*[values[name] for name in self.columns])
+
+    def array(self) -> np.ndarray:
+        """ Returns the recorded rows as a structured array """
+
+        dtype = [(name, column.dtype) for name, column in self.columns.items()]
+        result = np.zeros(self.size, dtype=dtype)
+        for name, column in self.columns.items():
+            result[name] = column[:self.size]
+        return result
+
+    def dataframe(self):
+        """ Returns the recorded rows as a pandas DataFrame, built on first
+        use; pandas is only imported then """
+
+        if self.frame is None:
+            import pandas as pd
+
+            columns = {name: column[:self.size].copy()
+                    for name, column in self.columns.items()}
+            self.frame = pd.DataFrame(columns)
+        return self.frame
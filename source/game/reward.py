@@ -0,0 +1,216 @@
+import numpy as np
+
+
+# The first five criteria are rewarded, and the last two penalized
+SIGNS = np.array([1, 1, 1, 1, 1, -1, -1])
+
+
+class RewardEvaluator:
+    """ Evaluates the reward for a peasant's action. The terms that depend
+    only on the group (the monster, the group's action so far, the cohort
+    size and position) are computed once, and reused until the game calls
+    invalidate() """
+
+    def __init__(self, game, weights: tuple):
+        assert len(weights) == len(SIGNS), "weight dimensions invalid"
+
+        self.game = game
+        self.weights = [float(weight) for weight in weights]
+        self.signed_weights = np.asarray(self.weights) * SIGNS
+
+        self.stale = True
+
+        self.group_attack = 0
+        self.group_defence = 0
+        self.monster_health = 0
+        self.monster_attack = 0
+        self.group_size = 0
+        self.position = 0
+
+        self.monster_killed = False
+        self.group_saved = False
+        self.early = False
+
+    def invalidate(self):
+        self.stale = True
+
+    def update(self):
+        """ Caches the group level terms """
+
+        game = self.game
+
+        self.group_attack = game.action.attack
+        self.group_defence = game.action.defence
+        self.monster_health = game.monster.health
+        self.monster_attack = game.monster.attack
+
+        self.group_size = len(game.cohort.peasants)
+        self.position = len(game.combatants) + len(game.abstainers)
+
+        # True if the monster is already dead, or the group already saved
+        self.monster_killed = self.group_attack >= self.monster_health
+        self.group_saved = (self.monster_killed
+                or self.monster_attack <= self.group_defence)
+
+        # True if acting now counts as acting early in the turn
+        completion_percentage = (self.group_size / self.position
+                if self.position else 0)
+        self.early = completion_percentage < 1 / self.group_size
+
+        self.stale = False
+
+    def evaluate(self,
+            stamina: float,
+            health: float,
+            attack: float,
+            defence: float,
+            action_attack: float,
+            action_defence: float) -> float:
+
+        """ Evaluates the reward for a single peasant's action, as
+        Game.evaluate_reward """
+
+        if self.stale:
+            self.update()
+
+        group_attack = self.group_attack
+        group_defence = self.group_defence
+        monster_health = self.monster_health
+        monster_attack = self.monster_attack
+        monster_killed = self.monster_killed
+        group_saved = self.group_saved
+
+        potential_attack = min(stamina, attack)
+        potential_defence = min(stamina, defence)
+
+        # True if the peasant's actions killed the monster or saved the group
+        killed_monster = (group_attack < monster_health
+                and group_attack + action_attack >= monster_health)
+        saved_group = (killed_monster
+                or (monster_attack > group_defence
+                    and group_defence + action_defence >= monster_attack))
+
+        # True if the player is capable of killing the monster
+        monster_killable = not monster_killed and (monster_health <=
+                group_attack + potential_attack)
+        group_saveable = not group_saved and (monster_attack <=
+                group_defence + potential_defence)
+
+        acted = action_attack or action_defence
+
+        # True if the monster is stronger than the peasant by a margin
+        health_low = monster_health * 0.5 >= health
+        stamina_low = monster_attack * 0.5 >= stamina
+
+        # Sum the weights of the criteria met, in order
+        weights = self.weights
+        reward = 0
+        if health_low or stamina_low:
+            reward += weights[0]
+        if killed_monster or saved_group:
+            reward += weights[1]
+        if acted and self.early:
+            reward += weights[2]
+        if acted and (health_low or stamina_low):
+            reward += weights[3]
+        if (not monster_killed
+                and not group_saved
+                and (action_attack + action_defence) >= 0.5 * stamina):
+            reward += weights[4]
+        if ((not monster_killed and monster_killable)
+                or (not group_saved and group_saveable)):
+            reward -= weights[5]
+        if ((action_attack and monster_killed)
+                or (action_defence and group_saved)):
+            reward -= weights[6]
+
+        return reward
+
+    def criteria(self,
+            stamina: np.ndarray,
+            health: np.ndarray,
+            attack: np.ndarray,
+            defence: np.ndarray,
+            action_attack: np.ndarray,
+            action_defence: np.ndarray,
+            group_attack: np.ndarray = None,
+            group_defence: np.ndarray = None,
+            position: np.ndarray = None) -> np.ndarray:
+
+        """ Evaluates the criteria for a batch of (peasant, action) pairs, as
+        a (pairs, 7) boolean matrix. By default each action is judged against
+        the group as it stands; passing the group totals and position per
+        pair judges a sequence of actions instead """
+
+        if self.stale:
+            self.update()
+
+        if group_attack is None:
+            group_attack = self.group_attack
+        if group_defence is None:
+            group_defence = self.group_defence
+
+        group_attack = np.asarray(group_attack)
+        group_defence = np.asarray(group_defence)
+
+        monster_health = self.monster_health
+        monster_attack = self.monster_attack
+
+        potential_attack = np.minimum(stamina, attack)
+        potential_defence = np.minimum(stamina, defence)
+
+        killed_monster = ((group_attack < monster_health)
+                & (group_attack + action_attack >= monster_health))
+        saved_group = (killed_monster
+                | ((monster_attack > group_defence)
+                    & (group_defence + action_defence >= monster_attack)))
+
+        monster_killed = group_attack >= monster_health
+        group_saved = monster_killed | (monster_attack <= group_defence)
+
+        monster_killable = ~monster_killed & (monster_health <=
+                group_attack + potential_attack)
+        group_saveable = ~group_saved & (monster_attack <=
+                group_defence + potential_defence)
+
+        acted = (action_attack != 0) | (action_defence != 0)
+        if position is None:
+            early_position = self.early
+        else:
+            early_position = early(self.group_size, position)
+
+        health_low = monster_health * 0.5 >= health
+        stamina_low = monster_attack * 0.5 >= stamina
+        weak = health_low | stamina_low
+
+        criteria = [
+            weak,
+            killed_monster | saved_group,
+            acted & early_position,
+            acted & weak,
+            ~monster_killed & ~group_saved
+                & (action_attack + action_defence >= 0.5 * stamina),
+            (~monster_killed & monster_killable)
+                | (~group_saved & group_saveable),
+            ((action_attack != 0) & monster_killed)
+                | ((action_defence != 0) & group_saved),
+        ]
+
+        return np.stack(np.broadcast_arrays(*criteria), axis=-1)
+
+    def evaluate_batch(self, *arguments, **keywords) -> np.ndarray:
+        """ Evaluates the rewards for a batch of (peasant, action) pairs,
+        taking the same arguments as criteria() """
+
+        return self.criteria(*arguments, **keywords) @ self.signed_weights
+
+
+def early(group_size: int, position: np.ndarray) -> np.ndarray:
+    """ True where acting at the given positions in the turn counts as
+    acting early """
+
+    position = np.asarray(position)
+    completion_percentage = np.divide(group_size, position,
+            out=np.zeros(position.shape),
+            where=position != 0)
+    return completion_percentage < 1 / group_size
@@ -0,0 +1,127 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game.game import Game
+from game.batch_game import BatchGame
+from game.random_source import RandomSource
+from game.actors.random_peasant import RandomPeasant
+
+
+def simulate(job: tuple):
+    """ Runs a single game of random peasants, given a configuration and
+    a seed sequence. The game and each peasant draw from their own buffered
+    generators, spawned from that sequence, so the result depends only on
+    the job itself. The kernel draws everything from the game's source, so
+    for it the peasants share that one """
+
+    configuration, seed, summarise = job
+
+    arguments = dict(configuration)
+    group_size = arguments.pop("group_size", 10)
+    level = arguments.pop("level", 10)
+
+    game_seed, *peasant_seeds = seed.spawn(1 + group_size)
+    game_random = RandomSource(np.random.default_rng(game_seed))
+
+    peasants = []
+    for peasant_seed in peasant_seeds:
+        random = game_random
+        if arguments.get("backend") != "kernel":
+            generator = np.random.default_rng(peasant_seed)
+            random = RandomSource(generator, block_size=256)
+        peasants.append(RandomPeasant(level, random=random))
+
+    game = Game(peasants, random=game_random, **arguments)
+    results = game.run()
+
+    return results if summarise is None else summarise(results)
+
+
+def simulate_batch(job: tuple):
+    """ Runs a group of games with the same configuration in lockstep, as
+    one BatchGame drawing from a generator for the group's seed sequence """
+
+    configuration, count, seed, summarise = job
+
+    arguments = dict(configuration)
+    group_size = arguments.pop("group_size", 10)
+
+    # Options for the reference engine; a batch game has its own
+    arguments.pop("backend", None)
+    arguments.pop("vectorize", None)
+
+    game = BatchGame(count,
+            group_size,
+            random=np.random.default_rng(seed),
+            **arguments)
+    results = game.run()
+
+    if summarise is None:
+        return results
+    return [summarise(result) for result in results]
+
+
+class Runner:
+    """ Runs independent games across a pool of worker processes. Every job
+    gets its own seed sequence, spawned from the runner's seed, so results
+    are identical however many workers there are """
+
+    def __init__(self,
+            workers: int = None,
+            seed: int = 100,
+            batched: bool = False,
+            batch_size: int = 256):
+
+        self.workers = workers or os.cpu_count()
+        self.seed = seed
+
+        # Whether to run games of the same configuration together, in
+        # batches of up to batch_size. The games follow the same rules, but
+        # draw differently, so results match the reference engine's in
+        # distribution rather than game for game
+        self.batched = batched
+        self.batch_size = batch_size
+
+    def _map(self, function: callable, jobs: list) -> list:
+        if self.workers == 1:
+            return [function(job) for job in jobs]
+
+        chunk_size = max(1, len(jobs) // (self.workers * 4))
+        with ProcessPoolExecutor(self.workers) as pool:
+            return list(pool.map(function, jobs, chunksize=chunk_size))
+
+    def run(self, configurations: list, summarise: callable = None) -> list:
+        """ Runs a game per configuration, returning the results of each, in
+        order. A configuration holds a group_size and peasant level, and any
+        keyword arguments for Game; summarise, if given, reduces a game's
+        results in the worker, and must be a module-level function """
+
+        if self.batched:
+            return self._run_batched(configurations, summarise)
+
+        seeds = np.random.SeedSequence(self.seed).spawn(len(configurations))
+        jobs = [(configuration, seed, summarise)
+                for configuration, seed in zip(configurations, seeds)]
+        return self._map(simulate, jobs)
+
+    def _run_batched(self, configurations: list, summarise: callable) -> list:
+        """ Runs each run of equal, consecutive configurations as batches;
+        every batch gets its own seed sequence """
+
+        groups = []
+        for configuration in configurations:
+            if (groups and groups[-1][0] == configuration
+                    and groups[-1][1] < self.batch_size):
+                groups[-1][1] += 1
+            else:
+                groups.append([configuration, 1])
+
+        seeds = np.random.SeedSequence(self.seed).spawn(len(groups))
+        jobs = [(configuration, count, seed, summarise)
+                for (configuration, count), seed in zip(groups, seeds)]
+
+        return [result for results in self._map(simulate_batch, jobs)
+                for result in results]
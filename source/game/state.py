@@ -2,26 +2,38 @@ import numpy as np
 
 
 class State:
+    """ A read-only view of a game; the game holds a single instance, so
+    handing it to every peasant costs nothing, and it's always current """
 
-    def __init__(self, 
-            monster, 
-            cohort, 
-            action,
-            combatants: list, 
-            abstainers: list,
-            round: int,
-            turn: int):
+    __slots__ = ("game", )
 
-        self.combatants = []
-        self.abstainers = []
+    def __init__(self, game):
+        self.game = game
 
-        self.monster = monster
-        self.cohort = cohort
+    @property
+    def monster(self):
+        return self.game.monster
 
-        self.combatants = combatants
-        self.abstainers = abstainers
+    @property
+    def cohort(self):
+        return self.game.cohort
 
-        self.action = action
+    @property
+    def action(self):
+        return self.game.action
 
-        self.round = round
-        self.turn = turn
\ No newline at end of file
+    @property
+    def combatants(self) -> list:
+        return self.game.combatants
+
+    @property
+    def abstainers(self) -> list:
+        return self.game.abstainers
+
+    @property
+    def round(self) -> int:
+        return self.game.round
+
+    @property
+    def turn(self) -> int:
+        return self.game.turn
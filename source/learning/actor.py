@@ -5,7 +5,16 @@ from tensorflow import keras
 
 class Actor:
 
-    def __init__(self, state_count: int, action_count: int):
+    def __init__(self,
+            state_count: int,
+            action_count: int,
+            model: keras.Model = None):
+
+        # An already built model, such as a clone from learning.models
+        if model is not None:
+            self.model = model
+            return
+
         inputs = keras.layers.Input(shape=(state_count, ))
 
         layer = keras.layers.Dense(48, activation="relu")(inputs)
@@ -0,0 +1,388 @@
+import os
+import time
+import queue
+import multiprocessing
+
+import numpy as np
+
+from game.game import Game
+from game.actors.policy_peasant import PolicyPeasant, STATE_COUNT, ACTION_COUNT
+from game.actors.random_peasant import RandomPeasant
+
+from learning.policy import Policy
+from learning.ornstein_uhlenbeck_noise import OrnsteinUhlenbeckNoise
+
+# Nothing here imports TensorFlow, so actor processes start quickly and
+# stay small; only the learner, in the parent process, needs it
+
+
+# How long an actor waits for the learner to drain a full ring, or to catch
+# up on its episodes, and the learner for anything to do, before looking
+# again
+POLL_INTERVAL = 1e-3
+
+
+class TransitionRing:
+    """ Transitions in shared memory, written by one actor process and read
+    by the learner. Each row holds a state, action, reward and new state;
+    the writer waits rather than overwrite a row that hasn't been read """
+
+    def __init__(self,
+            context,
+            slots: int = 256,
+            state_count: int = STATE_COUNT,
+            action_count: int = ACTION_COUNT):
+
+        self.slots = slots
+        self.state_count = state_count
+        self.action_count = action_count
+        self.width = 2 * state_count + action_count + 1
+
+        self.memory = context.RawArray("f", slots * self.width)
+        self.written = context.RawValue("q", 0)
+        self.read = context.RawValue("q", 0)
+
+    def rows(self) -> np.ndarray:
+        return np.frombuffer(self.memory, dtype=np.float32).reshape(
+                self.slots, self.width)
+
+    def push(self,
+            state: np.ndarray,
+            action: np.ndarray,
+            reward: int,
+            new_state: np.ndarray):
+
+        while self.written.value - self.read.value >= self.slots:
+            time.sleep(POLL_INTERVAL)
+
+        row = self.rows()[self.written.value % self.slots]
+        row[:self.state_count] = state
+        row[self.state_count:self.state_count + self.action_count] = action
+        row[self.state_count + self.action_count] = reward
+        row[-self.state_count:] = new_state
+
+        # Only published once the row is complete
+        self.written.value += 1
+
+    def drain(self) -> tuple:
+        """ Returns the states, actions, rewards and new states written since
+        the last drain, and frees their rows """
+
+        read = self.read.value
+        written = self.written.value
+
+        positions = np.arange(read, written) % self.slots
+        rows = self.rows()[positions]
+        self.read.value = written
+
+        state_count = self.state_count
+        action_count = self.action_count
+        return (rows[:, :state_count],
+                rows[:, state_count:state_count + action_count],
+                rows[:, state_count + action_count],
+                rows[:, -state_count:])
+
+
+class WeightBoard:
+    """ The learner's latest actor weights, in shared memory, with a version
+    that goes up with every publish, so actors only copy what's new """
+
+    def __init__(self, context, shapes: list):
+        self.shapes = [tuple(shape) for shape in shapes]
+        self.sizes = [int(np.prod(shape)) for shape in self.shapes]
+
+        self.memory = context.RawArray("f", sum(self.sizes))
+        self.version = context.RawValue("q", 0)
+        self.lock = context.Lock()
+
+    def publish(self, weights: list):
+        flat = np.concatenate([np.ravel(weight) for weight in weights])
+        with self.lock:
+            np.frombuffer(self.memory, dtype=np.float32)[:] = flat
+            self.version.value += 1
+
+    def fetch(self) -> tuple:
+        """ Returns the version, and the weights as Keras lists them """
+
+        with self.lock:
+            version = self.version.value
+            flat = np.frombuffer(self.memory, dtype=np.float32).copy()
+
+        weights = []
+        for shape, size in zip(self.shapes, self.sizes):
+            weights.append(flat[:size].reshape(shape))
+            flat = flat[size:]
+        return version, weights
+
+
+class RandomCohort:
+    """ Creates the other peasants of each game; a class rather than a
+    lambda, so it can be sent to actor processes """
+
+    def __init__(self, count: int = 9, level: float = 10):
+        self.count = count
+        self.level = level
+
+    def __call__(self) -> list:
+        return [RandomPeasant(self.level) for _ in range(self.count)]
+
+
+class RingBody(PolicyPeasant):
+    """ A learner's peasant in an actor process, whose transitions go to
+    the learner through a ring """
+
+    def __init__(self, level: float, ring: TransitionRing, **arguments):
+        self.ring = ring
+        super().__init__(level, **arguments)
+
+    def learn(self, reward: int, state_vector: np.ndarray):
+        if self.previous_state is not None:
+            self.ring.push(self.previous_state,
+                    self.previous_action,
+                    reward,
+                    state_vector)
+
+
+def act(index: int,
+        ring: TransitionRing,
+        board: WeightBoard,
+        trained: multiprocessing.Value,
+        activations: list,
+        peasants: callable,
+        statistics: multiprocessing.Queue,
+        stop: multiprocessing.Event,
+        seed: int,
+        level: float,
+        deviation: float,
+        refresh_interval: int,
+        lag: int,
+        arguments: dict):
+
+    """ An actor process: plays games with a frozen copy of the learner's
+    policy, refreshed every so many episodes, and reports each episode's
+    statistics, with how many transitions it had written by its end. It
+    only starts an episode once the learner has trained on all but lag of
+    those before """
+
+    np.random.seed(seed)
+
+    version, weights = board.fetch()
+    noise_generator = OrnsteinUhlenbeckNoise(deviation=deviation)
+    body = RingBody(level, ring,
+            policy=Policy(weights, activations),
+            noise_generator=noise_generator)
+
+    episode = 0
+    while not stop.is_set():
+        if episode - trained.value >= lag:
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        if episode % refresh_interval == 0 and board.version.value != version:
+            version, weights = board.fetch()
+            body.policy = Policy(weights, activations)
+
+        cohort = peasants() + [body]
+        for peasant in cohort:
+            peasant.reset()
+
+        results = Game(cohort, **arguments).run()
+        statistics.put((index,
+                ring.written.value,
+                np.mean(body.rewards),
+                body.previous_round,
+                results["lifetime-mean"].iloc[-1]))
+        episode += 1
+
+
+class AsyncTrainer:
+    """ Trains a learning peasant with several actor processes playing
+    games alongside it. Actors act on copies of the learner's policy, and
+    send their transitions through shared memory; the learner, in this
+    process, trains on them and publishes new weights every so many
+    updates. Like VectorEnvironment, run() returns the statistics of the
+    episodes that finished; an episode only counts once the learner has
+    trained on all of its transitions """
+
+    def __init__(self,
+            learner: PolicyPeasant,
+            peasants: callable = None,
+            actors: int = None,
+            refresh_interval: int = 1,
+            publish_interval: int = 16,
+            updates_per_transition: float = 1.0,
+            lag: int = 1,
+            ring_slots: int = 256,
+            **arguments):
+
+        self.learner = learner
+        self.peasants = peasants if peasants is not None else RandomCohort()
+        self.actors = actors or max(1, (os.cpu_count() or 2) - 1)
+        self.refresh_interval = refresh_interval
+        self.publish_interval = publish_interval
+        self.updates_per_transition = updates_per_transition
+
+        # How many finished episodes an actor may have that the learner
+        # hasn't trained on yet, before it waits; 1 lets it play the next
+        # episode while the learner catches up on the last
+        self.lag = lag
+
+        # Only bounds the memory a ring takes; an actor that fills its ring
+        # waits for the learner to drain it
+        self.ring_slots = ring_slots
+
+        arguments.setdefault("telemetry", "final")
+        self.arguments = arguments
+
+        self.processes = []
+        self.finished = []
+
+        # Per actor, statistics of episodes whose transitions haven't all
+        # been trained on, each with where its transitions end in the ring
+        self.pending = []
+
+        # Updates owed for transitions received, and made since publishing
+        self.owed = 0.0
+        self.unpublished = 0
+
+    def start(self):
+        """ Starts the actor processes; spawned, not forked, since forking
+        a process that has started TensorFlow isn't safe """
+
+        context = multiprocessing.get_context("spawn")
+
+        model = self.learner.actor.model
+        activations = [layer.activation.__name__ for layer in model.layers
+                if hasattr(layer, "kernel")]
+        weights = model.get_weights()
+
+        self.board = WeightBoard(context, [weight.shape for weight in weights])
+        self.board.publish(weights)
+
+        self.statistics = context.Queue()
+        self.stop = context.Event()
+        self.rings = []
+        self.trained = []
+        self.pending = []
+
+        deviation = float(np.ravel(self.learner.noise_generator.deviation)[0])
+        for index in range(self.actors):
+            ring = TransitionRing(context, self.ring_slots)
+
+            # How many of the actor's episodes the learner has trained on
+            trained = context.RawValue("q", 0)
+
+            process = context.Process(target=act,
+                    args=(index,
+                        ring,
+                        self.board,
+                        trained,
+                        activations,
+                        self.peasants,
+                        self.statistics,
+                        self.stop,
+                        np.random.randint(2 ** 31),
+                        self.learner.level,
+                        deviation,
+                        self.refresh_interval,
+                        self.lag,
+                        self.arguments),
+                    daemon=True)
+            process.start()
+
+            self.rings.append(ring)
+            self.trained.append(trained)
+            self.pending.append([])
+            self.processes.append(process)
+
+    def learn(self) -> bool:
+        """ Takes in the actors' transitions and trains on them, publishing
+        weights when due; returns whether there was anything to do. Every
+        transition drained has been trained on when it returns """
+
+        received = 0
+        for ring in self.rings:
+            states, actions, rewards, new_states = ring.drain()
+            for transition in zip(states, actions, rewards, new_states):
+                self.learner.record(*transition)
+            received += len(rewards)
+
+        self.owed += received * self.updates_per_transition
+        updates = int(self.owed)
+        self.owed -= updates
+
+        # Updates skipped while the buffer fills don't count towards
+        # publishing, as they leave the weights as they were
+        for _ in range(updates):
+            if not self.learner.optimise():
+                continue
+
+            self.unpublished += 1
+            if self.unpublished >= self.publish_interval:
+                self.board.publish(self.learner.actor.model.get_weights())
+                self.unpublished = 0
+
+        return received > 0
+
+    def collect(self):
+        """ Takes in the actors' statistics, and counts each episode as
+        finished once its transitions have all been trained on """
+
+        while True:
+            try:
+                index, end, *statistics = self.statistics.get_nowait()
+            except queue.Empty:
+                break
+            self.pending[index].append((end, tuple(statistics)))
+
+        for index, pending in enumerate(self.pending):
+            read = self.rings[index].read.value
+            while pending and pending[0][0] <= read:
+                _, statistics = pending.pop(0)
+                self.finished.append(statistics)
+                self.trained[index].value += 1
+
+    def run(self, episodes: int) -> list:
+        """ Trains until the given number of episodes have finished, and
+        returns their statistics """
+
+        if not self.processes:
+            self.start()
+
+        while len(self.finished) < episodes:
+            if not self.learn():
+                time.sleep(POLL_INTERVAL)
+            self.collect()
+
+            for process in self.processes:
+                if not process.is_alive():
+                    raise RuntimeError(f"actor process {process.pid} died")
+
+        finished = self.finished[:episodes]
+        self.finished = self.finished[episodes:]
+        return finished
+
+    def close(self):
+        """ Stops the actor processes, after their current games, and
+        trains on the transitions they sent """
+
+        if not self.processes:
+            return
+
+        self.stop.set()
+        deadline = time.monotonic() + 10
+        for process in self.processes:
+            # An actor blocked on a full ring, or on sending statistics,
+            # needs them taken to finish; what's left is still trained on
+            while process.is_alive() and time.monotonic() < deadline:
+                self.learn()
+                self.collect()
+                process.join(POLL_INTERVAL)
+
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self.learn()
+        self.collect()
+        self.processes = []
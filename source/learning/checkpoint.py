@@ -0,0 +1,101 @@
+import os
+import threading
+
+import numpy as np
+
+
+def random_state() -> dict:
+    """ Returns NumPy's global random state, which the games, the noise and
+    uniform replay all draw from, as arrays """
+
+    _, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        "random-keys": keys.copy(),
+        "random-position": np.array(position),
+        "random-has-gauss": np.array(has_gauss),
+        "random-cached-gaussian": np.array(cached_gaussian),
+    }
+
+
+def restore_random_state(arrays: dict):
+    np.random.set_state(("MT19937",
+            arrays["random-keys"],
+            int(arrays["random-position"]),
+            int(arrays["random-has-gauss"]),
+            float(arrays["random-cached-gaussian"])))
+
+
+def write(path: str, arrays: dict):
+    """ Writes arrays to an .npz file, replacing it only once the new one is
+    complete, so a job stopped mid-write keeps its last checkpoint """
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    partial = f"{path}.partial"
+    with open(partial, "wb") as file:
+        np.savez(file, **arrays)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(partial, path)
+
+
+def read(path: str) -> dict:
+    """ Returns the arrays of a checkpoint, or None if there isn't one; only
+    plain arrays are stored, so nothing is unpickled """
+
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path, allow_pickle=False) as archive:
+        return {key: archive[key] for key in archive.files}
+
+
+class Checkpointer:
+    """ Writes a checkpoint every so many episodes, on a background thread,
+    so training carries on while it's written. Each is a snapshot, copied
+    before it's handed over; one is written at a time """
+
+    def __init__(self, path: str, interval: int = 10):
+        self.path = path
+        self.interval = interval
+
+        self.thread = None
+        self.error = None
+
+    def due(self, episode: int) -> bool:
+        return (episode + 1) % self.interval == 0
+
+    def _write(self, arrays: dict):
+        try:
+            write(self.path, arrays)
+        except Exception as error:
+            self.error = error
+
+    def save(self, arrays: dict):
+        self.wait()
+        self.thread = threading.Thread(target=self._write, args=(arrays, ))
+        self.thread.start()
+
+    def wait(self):
+        """ Waits for the checkpoint being written, raising if it failed """
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def load(self) -> dict:
+        self.wait()
+        return read(self.path)
+
+    def clear(self):
+        """ Removes the checkpoint, once the job it was for has finished """
+
+        self.wait()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -5,7 +5,16 @@ from tensorflow import keras
 
 class Critic:
 
-    def __init__(self, state_count: int, action_count: int):
+    def __init__(self,
+            state_count: int,
+            action_count: int,
+            model: keras.Model = None):
+
+        # An already built model, such as a clone from learning.models
+        if model is not None:
+            self.model = model
+            return
+
         state_input = keras.layers.Input(shape=(state_count, ))
         layer = keras.layers.Dense(16, activation="relu")(state_input)
         state_output = keras.layers.Dense(32, activation="relu")(layer)
@@ -18,7 +27,4 @@ class Critic:
         layer = keras.layers.Dense(16, activation="relu")(layer)
         outputs = keras.layers.Dense(1)(layer)
 
-        self.model = keras.Model([state_input, action_input], outputs)
-
-        self.model.summary()
-        exit(0)
\ No newline at end of file
+        self.model = keras.Model([state_input, action_input], outputs)
\ No newline at end of file
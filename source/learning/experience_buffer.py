@@ -1,51 +1,184 @@
+import threading
+
 import numpy as np
-import tensorflow as tf
+
+
+# Rows allocated when a buffer first records; it doubles from there, up to
+# its capacity
+CHUNK_SIZE = 4096
+
+# How many of the latest observations a new transition's state is looked
+# for among, so consecutive transitions share the observation between them
+LOOKBACK = 64
 
 
 class ExperienceBuffer:
+    """ A replay memory of (state, action, reward, new state) transitions.
+    Observations are kept once, in a ring both a transition's states point
+    into, since one transition's new state is usually the next one's
+    state. Storage grows in chunks as transitions arrive """
 
     def __init__(self,
             action_count: int,
             state_count: int,
-            capacity: int = int(5e5)):
-        
+            capacity: int = int(5e5),
+            dtype: type = np.float32,
+            debug: bool = False):
+
         self.capacity = capacity
+        self.action_count = action_count
+        self.state_count = state_count
+        self.dtype = dtype
+
+        # Whether to check every transition for NaNs as it's recorded
+        self.debug = debug
 
         self.pointer = 0
 
-        self.state_memory = np.zeros((capacity, state_count))
-        self.action_memory = np.zeros((capacity, action_count))
-        self.reward_memory = np.zeros((capacity, 1))
-        self.new_state_memory = np.zeros((capacity, state_count))
-    
+        # Held while recording and gathering samples, so a sampler on
+        # another thread never sees a half recorded transition
+        self.lock = threading.Lock()
+
+        # Each transition adds at most two observations, and may share one
+        # among the latest, so this ring never overwrites one still in use
+        self.observation_capacity = 2 * capacity + LOOKBACK
+        self.observation_pointer = 0
+        self.recent = {}
+
+        self.observation_memory = np.zeros((0, state_count), dtype=dtype)
+        self.state_index = np.zeros(0, dtype=np.int32)
+        self.new_state_index = np.zeros(0, dtype=np.int32)
+        self.action_memory = np.zeros((0, action_count), dtype=dtype)
+        self.reward_memory = np.zeros((0, 1), dtype=dtype)
+
+    def _grow(self, array: np.ndarray, size: int, capacity: int) -> np.ndarray:
+        if size < len(array):
+            return array
+
+        grown = np.zeros((min(max(CHUNK_SIZE, 2 * len(array)), capacity), )
+                + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _observe(self, observation: np.ndarray) -> int:
+        """ Returns where an observation is kept, storing it if it isn't
+        among the latest """
+
+        key = np.asarray(observation, dtype=self.dtype).tobytes()
+        if key in self.recent:
+            return self.recent[key]
+
+        index = self.observation_pointer % self.observation_capacity
+        self.observation_memory = self._grow(self.observation_memory,
+                index,
+                self.observation_capacity)
+        self.observation_memory[index] = observation
+        self.observation_pointer += 1
+
+        self.recent[key] = index
+        if len(self.recent) > LOOKBACK:
+            del self.recent[next(iter(self.recent))]
+        return index
+
+    def memory(self) -> int:
+        """ Returns the bytes allocated for storage """
+
+        return sum(array.nbytes for array in (self.observation_memory,
+                self.state_index,
+                self.new_state_index,
+                self.action_memory,
+                self.reward_memory))
+
+    def checkpoint(self) -> dict:
+        """ Returns copies of the stored transitions, and where recording
+        has got to, as arrays to restore from """
+
+        with self.lock:
+            count = min(self.pointer, self.capacity)
+            observations = min(self.observation_pointer,
+                    self.observation_capacity)
+
+            return {
+                "pointer": np.array(self.pointer),
+                "observation-pointer": np.array(self.observation_pointer),
+                "observations": self.observation_memory[:observations].copy(),
+                "state-index": self.state_index[:count].copy(),
+                "new-state-index": self.new_state_index[:count].copy(),
+                "actions": self.action_memory[:count].copy(),
+                "rewards": self.reward_memory[:count].copy(),
+            }
+
+    def restore(self, arrays: dict):
+        """ Restores the buffer from a checkpoint; only which observations
+        were recorded most recently is lost, which costs a little sharing """
+
+        with self.lock:
+            self.pointer = int(arrays["pointer"])
+            self.observation_pointer = int(arrays["observation-pointer"])
+            self.recent = {}
+
+            self.observation_memory = arrays["observations"].astype(self.dtype)
+            self.state_index = arrays["state-index"].astype(np.int32)
+            self.new_state_index = arrays["new-state-index"].astype(np.int32)
+            self.action_memory = arrays["actions"].astype(self.dtype)
+            self.reward_memory = arrays["rewards"].astype(self.dtype)
+
     def record(self,
             state: np.ndarray,
             action: np.ndarray,
             reward: int,
             new_state: np.ndarray):
-        
+
         index = self.pointer % self.capacity
 
-        assert not np.isnan(state).any()
-        assert not np.isnan(action).any()
-        assert not np.isnan(new_state).any()
+        if self.debug:
+            assert not np.isnan(state).any()
+            assert not np.isnan(action).any()
+            assert not np.isnan(new_state).any()
 
-        self.state_memory[index] = state
-        self.action_memory[index] = action
-        self.reward_memory[index] = reward
-        self.new_state_memory[index] = new_state
+        with self.lock:
+            if index >= len(self.action_memory):
+                self.state_index = self._grow(self.state_index, index,
+                        self.capacity)
+                self.new_state_index = self._grow(self.new_state_index, index,
+                        self.capacity)
+                self.action_memory = self._grow(self.action_memory, index,
+                        self.capacity)
+                self.reward_memory = self._grow(self.reward_memory, index,
+                        self.capacity)
 
-        self.pointer += 1
-    
-    def sample(self, batch_size: int) -> tuple:
-        range = min(self.pointer, self.capacity)
-        indices = np.random.choice(range, batch_size)
+            self.state_index[index] = self._observe(state)
+            self.new_state_index[index] = self._observe(new_state)
+            self.action_memory[index] = action
+            self.reward_memory[index] = reward
+
+            self.pointer += 1
+
+    def transitions(self, indices: np.ndarray) -> tuple:
+        """ Returns the states, actions, rewards and new states at indices,
+        as NumPy arrays in the buffer's storage type """
+
+        with self.lock:
+            observations = self.observation_memory
+            states = observations[self.state_index[indices]]
+            new_states = observations[self.new_state_index[indices]]
+            actions = self.action_memory[indices]
+            rewards = self.reward_memory[indices]
 
-        states = tf.convert_to_tensor(self.state_memory[indices])
-        actions = tf.convert_to_tensor(self.action_memory[indices])
-        new_states = tf.convert_to_tensor(self.new_state_memory[indices])
+        return states, actions, rewards, new_states
 
-        rewards = tf.convert_to_tensor(self.reward_memory[indices])
-        rewards = tf.cast(rewards, dtype=tf.float32)
+    def gather(self, indices: np.ndarray) -> tuple:
+        """ Returns the transitions at indices as float32 tensors, whatever
+        the storage """
 
-        return states, actions, rewards, new_states
\ No newline at end of file
+        import tensorflow as tf
+
+        return tuple(tf.convert_to_tensor(values.astype(np.float32))
+                for values in self.transitions(indices))
+
+    def sample(self, batch_size: int, random=np.random) -> tuple:
+        """ Draws a batch of transitions uniformly; random is anything with
+        NumPy's choice() """
+
+        range = min(self.pointer, self.capacity)
+        return self.gather(random.choice(range, batch_size))
@@ -0,0 +1,48 @@
+import os
+
+from tensorflow import keras
+
+from learning.actor import Actor
+from learning.critic import Critic
+
+
+# A model of each architecture and shape, built on first use, that the rest
+# are cloned from
+prototypes = {}
+
+# Weight arrays by file, read from disk on first load, with the file's
+# modification time and size when read, so a rewritten file is read again
+weights = {}
+
+
+def _clone(architecture: type, state_count: int, action_count: int) -> keras.Model:
+    key = (architecture, state_count, action_count)
+    if key not in prototypes:
+        prototypes[key] = architecture(state_count, action_count).model
+
+    # Clones are initialised afresh, as a newly built model would be
+    return keras.models.clone_model(prototypes[key])
+
+
+def actor(state_count: int, action_count: int) -> Actor:
+    return Actor(state_count, action_count,
+            model=_clone(Actor, state_count, action_count))
+
+
+def critic(state_count: int, action_count: int) -> Critic:
+    return Critic(state_count, action_count,
+            model=_clone(Critic, state_count, action_count))
+
+
+def load_weights(model: keras.Model, path: str):
+    """ Loads a weight file into a model, reading each file only once
+    unless it changes; later loads copy the arrays held in memory """
+
+    status = os.stat(path)
+    stamp = (status.st_mtime_ns, status.st_size)
+
+    if path in weights and weights[path][0] == stamp:
+        model.set_weights(weights[path][1])
+    else:
+        model.load_weights(path)
+        weights[path] = (stamp, model.get_weights())
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+ACTIVATIONS = {
+    "relu": lambda values: np.maximum(values, 0),
+    "tanh": np.tanh,
+    "linear": lambda values: values,
+}
+
+
+class Policy:
+    """ An actor network's forward pass, evaluated with NumPy alone, so
+    trained policies can act without TensorFlow. Takes the network's weights
+    as Keras lists them (kernel, then bias, for each dense layer in turn) and
+    each layer's activation """
+
+    def __init__(self, weights: list, activations: tuple = ("relu", "relu", "tanh")):
+        assert len(weights) == 2 * len(activations), "weight dimensions invalid"
+
+        self.kernels = [np.asarray(kernel, dtype=np.float32)
+                for kernel in weights[0::2]]
+        self.biases = [np.asarray(bias, dtype=np.float32)
+                for bias in weights[1::2]]
+
+        for activation in activations:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"invalid activation: {activation}")
+        self.activations = list(activations)
+
+    @classmethod
+    def from_model(cls, model) -> "Policy":
+        """ Copies the weights of a Keras model made of dense layers """
+
+        activations = [layer.activation.__name__ for layer in model.layers
+                if hasattr(layer, "kernel")]
+        return cls(model.get_weights(), activations)
+
+    @classmethod
+    def load(cls, path: str) -> "Policy":
+        with np.load(path, allow_pickle=False) as archive:
+            activations = [str(name) for name in archive["activations"]]
+            weights = []
+            for index in range(len(activations)):
+                weights.append(archive[f"kernel-{index}"])
+                weights.append(archive[f"bias-{index}"])
+        return cls(weights, activations)
+
+    def save(self, path: str):
+        arrays = {"activations": np.array(self.activations)}
+        for index, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f"kernel-{index}"] = kernel
+            arrays[f"bias-{index}"] = bias
+        np.savez(path, **arrays)
+
+    def weights(self) -> list:
+        weights = []
+        for kernel, bias in zip(self.kernels, self.biases):
+            weights += [kernel, bias]
+        return weights
+
+    def __call__(self, states: np.ndarray) -> np.ndarray:
+        """ Evaluates a (batch, state count) array of states, or a single
+        state vector """
+
+        values = np.asarray(states, dtype=np.float32)
+        for kernel, bias, activation in zip(self.kernels,
+                self.biases,
+                self.activations):
+            values = ACTIVATIONS[activation](values @ kernel + bias)
+        return values
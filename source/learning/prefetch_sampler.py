@@ -0,0 +1,86 @@
+import queue
+import weakref
+import threading
+
+import numpy as np
+
+from learning.experience_buffer import ExperienceBuffer
+
+
+# How long the background thread waits on a full queue before checking
+# whether its sampler is still wanted
+POLL_INTERVAL = 0.1
+
+
+def _prefetch(reference: weakref.ref, batches: queue.Queue):
+    """ Fills the queue with batches for as long as the sampler is alive
+    and open; it only holds the sampler weakly, so a peasant discarded
+    without closing its sampler doesn't leave the thread behind """
+
+    batch = None
+    while True:
+        sampler = reference()
+        if sampler is None or sampler.closed:
+            return
+
+        # Hand any failure to the learner, rather than leave it waiting;
+        # it's queued like a batch, so closing still stops the thread
+        if batch is None:
+            try:
+                batch = sampler.buffer.sample(sampler.batch_size,
+                        sampler.random)
+            except Exception as error:
+                batch = error
+        del sampler
+
+        try:
+            batches.put(batch, timeout=POLL_INTERVAL)
+        except queue.Full:
+            continue
+
+        if isinstance(batch, Exception):
+            return
+        batch = None
+
+
+class PrefetchSampler:
+    """ Draws minibatches from an experience buffer on a background thread,
+    keeping a few ready as float32 tensors, so sampling overlaps with the
+    game rather than holding up each training step. Batches may be drawn
+    a few transitions before they're used, which replay doesn't mind """
+
+    def __init__(self,
+            buffer: ExperienceBuffer,
+            batch_size: int,
+            depth: int = 2,
+            random=None):
+
+        assert buffer.pointer > 0, "nothing to sample"
+
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.closed = False
+
+        # A generator of its own, seeded from NumPy's global state, so the
+        # thread doesn't draw from the numbers the game uses
+        if random is None:
+            random = np.random.default_rng(np.random.randint(2 ** 31))
+        self.random = random
+
+        self.batches = queue.Queue(maxsize=depth)
+        self.thread = threading.Thread(target=_prefetch,
+                args=(weakref.ref(self), self.batches),
+                daemon=True)
+        self.thread.start()
+
+    def sample(self) -> tuple:
+        """ Returns the next batch, waiting for it if need be """
+
+        batch = self.batches.get()
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+
+    def close(self):
+        self.closed = True
+        self.thread.join()
@@ -0,0 +1,104 @@
+import numpy as np
+
+from learning.sum_tree import SumTree
+from learning.experience_buffer import ExperienceBuffer
+
+
+class PrioritizedExperienceBuffer(ExperienceBuffer):
+    """ An experience buffer that samples transitions in proportion to
+    their priority, (|TD error| + epsilon) ^ alpha, so the few transitions
+    the critic still gets wrong are replayed more often. New transitions
+    take the highest priority yet, so each is replayed at least once soon.
+    Samples come with importance sampling weights, which undo the bias
+    by beta, annealed towards 1 as training goes on """
+
+    def __init__(self,
+            action_count: int,
+            state_count: int,
+            capacity: int = int(5e5),
+            alpha: float = 0.6,
+            beta: float = 0.4,
+            beta_increment: float = 1e-4,
+            epsilon: float = 1e-6,
+            **arguments):
+
+        super().__init__(action_count, state_count, capacity, **arguments)
+
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+
+        self.tree = SumTree(capacity)
+        self.maximum = 1.0
+
+    def checkpoint(self) -> dict:
+        arrays = super().checkpoint()
+        with self.lock:
+            arrays["tree"] = self.tree.tree.copy()
+            arrays["maximum"] = np.array(self.maximum)
+            arrays["beta"] = np.array(self.beta)
+        return arrays
+
+    def restore(self, arrays: dict):
+        super().restore(arrays)
+        with self.lock:
+            self.tree.tree = arrays["tree"].copy()
+            self.tree.size = len(self.tree.tree) // 2
+            self.maximum = float(arrays["maximum"])
+            self.beta = float(arrays["beta"])
+
+    def record(self,
+            state: np.ndarray,
+            action: np.ndarray,
+            reward: int,
+            new_state: np.ndarray):
+
+        index = self.pointer % self.capacity
+        super().record(state, action, reward, new_state)
+
+        with self.lock:
+            self.tree.set(index, self.maximum)
+
+    def draw(self, batch_size: int, random=np.random) -> tuple:
+        """ Picks batch_size transitions, one from each of batch_size equal
+        spans of the total priority, and anneals beta. Returns their indices
+        and importance sampling weights; random is anything with NumPy's
+        uniform() """
+
+        count = min(self.pointer, self.capacity)
+        with self.lock:
+            total = self.tree.total()
+            values = ((np.arange(batch_size) + random.uniform(size=batch_size))
+                    * total / batch_size)
+
+            # Rounding can carry a value past the last transition
+            indices = np.minimum(self.tree.find(values), count - 1)
+            probabilities = self.tree.priorities(indices) / total
+
+            # Under the lock, since a prefetching thread may be sampling
+            beta = self.beta
+            self.beta = min(1.0, self.beta + self.beta_increment)
+
+        weights = (count * probabilities) ** -beta
+        weights /= weights.max()
+        return indices, weights
+
+    def sample(self, batch_size: int, random=np.random) -> tuple:
+        """ Draws a batch of transitions by priority. Returns the states,
+        actions, rewards and new states, then the weights, and the indices
+        to update the priorities of """
+
+        import tensorflow as tf
+
+        indices, weights = self.draw(batch_size, random)
+        weights = tf.convert_to_tensor(weights[:, np.newaxis].astype(np.float32))
+        return self.gather(indices) + (weights, indices)
+
+    def update_priorities(self, indices: np.ndarray, errors: np.ndarray):
+        """ Sets the priorities of sampled transitions from their TD errors """
+
+        priorities = (np.abs(errors) + self.epsilon) ** self.alpha
+        with self.lock:
+            self.tree.update(indices, priorities)
+            self.maximum = max(self.maximum, priorities.max())
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class SumTree:
+    """ A binary tree of priorities, kept in an array, where each node
+    holds the sum of its children: the root at 1, node i's children at
+    2i and 2i + 1, and the leaves from size on. Finding the leaf a running
+    total falls in, and changing a leaf, both take O(log n). Its leaves
+    double as they're needed, up to the capacity """
+
+    def __init__(self, capacity: int, size: int = 4096):
+        self.capacity = capacity
+        self.size = 1
+        while self.size < min(size, capacity):
+            self.size *= 2
+
+        self.tree = np.zeros(2 * self.size)
+
+    def reserve(self, count: int):
+        """ Makes room for count leaves, rebuilding the sums above them """
+
+        if count <= self.size:
+            return
+
+        size = self.size
+        while size < count:
+            size *= 2
+
+        tree = np.zeros(2 * size)
+        tree[size:size + self.size] = self.tree[self.size:]
+        level = size // 2
+        while level:
+            tree[level:2 * level] = (tree[2 * level:4 * level:2]
+                    + tree[2 * level + 1:4 * level:2])
+            level //= 2
+
+        self.size = size
+        self.tree = tree
+
+    def total(self) -> float:
+        return self.tree[1]
+
+    def priorities(self, indices: np.ndarray) -> np.ndarray:
+        return self.tree[np.asarray(indices) + self.size]
+
+    def set(self, index: int, priority: float):
+        """ Sets one leaf, adjusting the sums above it """
+
+        self.reserve(index + 1)
+
+        position = index + self.size
+        change = priority - self.tree[position]
+        while position:
+            self.tree[position] += change
+            position //= 2
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        """ Sets many leaves, then recomputes the sums above them level by
+        level; repeated indices take their last priority """
+
+        positions = np.asarray(indices) + self.size
+        self.tree[positions] = priorities
+
+        positions = np.unique(positions // 2)
+        while positions[0]:
+            self.tree[positions] = (self.tree[2 * positions]
+                    + self.tree[2 * positions + 1])
+            positions = np.unique(positions // 2)
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """ Returns, for each value below the total, the leaf whose span of
+        the running total it falls in """
+
+        values = np.array(values, dtype=np.float64)
+        positions = np.ones(len(values), dtype=np.int64)
+        while positions[0] < self.size:
+            left = 2 * positions
+            sums = self.tree[left]
+
+            right = values > sums
+            values -= np.where(right, sums, 0)
+            positions = left + right
+
+        return positions - self.size
@@ -0,0 +1,160 @@
+import numpy as np
+
+from game import instrumentation
+from game.game import Game
+from game.actors.policy_peasant import PolicyPeasant
+
+from learning.ornstein_uhlenbeck_noise import OrnsteinUhlenbeckNoise
+
+
+class Body(PolicyPeasant):
+    """ A learner's peasant in one of several games; it acts on the
+    learner's policy, with noise of its own, and its transitions go to the
+    learner's experience buffer """
+
+    def __init__(self, learner: PolicyPeasant, noise_generator: callable):
+        self.learner = learner
+        super().__init__(learner.level,
+                policy=learner.evaluate,
+                noise_generator=noise_generator)
+
+    def learn(self, reward: int, state_vector: np.ndarray):
+        if self.learner.train and self.previous_state is not None:
+            self.learner.record(self.previous_state,
+                    self.previous_action,
+                    reward,
+                    state_vector)
+
+
+class VectorEnvironment:
+    """ Keeps several games in flight for one learning peasant, which has a
+    body in each. Each step plays every game up to its body's next decision,
+    then evaluates the learner's actor once on all of those states and
+    trains on the experience gathered, one update per game by default. A
+    finished game is replaced with a new one, its statistics kept in
+    finished """
+
+    def __init__(self,
+            learner: PolicyPeasant,
+            peasants: callable,
+            count: int = 8,
+            updates: int = None,
+            **arguments):
+
+        # Creates the other peasants of a new game
+        self.peasants = peasants
+
+        self.learner = learner
+        self.count = count
+
+        # Gradient updates per step; by default one per decision made, as
+        # playing the games one by one would, so learning curves compare
+        self.updates = count if updates is None else updates
+
+        arguments.setdefault("telemetry", "final")
+        self.arguments = arguments
+
+        deviation = learner.noise_generator.deviation
+        self.bodies = [Body(learner, OrnsteinUhlenbeckNoise(deviation=deviation))
+                for _ in range(count)]
+        self.games = [self.start(body) for body in self.bodies]
+
+        # Per game, whether its body's pending decision ends the turn
+        self.spanning = [False] * count
+
+        # Per finished episode, the body's mean reward, its lifespan, and
+        # the game's average lifespan
+        self.finished = []
+
+    def start(self, body: Body) -> Game:
+        peasants = self.peasants() + [body]
+        for peasant in peasants:
+            peasant.reset()
+        return Game(peasants, **self.arguments)
+
+    def finish(self, index: int):
+        body = self.bodies[index]
+        results = self.games[index].recorder.dataframe()
+
+        self.finished.append((
+            np.mean(body.rewards),
+            body.previous_round,
+            results["lifetime-mean"].iloc[-1],
+        ))
+        self.games[index] = self.start(body)
+
+    def advance(self, index: int):
+        """ Plays a game until its body is to act, starting a new game
+        whenever one finishes """
+
+        body = self.bodies[index]
+        while True:
+            game = self.games[index]
+
+            if game.cohort.cursor == 0 and game.vectorizable():
+                finished, _ = game.play_turn()
+            else:
+                peasant, cohort_spanned = game.cohort.iterate()
+                if peasant is body:
+                    self.spanning[index] = cohort_spanned
+                    return
+
+                action = peasant.action(game.state())
+                game.resolve(peasant, action,
+                        game.evaluate_reward(peasant, action))
+                finished = cohort_spanned and game.end_turn()[0]
+
+            if finished:
+                self.finish(index)
+
+    def step(self):
+        """ Makes one decision in every game, then trains the learner """
+
+        timed = instrumentation.enabled
+        if timed:
+            mark = instrumentation.clock()
+
+        for index in range(self.count):
+            self.advance(index)
+        if timed:
+            mark = instrumentation.record("vector/advance", mark)
+
+        states = [game.state() for game in self.games]
+        state_vectors = np.stack([body.create_state_vector(state)
+                for body, state in zip(self.bodies, states)])
+        assert not np.isnan(state_vectors).any()
+
+        # One pass of the actor for every game, with each game's own noise
+        samples = self.learner.evaluate(state_vectors)
+        for index, body in enumerate(self.bodies):
+            samples[index] += body.noise_generator()
+        if timed:
+            mark = instrumentation.record("vector/inference", mark)
+
+        for index, (game, body) in enumerate(zip(self.games, self.bodies)):
+            action = body.decide(states[index],
+                    state_vectors[index],
+                    samples[index])
+            game.resolve(body, action, game.evaluate_reward(body, action))
+
+            if self.spanning[index] and game.end_turn()[0]:
+                self.finish(index)
+        if timed:
+            mark = instrumentation.record("vector/decide", mark)
+
+        if self.learner.train:
+            for _ in range(self.updates):
+                self.learner.optimise()
+        if timed:
+            instrumentation.record("vector/learn", mark)
+
+    def run(self, episodes: int) -> list:
+        """ Steps until the given number of episodes have finished, and
+        returns their statistics """
+
+        while len(self.finished) < episodes:
+            self.step()
+
+        finished = self.finished[:episodes]
+        self.finished = self.finished[episodes:]
+        return finished
@@ -1,14 +1,21 @@
 import sys
+import time
+import tracemalloc
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import scipy
-import seaborn as sns
 
+import artifacts
+
+from game import instrumentation
 from game.game import Game
+from game.runner import Runner
+from game.random_source import RandomSource
 from game.actors.random_peasant import RandomPeasant
 
+# Results are pinned to this seed, and to the order the engine draws in; the
+# array-backed cohort walks its turn orders differently from the old list
+# one, so results from before it don't carry over
 seed = 100
 np.random.seed(seed)
 
@@ -16,57 +23,93 @@ np.random.seed(seed)
 def profile_episode(group_size: int = 10,
         base_level: int = 10,
         experience_factor: float = 0.7,
-        round_limit: int = 100):
+        round_limit: int = 100,
+        backend: str = "python",
+        vectorize: bool = False,
+        phases: bool = False):
     
+    """ Plays a game and plots its progress; with phases, also prints how
+    long the game spent in each phase of its turns """
+
     peasants = [RandomPeasant(base_level) for _ in range(group_size)]
     game = Game(peasants,
             experience_factor=experience_factor,
             reward_scheme="combatant-uniform",
-            round_limit=round_limit)
-    results = game.run()
+            round_limit=round_limit,
+            backend=backend,
+            vectorize=vectorize)
+
+    if phases:
+        instrumentation.reset()
+        instrumentation.enable()
+    try:
+        results = game.run()
+    finally:
+        if phases:
+            instrumentation.disable()
+    if phases:
+        print(instrumentation.table())
+
+    artifacts.keep_table("episode", results)
+
+    import matplotlib.pyplot as plt
 
     figure, axes = plt.subplots(ncols=2)
     
     results.plot.line(ax=axes[0], x="turn", y=["stamina-mean", "cohort-size"])
     results.plot.line(ax=axes[1], x="turn", y=["health-mean"])
 
-    plt.show()
+    artifacts.show("episode")
+
+
+def _summarise_experience(results: pd.DataFrame) -> tuple:
+    """ Reduces a game's results to its lifespan, and the fit of its mean
+    stamina over time """
+
+    from scipy import stats
+
+    regression = stats.linregress(results["turn"], 
+            results["stamina-mean"])
+    lifespan = results["lifetime-mean"].iloc[-1]
+    return lifespan, regression.rvalue, regression.slope
 
 
 def profile_experience_factor(base_level: int = 10,
         group_size: int = 10,
         round_limit: int = 100,
-        games_per_step: int = 5):
+        games_per_step: int = 5,
+        workers: int = None,
+        batched: bool = False,
+        backend: str = "python",
+        vectorize: bool = False):
+
+    # For each value of experience_factor in the range 0.5, 1.5, run a few
+    # games, spread over a pool of workers; batched runs each value's games
+    # together in one BatchGame; otherwise backend picks the engine, and
+    # vectorize lets it play large cohorts' turns whole
+    experience_factors = [factor / 1000 for factor in range(500, 1500, 25)]
+
+    configurations = []
+    for experience_factor in experience_factors:
+        configuration = {
+            "group_size": group_size,
+            "level": base_level,
+            "experience_factor": experience_factor,
+            "reward_scheme": "combatant-uniform",
+            "round_limit": round_limit,
+            "backend": backend,
+            "vectorize": vectorize,
+        }
+        configurations += [configuration] * games_per_step
+
+    runner = Runner(workers=workers, seed=seed, batched=batched)
+    summaries = runner.run(configurations, summarise=_summarise_experience)
 
-    # For each value of experience_factor in the range 0.5, 1.5
     statistics = []
-    for experience_factor in range(500, 1500, 25):
-        experience_factor /= 1000
-
-        lifespans = []
-        stamina_correlations = []
-        stamina_gradients = []
-        for _ in range(5):
-            peasants = [RandomPeasant(base_level) for _ in range(group_size)]
-            game = Game(peasants,
-                    experience_factor=experience_factor,
-                    reward_scheme="combatant-uniform",
-                    round_limit=round_limit)
-            results = game.run()
-
-            # Get some interesting stats
-            turns = len(results)
-            rounds = results["round"].max()
-        
-            # cohort_slope = scipy.stats.linregress(results["turn"], 
-            #         results["cohort-size"]).slope
-
-            lifespans.append(results["lifetime-mean"].iloc[-1])
-        
-            regression = scipy.stats.linregress(results["turn"], 
-                    results["stamina-mean"])
-            stamina_correlations.append(regression.rvalue)
-            stamina_gradients.append(regression.slope)
+    for index, experience_factor in enumerate(experience_factors):
+        start = index * games_per_step
+        lifespans, stamina_correlations, stamina_gradients = \
+                zip(*summaries[start:start + games_per_step])
         
         average_lifespan = np.mean(lifespans)
         average_correlation = np.mean(stamina_correlations)
@@ -103,6 +146,8 @@ def profile_experience_factor(base_level: int = 10,
             "stamina-gradient", 
             "experience-stamina-gradient-trend")
 
+    import matplotlib.pyplot as plt
+
     figure, axes = plt.subplots(ncols=2)
     
     plots = [
@@ -117,14 +162,81 @@ def profile_experience_factor(base_level: int = 10,
     ]
     table.plot.line(ax=axes[1], x="experience-factor", y=plots)
 
-    plt.show()
+    artifacts.keep_table("experience-factor", table)
+    artifacts.show("experience-factor")
+
+
+def profile_allocations(group_size: int = 1000,
+        warmup_steps: int = 100,
+        steps: int = 5000):
+    
+    """ Counts the memory allocated by each call to Game.step, once the game
+    is under way; both what's briefly needed, and what's kept. Then times the
+    same steps untraced. Games drawing from NumPy's global state and from
+    buffered random sources are compared. Steps still allocate: each reward
+    is a new float, and each RandomPeasant decision a new Action """
+
+    # Buffered sources each get their own stream, as the runner's do
+    sources = {
+        "global": lambda seed: np.random,
+        "buffered": lambda seed: RandomSource(np.random.default_rng(seed), 256),
+    }
+    for name, source in sources.items():
+        def start() -> Game:
+            game_seed, *peasant_seeds = np.random.SeedSequence(seed).spawn(
+                    1 + group_size)
+
+            peasants = [RandomPeasant(10, random=source(peasant_seed)) 
+                    for peasant_seed in peasant_seeds]
+            game = Game(peasants, 
+                    round_limit=-1, 
+                    telemetry="none", 
+                    random=source(game_seed))
+            for _ in range(warmup_steps):
+                game.step()
+            return game
+
+        game = start()
+        tracemalloc.start()
+        transient = 0
+        retained = 0
+        step_count = 0
+        for _ in range(steps):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+
+            finished, _ = game.step()
+
+            after, peak = tracemalloc.get_traced_memory()
+            transient += peak - before
+            retained += after - before
+            step_count += 1
+
+            if finished:
+                break
+        tracemalloc.stop()
+
+        # Tracing slows each step down, so the same steps are timed again
+        game = start()
+        elapsed = time.perf_counter()
+        for _ in range(step_count):
+            game.step()
+        elapsed = time.perf_counter() - elapsed
+
+        print(f"{name}, transient bytes per step: "
+                f"{transient / step_count:.1f}")
+        print(f"{name}, retained bytes per step: "
+                f"{retained / step_count:.1f}")
+        print(f"{name}, steps per second: {step_count / elapsed:,.0f}")
+
 
 if __name__ == "__main__":
-    assert len(sys.argv) == 2
-
-    if sys.argv[1] == "episode":
-        profile_episode()
-    elif sys.argv[1] == "phi":
-        profile_experience_factor()
-    else:
-        raise ValueError(f"invalid profile argument: {sys.argv[1]}")
\ No newline at end of file
+    experiments = {
+        "episode": profile_episode,
+        "phi": profile_experience_factor,
+        "allocations": profile_allocations,
+    }
+    names, headless, options = artifacts.parse("profile",
+            experiments,
+            sys.argv[1:])
+    sys.exit(artifacts.run("profile", experiments, names, headless, options))
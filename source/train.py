@@ -1,25 +1,29 @@
 import sys
 import os; os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
-import random
-import datetime
-import itertools
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib as matplt
-import tensorflow as tf
-import scipy
-import mpl_toolkits as plt_tlk
 
-from tensorflow import keras
-# import scipy
-
-from learning.experience_buffer import ExperienceBuffer
+import artifacts
 
+from game import instrumentation
 from game.game import Game
 from game.actors.random_peasant import RandomPeasant
-from game.actors.ddpg_peasant import DDPGPeasant
+
+# TensorFlow (through the DDPG peasant) and matplotlib are imported by the
+# functions that use them, so nothing heavy loads before arguments are checked
+
+HEADERS = [
+    "episode", 
+    "average-reward", 
+    "network-lifespan", 
+    "average-lifespan",
+]
+
+# Checkpoints are kept outside runs/, where every headless run writes to a
+# new directory, so a job that's started again finds the last one
+CHECKPOINT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+        "..", "checkpoints")
 
 
 def _plot(statistics: pd.DataFrame):    
@@ -29,82 +33,273 @@ def _plot(statistics: pd.DataFrame):
         "average-lifespan"
     ]
     statistics.plot(x="episode", y=plots)
-    plt.show()
 
+    artifacts.keep_table("training", statistics)
+    artifacts.show("training")
+
+
+def _checkpoint(training_peasant: "DDPGPeasant",
+        peasants: list,
+        episode: int,
+        rewards: list,
+        lifespans: list,
+        statistics: list,
+        progress: dict) -> dict:
+
+    """ Returns everything needed to carry on training after episode, as
+    arrays: the learner, the other peasants' noise, NumPy's random state,
+    the statistics so far, and the caller's progress """
+
+    from learning import checkpoint
+
+    arrays = {f"learner-{key}": array
+            for key, array in training_peasant.checkpoint().items()}
+
+    for index, peasant in enumerate(peasants):
+        noise_generator = getattr(peasant, "noise_generator", None)
+        if peasant is not training_peasant and noise_generator is not None:
+            arrays[f"peasant-{index}-noise"] = np.array(
+                    noise_generator.previous_value)
+
+    arrays.update(checkpoint.random_state())
+    arrays.update(progress)
+
+    arrays["episode"] = np.array(episode)
+    arrays["rewards"] = np.array(rewards, dtype=float)
+    arrays["lifespans"] = np.array(lifespans)
+    arrays["statistics"] = np.array(statistics, dtype=float).reshape(-1, len(HEADERS))
+    return arrays
+
+
+def _resume(arrays: dict,
+        training_peasant: "DDPGPeasant",
+        peasants: list) -> tuple:
+
+    """ Restores the peasants and NumPy's random state from a checkpoint,
+    and returns the next episode, with the rewards, lifespans and
+    statistics so far """
+
+    from learning import checkpoint
+
+    training_peasant.restore({key[len("learner-"):]: array
+            for key, array in arrays.items() if key.startswith("learner-")})
+
+    for index, peasant in enumerate(peasants):
+        if f"peasant-{index}-noise" in arrays:
+            peasant.noise_generator.previous_value = (
+                    arrays[f"peasant-{index}-noise"].copy())
+
+    checkpoint.restore_random_state(arrays)
+
+    statistics = [[int(row[0]), *row[1:]] for row in arrays["statistics"]]
+    return (int(arrays["episode"]) + 1,
+            list(arrays["rewards"]),
+            list(arrays["lifespans"]),
+            statistics)
 
-def _train(training_peasant: DDPGPeasant,
+
+def _train(training_peasant: "DDPGPeasant",
         peasants: list,
         epochs: int = 100,
         verbose: bool = True,
+        phase_report_interval: int = None,
+        checkpointer: "Checkpointer" = None,
+        progress: dict = None,
         **arguments):
 
+    """ Trains a peasant among others for some episodes. With a
+    checkpointer, a checkpoint is written every so many episodes, and
+    training resumes from one whose progress matches the given one, so a
+    job stopped part way continues as though it never was """
+
     peasants.append(training_peasant)
+    progress = progress or {}
 
+    start = 0
     rewards = []
     lifespans = []
     statistics = []
-    for episode in range(epochs):
-        for peasant in peasants:
-            peasant.reset()
 
-        game = Game(peasants, **arguments)
-        results = game.run()
+    saved = checkpointer.load() if checkpointer is not None else None
+    if saved is not None and all(key in saved
+            and np.array_equal(saved[key], value)
+            for key, value in progress.items()):
 
-        reward = np.mean(training_peasant.rewards)
-        lifespan = training_peasant.previous_round
+        start, rewards, lifespans, statistics = _resume(saved,
+                training_peasant,
+                peasants)
+        if verbose:
+            print(f"resuming from episode {start}")
 
-        rewards.append(reward)
-        lifespans.append(lifespan)
+    # Time each phase of the game and the network, reporting a breakdown
+    # every so many episodes; timing stays on only while training does
+    if phase_report_interval:
+        instrumentation.reset()
+        instrumentation.enable()
 
-        average_reward = np.mean(rewards[-40:])
-        network_lifespan = np.mean(lifespans[-40:])
-        average_lifespan = results["lifetime-mean"].iloc[-1]
+    try:
+        for episode in range(start, epochs):
+            for peasant in peasants:
+                peasant.reset()
 
-        results = [
-            episode, 
-            average_reward, 
-            network_lifespan, 
-            average_lifespan,
-        ]
-        statistics.append(results)
+            game = Game(peasants, telemetry="final", **arguments)
+            results = game.run()
 
-        if verbose:
-            report = []
-            for result in results:
-                if isinstance(result, float):
-                    report.append(f"{result:.3}")
-                else:
-                    report.append(f"{result}")
-            print(", ".join(report))
-
-    headers = [
-        "episode", 
-        "average-reward", 
-        "network-lifespan", 
-        "average-lifespan",
-    ]
-    statistics = pd.DataFrame(statistics, columns=headers)
+            reward = np.mean(training_peasant.rewards)
+            lifespan = training_peasant.previous_round
+
+            rewards.append(reward)
+            lifespans.append(lifespan)
+
+            average_reward = np.mean(rewards[-40:])
+            network_lifespan = np.mean(lifespans[-40:])
+            average_lifespan = results["lifetime-mean"].iloc[-1]
+
+            results = [
+                episode, 
+                average_reward, 
+                network_lifespan, 
+                average_lifespan,
+            ]
+            statistics.append(results)
+
+            if verbose:
+                report = []
+                for result in results:
+                    if isinstance(result, float):
+                        report.append(f"{result:.3}")
+                    else:
+                        report.append(f"{result}")
+                print(", ".join(report))
+
+            if (phase_report_interval
+                    and (episode + 1) % phase_report_interval == 0):
+                print(instrumentation.table())
+                instrumentation.reset()
+
+            if checkpointer is not None and (checkpointer.due(episode)
+                    or episode == epochs - 1):
+                checkpointer.save(_checkpoint(training_peasant,
+                        peasants,
+                        episode,
+                        rewards,
+                        lifespans,
+                        statistics,
+                        progress))
+    finally:
+        if phase_report_interval:
+            instrumentation.disable()
+
+    if checkpointer is not None:
+        checkpointer.wait()
+
+    statistics = pd.DataFrame(statistics, columns=HEADERS)
     return statistics
 
 
-def train_random():
+def train_random(phase_report_interval: int = None):
+    from game.actors.ddpg_peasant import DDPGPeasant
+
     training_peasant = DDPGPeasant(10)
     peasants = [RandomPeasant(10) for _ in range(9)]
     statistics = _train(training_peasant, 
             peasants, 
             epochs=200, 
+            phase_report_interval=phase_report_interval,
             reward_scheme="combatant-uniform")
     _plot(statistics)
 
 
+def _train_vectorized(environment: "VectorEnvironment",
+        epochs: int = 100,
+        verbose: bool = True) -> pd.DataFrame:
+
+    """ Trains across several games at once, reporting on episodes as they
+    finish, in the same terms as _train; the environment is anything whose
+    run() returns the statistics of finished episodes, such as a
+    VectorEnvironment or an AsyncTrainer """
+
+    statistics = []
+    finished = []
+    while len(statistics) < epochs:
+        finished += environment.run(1)
+        rewards, lifespans, average_lifespans = zip(*finished)
+
+        results = [
+            len(statistics),
+            np.mean(rewards[-40:]),
+            np.mean(lifespans[-40:]),
+            average_lifespans[-1],
+        ]
+        statistics.append(results)
+
+        if verbose:
+            print(", ".join(f"{result:.3}" if isinstance(result, float)
+                    else f"{result}" for result in results))
+
+    return pd.DataFrame(statistics, columns=HEADERS)
+
+
+def train_random_vectorized(environments: int = 8):
+    from game.actors.ddpg_peasant import DDPGPeasant
+    from learning.vector_environment import VectorEnvironment
+
+    training_peasant = DDPGPeasant(10)
+    environment = VectorEnvironment(training_peasant,
+            lambda: [RandomPeasant(10) for _ in range(9)],
+            count=environments,
+            reward_scheme="combatant-uniform")
+
+    try:
+        statistics = _train_vectorized(environment, epochs=200)
+    finally:
+        training_peasant.close()
+    _plot(statistics)
+
+
+def train_random_async(actors: int = None):
+    from game.actors.ddpg_peasant import DDPGPeasant
+    from learning.async_training import AsyncTrainer, RandomCohort
+
+    training_peasant = DDPGPeasant(10)
+    trainer = AsyncTrainer(training_peasant,
+            RandomCohort(9, 10),
+            actors=actors,
+            reward_scheme="combatant-uniform")
+
+    try:
+        statistics = _train_vectorized(trainer, epochs=200)
+    finally:
+        trainer.close()
+    _plot(statistics)
+
+
 def train_random_incremental(steps_per_epoch: int = 25,
-        cohort_size: int = 5):
+        cohort_size: int = 5,
+        checkpoint_interval: int = 5):
     
+    from game.actors.ddpg_peasant import DDPGPeasant
+    from learning.checkpoint import Checkpointer
+
     training_peasant = DDPGPeasant(10, 
             weight_file="resources/weights/random-unrewarded")
 
+    # A stopped run picks up from its last checkpoint when started again
+    checkpointer = Checkpointer(
+            os.path.join(CHECKPOINT_DIRECTORY, "incremental.npz"),
+            checkpoint_interval)
+    saved = checkpointer.load()
+
+    first = 0
     statistics = None
-    for proportion in range(cohort_size - 1):
+    if saved is not None:
+        first = int(saved["stage"])
+        if len(saved["history"]):
+            statistics = pd.DataFrame(saved["history"], columns=HEADERS)
+            statistics["episode"] = statistics["episode"].astype(int)
+        print(f"resuming from stage {first}")
+
+    for proportion in range(first, cohort_size - 1):
 
         peasants = [RandomPeasant(10) for _ in range(cohort_size - proportion)]
         for _ in range(proportion):
@@ -113,22 +308,81 @@ def train_random_incremental(steps_per_epoch: int = 25,
                     train=False)
             peasants.append(intelligent_peasant)
 
+        history = (statistics.to_numpy(dtype=float) if statistics is not None
+                else np.zeros((0, len(HEADERS))))
+        progress = {
+            "stage": np.array(proportion),
+            "history": history,
+        }
+
         new_statistics = _train(training_peasant, 
                 peasants, 
                 epochs=steps_per_epoch,
-                reward_scheme="combat-uniform")
+                checkpointer=checkpointer,
+                progress=progress,
+                reward_scheme="combatant-uniform")
         if statistics is None:
             statistics = new_statistics
         else:
             new_statistics["episode"] = (new_statistics["episode"] 
                     + proportion * steps_per_epoch)
-            statistics = pd.concat([statistics, new_statistics])
+            statistics = pd.concat([statistics, new_statistics],
+                    ignore_index=True)
     
     _plot(statistics)
-    training_peasant.save("resources/weights/intelligent-unrewarded")
+    training_peasant.save(
+            artifacts.redirect("resources/weights/intelligent-unrewarded"))
+    checkpointer.clear()
+
+
+def profile_replay(epochs: int = 200, seeds: int = 3):
+    """ Trains with uniform and with prioritized replay from the same
+    seeds, and finds how soon each reaches the lifespan uniform replay
+    ends on """
+
+    from tensorflow import keras
+    from game.actors.ddpg_peasant import DDPGPeasant
+
+    curves = {}
+    for replay in ("uniform", "prioritized"):
+        runs = []
+        for seed in range(seeds):
+            keras.utils.set_random_seed(seed)
+
+            training_peasant = DDPGPeasant(10,
+                    prioritized=replay == "prioritized")
+            peasants = [RandomPeasant(10) for _ in range(9)]
+            statistics = _train(training_peasant,
+                    peasants,
+                    epochs=epochs,
+                    verbose=False,
+                    reward_scheme="combatant-uniform")
+            runs.append(statistics["network-lifespan"].to_numpy())
+
+        curves[replay] = np.mean(runs, axis=0)
+
+    table = pd.DataFrame(curves)
+    table.index.name = "episode"
+
+    # Lifespans are averaged over the last 40 episodes, so earlier ones
+    # are too noisy to count
+    target = table["uniform"].iloc[-1]
+    for replay in curves:
+        reached = np.flatnonzero(table[replay].to_numpy()[40:] >= target)
+        epoch = reached[0] + 40 if len(reached) else None
+        print(f"{replay}: mean network-lifespan {table[replay].mean():.3}, "
+                f"reaches {target:.3} at epoch {epoch}")
+
+    table.plot(y=list(curves), ylabel="network-lifespan")
+
+    artifacts.save_table("replay", table)
+    artifacts.show("replay")
 
 
 def profile_multivariable(steps_per_epoch: int = 10):
+    import matplotlib.pyplot as plt
+
+    from game.actors.ddpg_peasant import DDPGPeasant
 
     statistics = []
     for weight_early in range(0, 160, 20):
@@ -137,7 +391,10 @@ def profile_multivariable(steps_per_epoch: int = 10):
         for weight_generous in range(0, 160, 20):
             weight_generous /= 100
 
-            training_peasant = DDPGPeasant(10, weight_file="resources/weights/random-unrewarded")
+            # Each peasant trains too briefly to earn back compiling its step
+            training_peasant = DDPGPeasant(10, 
+                    weight_file="resources/weights/random-unrewarded",
+                    fused=False)
             peasants = []
             for _ in range(4):
                 peasants.append(RandomPeasant(10))
@@ -168,15 +425,16 @@ def profile_multivariable(steps_per_epoch: int = 10):
     table = pd.DataFrame(statistics, 
             columns=["weight-early", "weight-generous", "lifetime"])
         
-    table.to_csv("output.csv")
+    artifacts.save_table("output", table)
 
     figure = plt.figure()
     axes = figure.add_subplot(projection='3d')
     axes.plot_trisurf(table["weight-early"], table["weight-generous"], table["lifetime"], linewidth=2, antialiased=True)
-    plt.show()
+    artifacts.show("weight-lifetimes")
 
 
 def profile_cooperation(steps_per_epoch: int = 10):
+    from game.actors.ddpg_peasant import DDPGPeasant
 
     results = []
     for index in range(7):
@@ -185,7 +443,10 @@ def profile_cooperation(steps_per_epoch: int = 10):
         for weight in range(0, 160, 20):
             weight /= 100
 
-            training_peasant = DDPGPeasant(10, weight_file="resources/weights/random-unrewarded")
+            # Each peasant trains too briefly to earn back compiling its step
+            training_peasant = DDPGPeasant(10, 
+                    weight_file="resources/weights/random-unrewarded",
+                    fused=False)
             peasants = []
             for _ in range(4):
                 peasants.append(RandomPeasant(10))
@@ -213,24 +474,29 @@ def profile_cooperation(steps_per_epoch: int = 10):
     table = pd.DataFrame(results, columns=["weight-index", "correlation"])
     print(table)
     table.plot.bar(x="weight-index", y="correlation")
-    plt.show()
+
+    artifacts.keep_table("correlations", table)
+    artifacts.show("correlations")
 
 
 if __name__ == "__main__":
-    assert len(sys.argv) == 2
+    experiments = {
+        "random": train_random,
+        "vectorized": train_random_vectorized,
+        "async": train_random_async,
+        "incremental": train_random_incremental,
+        "cooperative": profile_cooperation,
+        "multivariable": profile_multivariable,
+        "replay": profile_replay,
+    }
+    names, headless, options = artifacts.parse("train",
+            experiments,
+            sys.argv[1:])
+
+    # Seeds Python, NumPy and TensorFlow
+    from tensorflow import keras
 
     seed = 100
-    np.random.seed(seed)
-    tf.random.set_seed(seed)
     keras.utils.set_random_seed(seed)
 
-    if sys.argv[1] == "random":
-        train_random()
-    elif sys.argv[1] == "incremental":
-        train_random_incremental()
-    elif sys.argv[1] == "cooperative":
-        profile_cooperation()
-    elif sys.argv[1] == "multivariable":
-        profile_multivariable()
-    else:
-        raise ValueError(f"invalid train argument: {sys.argv[1]}")
+    sys.exit(artifacts.run("train", experiments, names, headless, options))
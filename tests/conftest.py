@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The scripts import the game and learning packages from source/, as they
+# do when run. Appended rather than prepended, since source/profile.py
+# would otherwise shadow the standard library's profile module
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+        "..", "source"))
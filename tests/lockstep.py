@@ -0,0 +1,87 @@
+import numpy as np
+
+from game.game import Game
+from game.batch_game import BatchGame
+from game.actors.random_peasant import RandomPeasant
+
+
+class RecordingGame(Game):
+    """ A game that notes every decision, by the peasant's starting place,
+    and every monster spawn, for a BatchGame to follow """
+
+    def __init__(self, peasants: list, **arguments):
+        self.places = {peasant.id: place for place, peasant in enumerate(peasants)}
+        self.events = []
+        super().__init__(peasants, **arguments)
+
+    def spawn_monster(self):
+        monster = super().spawn_monster()
+        self.events.append(("spawn", monster.base_health, monster.attack))
+        return monster
+
+    def resolve(self, peasant, action, reward):
+        self.events.append(("decision",
+                self.places[peasant.id],
+                action.attack,
+                action.defence))
+        super().resolve(peasant, action, reward)
+
+
+def _set_monster(batch: BatchGame, health: float, attack: float):
+    batch.monster_base_health[0] = health
+    batch.monster_health[0] = health
+    batch.monster_attack[0] = attack
+    batch.monster_level[0] = health + attack
+
+
+def _follow(game: RecordingGame, batch: BatchGame):
+    """ Plays a single game BatchGame through the decisions and spawns of a
+    Game, so only their rules, not their random draws, can differ """
+
+    events = iter(game.events)
+    _, health, attack = next(events)
+    _set_monster(batch, health, attack)
+
+    for kind, *values in events:
+        if kind == "spawn":
+            _set_monster(batch, *values)
+            continue
+
+        place, attack, defence = values
+        batch.action_attack[0] += attack
+        batch.action_defence[0] += defence
+        batch.stamina[0, place] -= attack + defence
+        batch.combatant[0, place] = bool(attack or defence)
+
+        batch.position[0] += 1
+        if batch.position[0] == batch.cohort_size[0]:
+            batch.end_turn(np.array([0]))
+
+
+def play(peasant_count: int, seed: int, reward_scheme: str = "uniform") -> tuple:
+    """ Plays a seeded Game of random peasants, then a BatchGame in lockstep
+    with it; returns both their statistics """
+
+    np.random.seed(seed)
+    peasants = [RandomPeasant(10) for _ in range(peasant_count)]
+
+    batch = BatchGame(1, peasant_count, reward_scheme=reward_scheme)
+    batch.stamina[0] = [peasant.stamina for peasant in peasants]
+    batch.health[0] = [peasant.health for peasant in peasants]
+    batch.attack[0] = [peasant.attack for peasant in peasants]
+    batch.defence[0] = [peasant.defence for peasant in peasants]
+
+    game = RecordingGame(peasants, reward_scheme=reward_scheme)
+    expected = game.run()
+
+    _follow(game, batch)
+    assert batch.finished[0]
+
+    return expected, batch.recorders[0].dataframe()
+
+
+def assert_same(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result.to_numpy(dtype=float),
+            expected.to_numpy(dtype=float))
@@ -0,0 +1,121 @@
+import os
+
+import pandas as pd
+import pytest
+
+import artifacts
+
+
+@pytest.fixture(autouse=True)
+def interactive(monkeypatch, tmp_path):
+    """ Starts each test interactive, with headless runs writing under a
+    temporary directory """
+
+    monkeypatch.setattr(artifacts, "run_directory", None)
+    monkeypatch.setattr(artifacts, "experiment", None)
+    monkeypatch.setattr(artifacts, "RUNS_DIRECTORY", str(tmp_path))
+
+
+def plot(group_size: int = 10, level: float = 1.0, vectorize: bool = False):
+    pass
+
+
+def phi(games_per_step: int = 5, vectorize: bool = False):
+    pass
+
+
+EXPERIMENTS = {"episode": plot, "phi": phi}
+
+
+def test_parse_reads_names_flags_and_options():
+    names, headless, options = artifacts.parse("profile", EXPERIMENTS,
+            ["episode", "phi", "--headless", "--group-size=100", "--vectorize",
+                "--games-per-step=2"])
+
+    assert names == ["episode", "phi"]
+    assert headless
+    assert options == {"group_size": "100", "vectorize": True,
+            "games_per_step": "2"}
+
+    names, headless, options = artifacts.parse("profile", EXPERIMENTS,
+            ["phi"])
+    assert names == ["phi"]
+    assert not headless
+    assert options == {}
+
+
+@pytest.mark.parametrize("arguments", [
+    [],
+    ["--headless"],
+    ["episode", "missing"],
+    ["phi", "--group-size=100"],
+    ["episode", "--unknown=1"],
+    ["episode", "--group-size"],
+    ["episode", "--level=high"],
+])
+def test_parse_rejects_bad_arguments(arguments):
+    with pytest.raises((AssertionError, ValueError)):
+        artifacts.parse("profile", EXPERIMENTS, arguments)
+
+
+def test_accepted_converts_to_annotated_types():
+    options = {"group_size": "100", "level": "2.5", "vectorize": "no",
+            "games_per_step": "3"}
+    assert artifacts._accepted(plot, options) == {"group_size": 100,
+            "level": 2.5, "vectorize": False}
+
+    for value in (True, "true", "Yes", "1"):
+        assert artifacts._accepted(phi, {"vectorize": value}) == {
+                "vectorize": True}
+
+
+def test_run_carries_on_past_a_failure(capsys):
+    ran = []
+
+    def failing():
+        ran.append("failing")
+        raise RuntimeError("failed on purpose")
+
+    def passing(level: float = 0):
+        ran.append(("passing", level))
+
+    experiments = {"failing": failing, "passing": passing}
+    status = artifacts.run("train", experiments, ["failing", "passing"],
+            options={"level": 2.0})
+
+    assert status == 1
+    assert ran == ["failing", ("passing", 2.0)]
+    assert "failed experiments: failing" in capsys.readouterr().out
+
+    assert artifacts.run("train", experiments, ["passing"]) == 0
+
+
+def test_headless_run_writes_artifacts(tmp_path):
+    pytest.importorskip("matplotlib")
+
+    def episode(turns: int = 3):
+        import matplotlib.pyplot as plt
+
+        table = pd.DataFrame({"turn": range(turns), "health": range(turns)})
+        artifacts.keep_table("episode", table)
+        table.plot.line(x="turn", y="health")
+        artifacts.show("episode")
+
+        with open(artifacts.redirect("resources/weights/episode"), "w") as file:
+            file.write("weights")
+
+    status = artifacts.run("profile", {"episode": episode}, ["episode"],
+            headless=True,
+            options={"turns": "5"})
+    assert status == 0
+
+    import matplotlib
+    assert matplotlib.get_backend().lower() == "agg"
+
+    runs = os.listdir(tmp_path)
+    assert len(runs) == 1 and runs[0].startswith("profile-")
+
+    directory = os.path.join(tmp_path, runs[0], "episode")
+    assert sorted(os.listdir(directory)) == ["episode", "episode.csv",
+            "episode.png"]
+    assert len(pd.read_csv(os.path.join(directory, "episode.csv"))) == 5
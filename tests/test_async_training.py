@@ -0,0 +1,159 @@
+import queue
+import threading
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from learning.async_training import (TransitionRing, WeightBoard,
+        RandomCohort, AsyncTrainer, act)
+
+context = multiprocessing.get_context("spawn")
+
+SHAPES = [(9, 48), (48, ), (48, 24), (24, ), (24, 2), (2, )]
+
+
+def _transition(value: float) -> tuple:
+    return (np.full(4, value), np.full(2, value + 0.25), value,
+            np.full(4, value + 0.5))
+
+
+def test_ring_reads_across_the_wrap():
+    ring = TransitionRing(context, slots=4, state_count=4, action_count=2)
+
+    # Pushing and draining a few at a time carries the ring round twice
+    value = 0
+    for count in (3, 2, 4, 1, 3):
+        for offset in range(count):
+            ring.push(*_transition(value + offset))
+
+        states, actions, rewards, new_states = ring.drain()
+        expected = np.arange(value, value + count, dtype=np.float32)
+        np.testing.assert_array_equal(rewards, expected)
+        np.testing.assert_array_equal(states, np.repeat(expected[:, None], 4, 1))
+        np.testing.assert_array_equal(actions,
+                np.repeat(expected[:, None] + 0.25, 2, 1))
+        np.testing.assert_array_equal(new_states,
+                np.repeat(expected[:, None] + 0.5, 4, 1))
+        value += count
+
+    assert ring.written.value == ring.read.value == value
+    assert len(ring.drain()[2]) == 0
+
+
+def test_ring_drops_unpublished_rows():
+    ring = TransitionRing(context, slots=4, state_count=4, action_count=2)
+    ring.push(*_transition(1))
+
+    # A row the writer is part way through isn't counted as written, so a
+    # drain in the meantime leaves it alone
+    row = ring.rows()[ring.written.value % ring.slots]
+    row[:4] = 7
+
+    states, _, rewards, _ = ring.drain()
+    np.testing.assert_array_equal(rewards, [1])
+    assert len(ring.drain()[2]) == 0
+
+    ring.push(*_transition(2))
+    states, _, rewards, _ = ring.drain()
+    np.testing.assert_array_equal(rewards, [2])
+    np.testing.assert_array_equal(states, [[2, 2, 2, 2]])
+
+
+def _weights(seed: int) -> list:
+    random = np.random.default_rng(seed)
+    return [random.normal(0, 0.5, shape).astype(np.float32) for shape in SHAPES]
+
+
+def test_board_versions_each_publish():
+    board = WeightBoard(context, SHAPES)
+    assert board.fetch()[0] == 0
+
+    for version in range(1, 4):
+        weights = _weights(version)
+        board.publish(weights)
+
+        fetched_version, fetched = board.fetch()
+        assert fetched_version == version
+        for array, expected in zip(fetched, weights):
+            assert array.shape == expected.shape
+            np.testing.assert_array_equal(array, expected)
+
+
+def test_actor_waits_on_lag():
+    ring = TransitionRing(context, slots=1 << 14)
+    board = WeightBoard(context, SHAPES)
+    board.publish(_weights(0))
+
+    trained = context.RawValue("q", 0)
+    statistics = queue.Queue()
+    stop = threading.Event()
+
+    thread = threading.Thread(target=act,
+            args=(0, ring, board, trained, ["relu", "relu", "tanh"],
+                RandomCohort(count=3), statistics, stop, 0, 10, 0.2,
+                1, 1, {"round_limit": 3, "telemetry": "final"}),
+            daemon=True)
+    thread.start()
+
+    try:
+        # One episode ahead of the learner, then it waits
+        index, end, *_ = statistics.get(timeout=30)
+        assert index == 0
+        assert end == ring.written.value
+        with pytest.raises(queue.Empty):
+            statistics.get(timeout=0.3)
+
+        # Training on it lets the next start, with the newly published policy
+        board.publish(_weights(1))
+        trained.value = 1
+        statistics.get(timeout=30)
+        with pytest.raises(queue.Empty):
+            statistics.get(timeout=0.3)
+    finally:
+        stop.set()
+        thread.join(timeout=30)
+    assert not thread.is_alive()
+
+
+def test_trainers_build_their_own_cohorts():
+    first = AsyncTrainer(None)
+    second = AsyncTrainer(None)
+    assert isinstance(first.peasants, RandomCohort)
+    assert first.peasants is not second.peasants
+
+
+def test_trainer_trains_on_its_actors_episodes():
+    pytest.importorskip("tensorflow")
+    from game.actors.ddpg_peasant import DDPGPeasant
+
+    np.random.seed(0)
+    learner = DDPGPeasant(10, batch_size=4, memory_capacity=1000, fused=False)
+    trainer = AsyncTrainer(learner,
+            peasants=RandomCohort(count=3),
+            actors=2,
+            publish_interval=2,
+            ring_slots=8,
+            round_limit=10)
+
+    try:
+        statistics = trainer.run(2)
+    finally:
+        processes = list(trainer.processes)
+        trainer.close()
+
+    assert len(statistics) == 2
+    assert len(processes) == 2
+
+    # Every transition written reached the learner's buffer, through a ring
+    # small enough to wrap, and training published new weights
+    written = sum(ring.written.value for ring in trainer.rings)
+    assert written > trainer.ring_slots
+    assert learner.buffer.pointer == written
+    assert all(ring.read.value == ring.written.value for ring in trainer.rings)
+    assert trainer.board.version.value > 1
+
+    # The actors stopped on their own, rather than being terminated
+    for process in processes:
+        assert not process.is_alive()
+        assert process.exitcode == 0
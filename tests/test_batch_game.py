@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from game.game import Game
+from game.batch_game import BatchGame
+from game.options import REWARD_SCHEMES
+from game.actors.random_peasant import RandomPeasant
+
+from lockstep import play, assert_same
+
+
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+@pytest.mark.parametrize("seed", range(10))
+def test_batch_game_follows_game(reward_scheme, seed):
+    expected, result = play(6, seed, reward_scheme)
+    assert_same(result, expected)
+
+
+def test_batch_game_matches_game_in_distribution():
+    np.random.seed(0)
+    game_count = 2000
+
+    batch = BatchGame(game_count, 10, telemetry="final")
+    batch_results = [results.iloc[-1] for results in batch.run()]
+
+    game_results = []
+    for _ in range(game_count):
+        game = Game([RandomPeasant(10) for _ in range(10)], telemetry="final")
+        game_results.append(game.run().iloc[-1])
+
+    for column in ("turn", "lifetime-mean"):
+        batch_values = np.array([row[column] for row in batch_results])
+        game_values = np.array([row[column] for row in game_results])
+
+        error = np.sqrt(batch_values.var() / game_count
+                + game_values.var() / game_count)
+        assert abs(batch_values.mean() - game_values.mean()) < 4 * error
+
+
+def test_batched_runner_is_independent_of_workers():
+    from game.runner import Runner
+
+    configurations = ([{"group_size": 5, "experience_factor": 0.8}] * 6
+            + [{"group_size": 7, "reward_scheme": "socially-conscious"}] * 3)
+
+    results = [Runner(workers, seed=3, batched=True, batch_size=4).run(
+            configurations) for workers in (1, 2)]
+
+    assert len(results[0]) == len(configurations)
+    for result, expected in zip(*results):
+        assert result.equals(expected)
+    assert results[0][-1]["cohort-size"].iloc[0] == 7
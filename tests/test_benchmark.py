@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import benchmark
+
+
+def _result(p50: float) -> dict:
+    return {"ops-per-second": 1e6 / p50, "p50": p50, "p90": p50, "p99": p50,
+            "samples": 10}
+
+
+def test_compare_flags_only_regressions_beyond_tolerance(capsys):
+    baseline = {name: _result(100) for name in ("steady", "slower", "faster",
+            "regressed")}
+    results = {
+        "steady": _result(100),
+        "slower": _result(120),
+        "faster": _result(50),
+        "regressed": _result(130),
+        "new": _result(1000),
+    }
+
+    assert benchmark.compare(results, baseline, tolerance=0.25) == ["regressed"]
+
+    # Benchmarks missing from the baseline aren't compared
+    output = capsys.readouterr().out
+    assert "regressed" in output and "REGRESSED" in output
+    assert "new" not in output
+
+    assert benchmark.compare(results, baseline, tolerance=0.1) == [
+            "slower", "regressed"]
+
+
+def test_save_merges_into_the_baseline(tmp_path):
+    path = os.path.join(tmp_path, "benchmarks", "baseline.json")
+
+    benchmark.save({"a": _result(1), "b": _result(2)}, path)
+    benchmark.save({"b": _result(3), "c": _result(4)}, path)
+
+    results = benchmark.load(path)["results"]
+    assert results == {"a": _result(1), "b": _result(3), "c": _result(4)}
+
+
+def test_save_replaces_another_machines_baseline(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "baseline.json")
+    benchmark.save({"a": _result(1)}, path)
+
+    monkeypatch.setattr(benchmark, "machine", lambda: {"platform": "other"})
+    benchmark.save({"b": _result(2)}, path)
+
+    baseline = benchmark.load(path)
+    assert baseline["machine"] == {"platform": "other"}
+    assert baseline["results"] == {"b": _result(2)}
+
+
+@pytest.mark.parametrize("p50, status", [(110, 0), (200, 1)])
+def test_run_exits_non_zero_on_regressions(tmp_path, monkeypatch, p50, status):
+    path = os.path.join(tmp_path, "baseline.json")
+
+    monkeypatch.setattr(benchmark, "run",
+            lambda suite: {f"{suite}/a": _result(100)})
+    assert benchmark.main(["baseline", "game"], path) == 0
+
+    monkeypatch.setattr(benchmark, "run",
+            lambda suite: {f"{suite}/a": _result(p50)})
+    assert benchmark.main(["run", "game"], path) == status
+
+
+def test_run_without_a_baseline_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "run", lambda suite: pytest.fail(
+            "benchmarks ran without a baseline"))
+    assert benchmark.main(["run"], os.path.join(tmp_path, "none.json")) == 1
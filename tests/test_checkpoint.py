@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from learning import checkpoint
+from learning.checkpoint import Checkpointer
+from learning.experience_buffer import ExperienceBuffer
+from learning.prioritized_buffer import PrioritizedExperienceBuffer
+
+
+class Stop(Exception):
+    pass
+
+
+class StoppingCheckpointer(Checkpointer):
+    """ Stops training as a killed job would, once the checkpoint after the
+    given episode is on disk """
+
+    def __init__(self, path: str, interval: int, stop: int):
+        super().__init__(path, interval)
+        self.stop = stop
+
+    def save(self, arrays: dict):
+        super().save(arrays)
+        if int(arrays["episode"]) == self.stop:
+            self.wait()
+            raise Stop()
+
+
+def _record(buffer: ExperienceBuffer, random, count: int):
+    state = random.random(4)
+    for _ in range(count):
+        new_state = random.random(4)
+        buffer.record(state, random.random(2), random.random(), new_state)
+        state = new_state
+
+
+def _samples(buffer: ExperienceBuffer, seed: int) -> list:
+    batch = buffer.sample(16, random=np.random.RandomState(seed))
+    return [np.asarray(values) for values in batch]
+
+
+@pytest.mark.parametrize("buffer", [ExperienceBuffer, PrioritizedExperienceBuffer])
+def test_buffer_restores_from_checkpoint(buffer):
+    random = np.random.default_rng(0)
+
+    original = buffer(2, 4, capacity=50)
+    _record(original, random, 80)
+    arrays = original.checkpoint()
+
+    restored = buffer(2, 4, capacity=50)
+    restored.restore(arrays)
+
+    for key, array in restored.checkpoint().items():
+        np.testing.assert_array_equal(array, arrays[key])
+
+    # Carrying on from either records and samples the same transitions
+    for copy in (original, restored):
+        _record(copy, np.random.default_rng(1), 30)
+
+    for values, expected in zip(_samples(restored, 2), _samples(original, 2)):
+        np.testing.assert_array_equal(values, expected)
+
+
+def test_write_replaces_checkpoint_whole(tmp_path):
+    path = str(tmp_path / "nested" / "checkpoint.npz")
+    assert checkpoint.read(path) is None
+
+    for value in range(2):
+        checkpoint.write(path, {"value": np.array(value), "zeros": np.zeros(3)})
+
+    arrays = checkpoint.read(path)
+    assert int(arrays["value"]) == 1
+    np.testing.assert_array_equal(arrays["zeros"], np.zeros(3))
+    assert [file.name for file in (tmp_path / "nested").iterdir()] == [
+            "checkpoint.npz"]
+
+
+def test_random_state_round_trip():
+    np.random.seed(3)
+    np.random.normal()
+    arrays = checkpoint.random_state()
+    expected = np.random.random(5), np.random.normal()
+
+    np.random.seed(4)
+    checkpoint.restore_random_state(arrays)
+    assert np.array_equal(np.random.random(5), expected[0])
+    assert np.random.normal() == expected[1]
+
+
+def test_checkpointer_raises_write_errors(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+
+    checkpointer = Checkpointer(str(blocker / "checkpoint.npz"))
+    checkpointer.save({"value": np.array(1)})
+    with pytest.raises(OSError):
+        checkpointer.wait()
+
+    checkpointer = Checkpointer(str(tmp_path / "checkpoint.npz"))
+    checkpointer.save({"value": np.array(1)})
+    assert int(checkpointer.load()["value"]) == 1
+
+    checkpointer.clear()
+    assert checkpointer.load() is None
+
+
+def _run(checkpointer: Checkpointer, initial: dict, epochs: int = 12):
+    """ Trains a fresh peasant, from the same weights and seed, as a new job
+    would """
+
+    import train
+    from game.actors.random_peasant import RandomPeasant
+
+    training_peasant = _peasant()
+    training_peasant.restore(initial)
+
+    np.random.seed(5)
+    peasants = [RandomPeasant(10) for _ in range(4)]
+
+    statistics = train._train(training_peasant,
+            peasants,
+            epochs=epochs,
+            verbose=False,
+            checkpointer=checkpointer,
+            reward_scheme="combatant-uniform")
+
+    return statistics, training_peasant.checkpoint()
+
+
+def _peasant():
+    from game.actors.ddpg_peasant import DDPGPeasant
+    return DDPGPeasant(10, batch_size=8, fused=False)
+
+
+def test_training_resumes_exactly(tmp_path):
+    initial = _peasant().checkpoint()
+    expected, arrays = _run(Checkpointer(str(tmp_path / "whole.npz"), 3),
+            initial)
+
+    path = str(tmp_path / "stopped.npz")
+    with pytest.raises(Stop):
+        _run(StoppingCheckpointer(path, 3, stop=5), initial)
+
+    statistics, resumed = _run(Checkpointer(path, 3), initial)
+
+    assert statistics.equals(expected)
+    assert resumed.keys() == arrays.keys()
+    for key, array in resumed.items():
+        np.testing.assert_array_equal(array, arrays[key])
@@ -0,0 +1,102 @@
+import numpy as np
+
+from game.cohort import Cohort
+from game.actors.peasant import Peasant
+
+
+def _values(peasant: Peasant) -> tuple:
+    return peasant.stamina, peasant.health, peasant.attack, peasant.defence
+
+
+def _cohort(count: int) -> tuple:
+    peasants = [Peasant(index, index + 0.1, index + 0.2, index + 0.3)
+            for index in range(count)]
+    return peasants, Cohort(peasants, random=np.random.RandomState(0))
+
+
+def _gathered(cohort: Cohort) -> list:
+    size = len(cohort.peasants)
+    store = cohort.gather()
+    return list(zip(*(array[:size].tolist() for array in store.arrays())))
+
+
+def test_peasant_keeps_the_values_it_was_given():
+    assert _values(Peasant(1, 2, 3, 4)) == (1, 2, 3, 4)
+
+
+def test_survivors_keep_their_values_after_compaction():
+    peasants, cohort = _cohort(10)
+    expected = [_values(peasant) for peasant in peasants]
+
+    kept = [True, True, False, True, False, False, True, True, False, True]
+    cohort.compact(kept)
+
+    survivors = [peasant for peasant, keep in zip(peasants, kept) if keep]
+    assert cohort.peasants == survivors
+    for index, peasant in enumerate(survivors):
+        assert peasant.index == index
+        assert _values(peasant) == expected[peasants.index(peasant)]
+
+    # The arrays follow the peasants to their new places
+    assert _gathered(cohort) == [expected[peasants.index(peasant)]
+            for peasant in survivors]
+
+
+def test_dropped_peasants_keep_their_final_values():
+    peasants, cohort = _cohort(6)
+    peasants[1].health = -1.5
+    peasants[4].health = -2.5
+    expected = [_values(peasant) for peasant in peasants]
+
+    cohort.compact([True, False, True, True, False, True])
+
+    for index in (1, 4):
+        assert peasants[index] not in cohort.peasants
+        assert _values(peasants[index]) == expected[index]
+
+    # Later work on the cohort's arrays doesn't reach them
+    cohort.gather().health[:] = 100
+    cohort.scatter()
+    assert peasants[1].health == -1.5
+    assert peasants[4].health == -2.5
+    assert [peasant.health for peasant in cohort.peasants] == [100] * 4
+
+
+def test_compaction_without_losses_changes_nothing():
+    peasants, cohort = _cohort(4)
+    cohort.compact([True] * 4)
+
+    assert cohort.peasants == peasants
+    assert [peasant.index for peasant in peasants] == list(range(4))
+
+
+def test_scatter_writes_back_what_gather_read():
+    peasants, cohort = _cohort(5)
+    expected = [_values(peasant) for peasant in peasants]
+    assert _gathered(cohort) == expected
+
+    store = cohort.gather()
+    store.stamina[:5] += 1
+    store.defence[:5] *= 2
+    cohort.scatter()
+
+    for peasant, (stamina, health, attack, defence) in zip(peasants, expected):
+        assert _values(peasant) == (stamina + 1, health, attack, defence * 2)
+
+
+def test_rebinding_into_a_new_cohort_copies_values():
+    peasants, cohort = _cohort(5)
+    expected = [_values(peasant) for peasant in peasants]
+
+    reversed_peasants = peasants[::-1]
+    other = Cohort(reversed_peasants, random=np.random.RandomState(1))
+
+    for index, peasant in enumerate(reversed_peasants):
+        assert peasant.index == index
+        assert _values(peasant) == expected[peasants.index(peasant)]
+    assert _gathered(other) == expected[::-1]
+
+    # The old cohort's arrays are no longer read
+    cohort.store.stamina[:] = -1
+    assert [peasant.stamina for peasant in peasants] == [
+            values[0] for values in expected]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from game.actors.ddpg_peasant import DDPGPeasant
+from game.actors.policy_peasant import STATE_COUNT, ACTION_COUNT
+
+
+def _networks(peasant: DDPGPeasant) -> list:
+    return [peasant.actor, peasant.critic,
+            peasant.target_actor, peasant.target_critic]
+
+
+def _peasants() -> tuple:
+    """ A fused and an unfused peasant with identical weights, and a fixed
+    batch of transitions for both to train on """
+
+    fused = DDPGPeasant(10, memory_capacity=100, fused=True)
+    legacy = DDPGPeasant(10, memory_capacity=100, fused=False)
+    for source, target in zip(_networks(fused), _networks(legacy)):
+        target.model.set_weights(source.model.get_weights())
+
+    random = np.random.default_rng(0)
+    for _ in range(64):
+        fused.buffer.record(random.random(STATE_COUNT),
+                random.random(ACTION_COUNT),
+                random.random(),
+                random.random(STATE_COUNT))
+    batch = fused.buffer.gather(np.arange(0, 64, 2))
+    return fused, legacy, batch
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_fused_step_matches_update_then_rebalance(weighted):
+    import tensorflow as tf
+
+    fused, legacy, batch = _peasants()
+    weights = None
+    if weighted:
+        weights = tf.constant(np.linspace(0.5, 1.5, 32, dtype=np.float32)
+                .reshape(-1, 1))
+    starting = fused.target_actor.model.get_weights()
+
+    for _ in range(3):
+        fused_errors = fused.train_step(*batch, weights)
+
+        legacy_errors = legacy.update(*batch, weights)
+        legacy.update_target(legacy.target_actor, legacy.actor)
+        legacy.update_target(legacy.target_critic, legacy.critic)
+
+        np.testing.assert_allclose(fused_errors.numpy(),
+                legacy_errors.numpy(),
+                rtol=1e-5, atol=1e-6)
+
+    for fused_network, legacy_network in zip(_networks(fused),
+            _networks(legacy)):
+        for fused_array, legacy_array in zip(fused_network.model.get_weights(),
+                legacy_network.model.get_weights()):
+            np.testing.assert_allclose(fused_array, legacy_array,
+                    rtol=1e-5, atol=1e-6)
+
+    # The targets did move, so matching them means something
+    assert not all(np.array_equal(array, start) for array, start in zip(
+            fused.target_actor.model.get_weights(), starting))
@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+
+from game import game as game_module
+from game.game import Game
+from game.action import Action
+from game.options import REWARD_SCHEMES
+from game.actors.monster import Monster
+from game.actors.peasant import Peasant
+
+
+# Stamina, health, attack, defence; and each peasant's action, as attack,
+# defence. The first two fight, and the second of them can't survive its
+# share of the damage; the last two abstain
+STARTING = [(10, 5, 1, 1), (10, 2, 1.5, 0.5), (8, 4, 1, 2), (12, 3, 2, 1)]
+ACTIONS = [(2, 1), (1, 0), (0, 0), (0, 0)]
+
+
+@pytest.fixture(autouse=True, params=["peasants", "arrays"])
+def settle_path(request, monkeypatch):
+    """ Ends each turn both peasant by peasant and through the cohort's
+    arrays, whatever the cohort's size """
+
+    if request.param == "arrays":
+        monkeypatch.setattr(game_module, "ARRAY_MIN_SIZE", 0)
+    return request.param
+
+
+def _game(reward_scheme: str, actions: list = ACTIONS, monster_health=10):
+    peasants = [Peasant(*values) for values in STARTING]
+    game = Game(peasants,
+            reward_scheme=reward_scheme,
+            experience_factor=0.75,
+            random=np.random.default_rng(0))
+
+    game.round = 2
+    game.monster = Monster(monster_health, 6)
+    for peasant, (attack, defence) in zip(peasants, actions):
+        game.resolve(peasant, Action(attack, defence), 0)
+
+    return game, peasants
+
+
+def _granted(values: tuple, spent: float, experience: float) -> Peasant:
+    """ A lone peasant, after it's spent some stamina and been granted some
+    experience by the scalar rule """
+
+    peasant = Peasant(*values)
+    peasant.stamina -= spent
+    if experience:
+        peasant.grant_experience(experience)
+    return peasant
+
+
+def _shares(reward_scheme: str, experience: float, survivors: list) -> list:
+    """ Each starting peasant's share of the turn's experience """
+
+    if reward_scheme == "uniform":
+        return [experience / sum(survivors) if alive else 0
+                for alive in survivors]
+    if reward_scheme == "combatant-uniform":
+        return [experience / len(survivors)] * len(survivors)
+    return [1] * len(survivors)
+
+
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+def test_monster_survives(reward_scheme):
+    game, peasants = _game(reward_scheme)
+    finished, status = game.end_turn()
+
+    # Attack 3 and defence 1 against a monster of health 10, attack 6 and
+    # level 16; the two combatants share the 5 damage that gets through
+    experience = (3 / 10 + 1 / 6) * 16 * 0.75
+    assert not finished
+    assert game.monster.health == 7
+    assert status["damage-dealt"] == 3
+    assert status["damage-avoided"] == 1
+    assert status["damage-taken"] == 5
+    assert status["experience-gained"] == pytest.approx(experience)
+
+    assert [peasant.health for peasant in peasants] == [2.5, -0.5, 5, 4]
+
+    # The second peasant died in round 2
+    assert game.lifetime_count == 1
+    assert game.lifetime_total == 2
+    assert status["lifetime-mean"] == 2
+    assert game.cohort.peasants == [peasants[0], peasants[2], peasants[3]]
+
+    shares = _shares(reward_scheme, experience, [True, False, True, True])
+    spent = [sum(action) for action in ACTIONS]
+    for peasant, values, cost, share in zip(peasants, STARTING, spent, shares):
+        expected = _granted(values, cost, share)
+        assert peasant.stamina == pytest.approx(expected.stamina)
+        assert peasant.attack == pytest.approx(expected.attack)
+        assert peasant.defence == pytest.approx(expected.defence)
+
+    assert status["cohort-size"] == 4
+    assert status["combatants"] == 2
+    assert status["abstainers"] == 2
+    assert status["health-mean"] == pytest.approx((2.5 + 5 + 4) / 3)
+
+
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+def test_monster_killed(reward_scheme):
+    game, peasants = _game(reward_scheme, monster_health=2)
+    _, status = game.end_turn()
+
+    # Only the monster's remaining health counts as damage dealt, and
+    # nobody is hurt; abstainers still recover
+    experience = (2 / 2) * 8 * 0.75
+    assert status["damage-dealt"] == 2
+    assert status["damage-avoided"] == 0
+    assert status["damage-taken"] == 0
+    assert status["experience-gained"] == pytest.approx(experience)
+
+    assert [peasant.health for peasant in peasants] == [5, 2, 5, 4]
+    assert game.lifetime_count == 0
+    assert len(game.cohort.peasants) == 4
+
+    # A new monster, for the next round
+    assert game.round == 3
+    assert game.monster.health == game.monster.base_health
+
+    shares = _shares(reward_scheme, experience, [True] * 4)
+    spent = [sum(action) for action in ACTIONS]
+    for peasant, values, cost, share in zip(peasants, STARTING, spent, shares):
+        expected = _granted(values, cost, share)
+        assert peasant.stamina == pytest.approx(expected.stamina)
+        assert peasant.attack == pytest.approx(expected.attack)
+        assert peasant.defence == pytest.approx(expected.defence)
+
+
+def test_everyone_fights_if_nobody_does():
+    game, peasants = _game("uniform", actions=[(0, 0)] * 4)
+    _, status = game.end_turn()
+
+    # The monster's full attack of 6 is split four ways; the second and
+    # fourth peasants don't survive it
+    assert status["combatants"] == 4
+    assert status["abstainers"] == 0
+    assert [peasant.health for peasant in peasants] == [3.5, 0.5, 2.5, 1.5]
+    assert game.lifetime_count == 0
+
+    game, peasants = _game("uniform", actions=[(0, 0)] * 4, monster_health=30)
+    game.monster.attack = 16
+    game.end_turn()
+
+    assert [peasant.health for peasant in peasants] == [1, -2, 0, -1]
+    assert game.lifetime_count == 3
+    assert game.lifetime_total == 6
+    assert game.cohort.peasants == [peasants[0]]
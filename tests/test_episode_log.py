@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from game.game import Game
+from game.options import REWARD_SCHEMES
+from game.episode_log import EpisodeLog, Replayer
+from game.episode_log import RECORD, HEADER, MAGIC, VERSION
+from game.actors.random_peasant import RandomPeasant
+
+
+def _record(path: str, seed: int, **arguments) -> tuple:
+    """ Plays a logged game, returning its statistics and the peasants'
+    attributes at the start of every turn """
+
+    random = np.random.default_rng(seed)
+    peasants = [RandomPeasant(10, random=random) for _ in range(8)]
+
+    turns = {}
+    with EpisodeLog(path) as log:
+        game = Game(peasants, random=random, log=log, **arguments)
+
+        finished = False
+        while not finished:
+            if game.cohort.cursor == 0:
+                turns[game.turn] = _attributes(game.state().cohort.peasants)
+            finished, _ = game.step()
+
+    return game.recorder.dataframe(), turns
+
+
+def _attributes(peasants: list) -> np.ndarray:
+    return np.array(sorted((peasant.stamina, peasant.health, peasant.attack,
+            peasant.defence) for peasant in peasants))
+
+
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+def test_replay_reproduces_statistics(tmp_path, reward_scheme):
+    path = str(tmp_path / "game.log")
+    for seed in range(5):
+        expected, _ = _record(path, seed, reward_scheme=reward_scheme)
+        assert Replayer(path).run().equals(expected)
+
+
+def test_replay_restores_configuration(tmp_path):
+    path = str(tmp_path / "game.log")
+    arguments = {
+        "reward_scheme": "socially-conscious",
+        "experience_factor": 0.75,
+        "round_limit": 30,
+        "monster_base_level": 12.0,
+        "monster_level_factor": 1.1,
+        "reward_weights": [1, 0.5, 2, 1, 0, 1, 3],
+    }
+
+    expected, _ = _record(path, 0, **arguments)
+
+    replayer = Replayer(path)
+    assert replayer.configuration() == arguments
+    assert replayer.run().equals(expected)
+
+
+def test_replay_rebuilds_every_turn(tmp_path):
+    path = str(tmp_path / "game.log")
+    _, turns = _record(path, 1)
+
+    replayer = Replayer(path)
+    for turn, attributes in turns.items():
+        state = replayer.state(turn)
+        assert state.turn == turn
+        np.testing.assert_array_equal(_attributes(state.cohort.peasants), attributes)
+
+
+def test_replayer_rejects_other_files(tmp_path):
+    path = tmp_path / "other.log"
+
+    for payload in (b"", b"not a log", RECORD.pack(HEADER, 0, VERSION, 0, 0, 0)):
+        path.write_bytes(payload)
+        with pytest.raises(ValueError, match="not an episode log"):
+            Replayer(str(path))
+
+
+def test_replayer_rejects_other_versions(tmp_path):
+    path = tmp_path / "old.log"
+    path.write_bytes(RECORD.pack(HEADER, MAGIC, VERSION - 1, 0, 0, 0))
+
+    with pytest.raises(ValueError, match="unsupported episode log version: 1"):
+        Replayer(str(path))
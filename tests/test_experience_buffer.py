@@ -0,0 +1,123 @@
+import numpy as np
+
+from learning import experience_buffer
+from learning.experience_buffer import ExperienceBuffer, CHUNK_SIZE, LOOKBACK
+
+
+def _chain(random, count: int, state_count: int = 4) -> list:
+    """ Transitions as an episode makes them, each one's new state the
+    next one's state """
+
+    states = random.random((count + 1, state_count))
+    return [(states[index], random.random(2), random.integers(-3, 3),
+            states[index + 1]) for index in range(count)]
+
+
+def _record(buffer: ExperienceBuffer, transitions: list):
+    for transition in transitions:
+        buffer.record(*transition)
+
+
+def _assert_holds(buffer: ExperienceBuffer, transitions: list):
+    """ Checks the buffer holds the latest of transitions, in their slots """
+
+    count = min(buffer.pointer, buffer.capacity)
+    slots = np.arange(count)
+    states, actions, rewards, new_states = buffer.transitions(slots)
+
+    latest = transitions[-count:]
+    start = len(transitions) - count
+    for slot in range(count):
+        state, action, reward, new_state = latest[(slot - start) % count]
+        np.testing.assert_array_equal(states[slot], state.astype(np.float32))
+        np.testing.assert_array_equal(actions[slot], action.astype(np.float32))
+        assert rewards[slot, 0] == reward
+        np.testing.assert_array_equal(new_states[slot],
+                new_state.astype(np.float32))
+
+
+def test_storage_grows_across_a_chunk():
+    random = np.random.default_rng(0)
+    buffer = ExperienceBuffer(2, 4, capacity=3 * CHUNK_SIZE)
+    assert buffer.memory() == 0
+
+    transitions = _chain(random, CHUNK_SIZE)
+    _record(buffer, transitions)
+    assert len(buffer.action_memory) == CHUNK_SIZE
+    assert buffer.action_memory.dtype == np.float32
+
+    # One past the first chunk doubles it, keeping what was there
+    transitions += _chain(random, 1)
+    _record(buffer, transitions[-1:])
+    assert len(buffer.action_memory) == 2 * CHUNK_SIZE
+    assert len(buffer.state_index) == 2 * CHUNK_SIZE
+    _assert_holds(buffer, transitions)
+
+    # Growth stops at the capacity
+    transitions += _chain(random, 2 * CHUNK_SIZE)
+    _record(buffer, transitions[-2 * CHUNK_SIZE:])
+    assert len(buffer.action_memory) == 3 * CHUNK_SIZE
+    _assert_holds(buffer, transitions)
+
+
+def test_transitions_wrap_at_capacity():
+    random = np.random.default_rng(1)
+    buffer = ExperienceBuffer(2, 4, capacity=50)
+
+    transitions = _chain(random, 130)
+    _record(buffer, transitions)
+
+    assert buffer.pointer == 130
+    assert len(buffer.action_memory) == 50
+    assert len(buffer.observation_memory) <= buffer.observation_capacity
+    _assert_holds(buffer, transitions)
+
+
+def test_chained_transitions_share_observations():
+    random = np.random.default_rng(2)
+    buffer = ExperienceBuffer(2, 4, capacity=50)
+    _record(buffer, _chain(random, 40))
+
+    # The first transition stores two observations, the rest one each
+    assert buffer.observation_pointer == 41
+    np.testing.assert_array_equal(buffer.new_state_index[:39],
+            buffer.state_index[1:40])
+
+
+def test_new_states_survive_the_ring_wrapping():
+    random = np.random.default_rng(3)
+    capacity = 20
+    buffer = ExperienceBuffer(2, 4, capacity=capacity)
+    assert buffer.observation_capacity == 2 * capacity + LOOKBACK
+
+    # Unchained transitions store two observations each, so the ring wraps
+    # several times over, as do chained ones between them
+    transitions = []
+    for _ in range(30):
+        transitions += _chain(random, 7)
+        transitions += _chain(random, 1)
+        transitions += [(random.random(4), random.random(2), 0, random.random(4))
+                for _ in range(5)]
+    _record(buffer, transitions)
+    assert buffer.observation_pointer > 3 * buffer.observation_capacity
+
+    _assert_holds(buffer, transitions)
+
+    # Where consecutive stored transitions chained, a sampled new state is
+    # still the next transition's state
+    count = buffer.capacity
+    start = buffer.pointer % count
+    slots = (start + np.arange(count)) % count
+    states, _, _, new_states = buffer.transitions(slots)
+    latest = transitions[-count:]
+    chained = 0
+    for position in range(count - 1):
+        if np.array_equal(latest[position][3], latest[position + 1][0]):
+            np.testing.assert_array_equal(new_states[position],
+                    states[position + 1])
+            chained += 1
+    assert chained
+
+
+def test_buffer_imports_without_tensorflow():
+    assert not hasattr(experience_buffer, "tf")
@@ -0,0 +1,30 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+SOURCE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+        "..", "source")
+
+# Modules the core game package shouldn't need just to be imported, so pool
+# workers and actor processes start quickly
+HEAVY_MODULES = ("pandas", "yaml", "tensorflow")
+
+
+@pytest.mark.parametrize("module", ["game", "game.game"])
+def test_game_imports_without_heavy_modules(module, tmp_path):
+    # A fresh interpreter, outside source/, so nothing this test process
+    # already imported counts, and source/profile.py doesn't shadow the
+    # standard library's
+    script = (f"import sys; sys.path.append({SOURCE_DIRECTORY!r}); "
+            f"import {module}; "
+            f"print(' '.join(name for name in {HEAVY_MODULES!r} "
+            f"if name in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", script],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+            check=True)
+
+    assert output.stdout.split() == []
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from game import instrumentation
+from game.game import Game
+from game.random_source import RandomSource
+from game.actors.random_peasant import RandomPeasant
+
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+    """ Leaves the module's state as it was, whatever a test does to it """
+
+    monkeypatch.setattr(instrumentation, "enabled", False)
+    monkeypatch.setattr(instrumentation, "totals", {})
+    monkeypatch.setattr(instrumentation, "listeners", [])
+
+
+def _clock(monkeypatch, readings: list):
+    monkeypatch.setattr(instrumentation, "clock", iter(readings).__next__)
+
+
+def test_record_totals_each_phase(monkeypatch):
+    _clock(monkeypatch, [1.5, 4.0, 5.0])
+
+    assert instrumentation.record("a", 1.0) == 1.5
+    assert instrumentation.record("b", 1.5) == 4.0
+    assert instrumentation.record("a", 4.5) == 5.0
+
+    assert instrumentation.totals == {"a": [1.0, 2], "b": [2.5, 1]}
+    assert instrumentation.summary() == [("a", 1.0, 2, 0.5),
+            ("b", 2.5, 1, 2.5)]
+
+    instrumentation.reset()
+    assert instrumentation.summary() == []
+
+
+def test_listeners_hear_each_phase(monkeypatch):
+    _clock(monkeypatch, [2.0, 3.0, 7.0])
+    heard = []
+
+    instrumentation.subscribe(lambda *phase: heard.append(phase))
+    instrumentation.record("a", 1.0)
+    instrumentation.record("b", 2.0)
+    assert heard == [("a", 1.0), ("b", 1.0)]
+
+    instrumentation.unsubscribe(instrumentation.listeners[0])
+    instrumentation.record("a", 6.0)
+    assert len(heard) == 2
+    assert instrumentation.totals["a"] == [2.0, 2]
+
+
+def test_table_lists_phases_in_milliseconds(monkeypatch):
+    _clock(monkeypatch, [0.25, 0.5])
+    instrumentation.record("end-turn", 0.0)
+    instrumentation.record("end-turn", 0.25)
+
+    header, row = instrumentation.table().splitlines()
+    assert header.split() == ["phase", "total", "ms", "calls", "mean", "ms"]
+    assert row.split() == ["end-turn", "500.0", "2", "250.0000"]
+
+
+def _play(vectorize: bool) -> pd.DataFrame:
+    generator = np.random.default_rng(3)
+    peasants = [RandomPeasant(10, random=RandomSource(generator, 64))
+            for _ in range(20)]
+    game = Game(peasants,
+            random=RandomSource(np.random.default_rng(4)),
+            vectorize=vectorize)
+    return game.run()
+
+
+@pytest.mark.parametrize("vectorize", [False, True])
+def test_timing_leaves_games_unchanged(vectorize):
+    plain = _play(vectorize)
+    assert instrumentation.totals == {}
+
+    instrumentation.enable()
+    timed = _play(vectorize)
+    instrumentation.disable()
+
+    pd.testing.assert_frame_equal(plain, timed)
+
+    # Each phase was timed as the game played it
+    phases = set(instrumentation.totals)
+    assert "end-turn" in phases
+    if vectorize:
+        assert "play-turn" in phases
+    else:
+        assert {"step", "step/action", "step/reward", "step/resolve"} <= phases
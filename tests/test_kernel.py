@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from game import kernel
+from game.game import Game
+from game.options import TELEMETRY_LEVELS, REWARD_SCHEMES
+from game.episode_log import EpisodeLog
+from game.actors.random_peasant import RandomPeasant
+
+pytest.importorskip("numba")
+
+
+def _game(seed, backend: str = "kernel", peasant_count: int = 12, **arguments):
+    random = np.random.default_rng(seed)
+    peasants = [RandomPeasant(10, random=random) for _ in range(peasant_count)]
+    return Game(peasants, random=random, backend=backend, **arguments)
+
+
+@pytest.mark.parametrize("telemetry", TELEMETRY_LEVELS)
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+def test_compiled_kernel_matches_interpreted(reward_scheme, telemetry,
+        monkeypatch):
+
+    kernel.compile_kernel()
+    compiled = [_game(seed, reward_scheme=reward_scheme,
+            telemetry=telemetry).run() for seed in range(3)]
+
+    monkeypatch.setattr(kernel, "run_turns", kernel.run_turns.py_func)
+    monkeypatch.setattr(kernel, "grant_experience",
+            kernel.grant_experience.py_func)
+
+    for seed, expected in enumerate(compiled):
+        result = _game(seed, reward_scheme=reward_scheme,
+                telemetry=telemetry).run()
+        assert result.equals(expected)
+
+
+@pytest.mark.parametrize("backend", ["python", "kernel"])
+def test_kernel_leaves_game_as_engine_does(backend):
+    for seed in range(10):
+        game = _game(seed, backend=backend)
+        last = game.run().iloc[-1]
+
+        assert game.round == last["round"]
+        assert game.turn == last["turn"]
+        assert game.lifetime_count == 12
+        assert len(game.combatants) == last["combatants"]
+        assert len(game.abstainers) == last["abstainers"]
+        assert len(game.cohort.peasants) <= last["cohort-size"]
+
+
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+def test_kernel_matches_engine_in_distribution(reward_scheme):
+    game_count = 1000
+
+    results = {}
+    for backend in ("python", "kernel"):
+        rows = [_game([seed, 1], backend=backend, peasant_count=10,
+                reward_scheme=reward_scheme, telemetry="final").run().iloc[-1]
+                for seed in range(game_count)]
+        results[backend] = rows
+
+    for column in ("turn", "lifetime-mean"):
+        engine = np.array([row[column] for row in results["python"]])
+        compiled = np.array([row[column] for row in results["kernel"]])
+
+        error = np.sqrt(engine.var() / game_count + compiled.var() / game_count)
+        assert abs(engine.mean() - compiled.mean()) < 4 * error
+
+
+def test_kernel_skips_logged_and_custom_games(tmp_path):
+    with EpisodeLog(str(tmp_path / "game.log")) as log:
+        assert not kernel.supports(_game(0, log=log))
+
+    class CustomPeasant(RandomPeasant):
+        pass
+
+    peasants = [RandomPeasant(10), CustomPeasant(10)]
+    assert not kernel.supports(Game(peasants, backend="kernel"))
+    assert kernel.supports(_game(0))
+
+    class CustomGame(Game):
+        pass
+
+    assert not kernel.supports(CustomGame([RandomPeasant(10)], backend="kernel"))
+
+
+def test_kernel_skips_peasants_with_their_own_sources():
+    random = np.random.default_rng(0)
+    peasants = [RandomPeasant(10, random=random),
+            RandomPeasant(10, random=np.random.default_rng(1))]
+    assert not kernel.supports(Game(peasants, random=random, backend="kernel"))
+
+    # The engine plays them instead, with or without numba
+    def play(backend: str):
+        random = np.random.default_rng(0)
+        peasants = [RandomPeasant(10, random=np.random.default_rng(index))
+                for index in range(1, 9)]
+        return Game(peasants, random=random, backend=backend).run()
+
+    assert play("kernel").equals(play("python"))
+
+
+def test_kernel_leaves_no_rewards():
+    game = _game(0)
+    game.run()
+    assert game.rewards == {}
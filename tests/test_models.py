@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from learning import models
+
+
+def _spread(model, seed: int) -> list:
+    random = np.random.default_rng(seed)
+    weights = [random.normal(0, 1, array.shape).astype(np.float32)
+            for array in model.get_weights()]
+    model.set_weights(weights)
+    return weights
+
+
+def _assert_weights(model, expected: list):
+    for array, values in zip(model.get_weights(), expected):
+        np.testing.assert_array_equal(array, values)
+
+
+def test_clones_do_not_share_weights():
+    first = models.actor(9, 2)
+    second = models.actor(9, 2)
+    assert first.model is not second.model
+
+    expected = second.model.get_weights()
+    _spread(first.model, 0)
+    _assert_weights(second.model, expected)
+
+    prototype = models.prototypes[(models.Actor, 9, 2)]
+    assert all(not np.array_equal(array, values) for array, values in
+            zip(prototype.get_weights(), first.model.get_weights()))
+
+
+def test_weight_cache_follows_the_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "actor.weights.h5")
+    source = models.actor(9, 2).model
+    original = _spread(source, 1)
+    source.save_weights(path)
+
+    reads = []
+    load_weights = type(source).load_weights
+
+    def counting_load_weights(model, path, *arguments, **keywords):
+        reads.append(path)
+        return load_weights(model, path, *arguments, **keywords)
+
+    monkeypatch.setattr(type(source), "load_weights", counting_load_weights)
+
+    # Read once, then copied from memory while the file is unchanged
+    for _ in range(3):
+        model = models.actor(9, 2).model
+        models.load_weights(model, path)
+        _assert_weights(model, original)
+    assert reads == [path]
+
+    # Rewriting the file, even at the same size, reads it again
+    stamp = os.stat(path).st_mtime_ns
+    rewritten = _spread(source, 2)
+    source.save_weights(path)
+    os.utime(path, ns=(stamp + 10 ** 9, stamp + 10 ** 9))
+
+    model = models.actor(9, 2).model
+    models.load_weights(model, path)
+    _assert_weights(model, rewritten)
+    assert reads == [path, path]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from learning.policy import Policy
+
+
+def _weights(random, shape: tuple = (9, 48, 24, 2)) -> list:
+    weights = []
+    for inputs, outputs in zip(shape[:-1], shape[1:]):
+        weights.append(random.normal(0, 0.5, (inputs, outputs)))
+        weights.append(random.normal(0, 0.5, outputs))
+    return weights
+
+
+def test_policy_round_trips_through_a_file(tmp_path):
+    random = np.random.default_rng(0)
+    policy = Policy(_weights(random))
+    path = str(tmp_path / "policy.npz")
+    policy.save(path)
+
+    loaded = Policy.load(path)
+    assert loaded.activations == policy.activations
+    states = random.random((16, 9))
+    np.testing.assert_array_equal(loaded(states), policy(states))
+
+
+def test_policy_rejects_unknown_activations():
+    with pytest.raises(ValueError):
+        Policy(_weights(np.random.default_rng(0)), ("relu", "relu", "softmax"))
+
+
+def test_policy_matches_keras_actor():
+    pytest.importorskip("tensorflow")
+    from learning.actor import Actor
+
+    random = np.random.default_rng(1)
+    actor = Actor(9, 2)
+
+    # The output layer starts out nearly zero; spread the weights so the
+    # comparison covers every layer
+    actor.model.set_weights([weights.astype(np.float32)
+            for weights in _weights(random)])
+    policy = Policy.from_model(actor.model)
+    assert policy.activations == ["relu", "relu", "tanh"]
+
+    states = random.normal(0, 2, (256, 9)).astype(np.float32)
+    expected = actor.model(states).numpy()
+    np.testing.assert_allclose(policy(states), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(policy(states[0]), expected[0],
+            rtol=1e-5, atol=1e-6)
@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pytest
+
+from learning.prefetch_sampler import PrefetchSampler
+
+
+class FailingBuffer:
+    """ Gives a few batches, then fails to sample """
+
+    def __init__(self, batches: int):
+        self.pointer = 1
+        self.batches = batches
+
+    def sample(self, batch_size: int, random) -> tuple:
+        if not self.batches:
+            raise RuntimeError("sampling failed")
+        self.batches -= 1
+        return (random.random(batch_size), )
+
+
+def test_prefetched_batches_match_direct_sampling():
+    pytest.importorskip("tensorflow")
+    from learning.experience_buffer import ExperienceBuffer
+
+    random = np.random.default_rng(0)
+    buffer = ExperienceBuffer(2, 4, capacity=100)
+    for _ in range(60):
+        buffer.record(random.random(4), random.random(2), 1, random.random(4))
+
+    sampler = PrefetchSampler(buffer, 16, depth=3,
+            random=np.random.default_rng(1))
+    direct = np.random.default_rng(1)
+    try:
+        for _ in range(10):
+            batch = sampler.sample()
+            expected = buffer.sample(16, direct)
+            for values, expected_values in zip(batch, expected):
+                np.testing.assert_array_equal(values.numpy(),
+                        expected_values.numpy())
+    finally:
+        sampler.close()
+
+
+def test_sampling_errors_reach_the_learner():
+    sampler = PrefetchSampler(FailingBuffer(2), 4,
+            random=np.random.default_rng(0))
+
+    assert len(sampler.sample()[0]) == 4
+    assert len(sampler.sample()[0]) == 4
+    with pytest.raises(RuntimeError, match="sampling failed"):
+        sampler.sample()
+
+    sampler.thread.join(timeout=5)
+    assert not sampler.thread.is_alive()
+    sampler.close()
+
+
+def test_closing_with_a_full_queue_and_an_error():
+    sampler = PrefetchSampler(FailingBuffer(2), 4, depth=2,
+            random=np.random.default_rng(0))
+
+    # The queue fills with good batches, leaving the error with nowhere to go
+    deadline = time.monotonic() + 5
+    while not sampler.batches.full():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    sampler.closed = True
+    sampler.thread.join(timeout=5)
+    assert not sampler.thread.is_alive()
@@ -0,0 +1,17 @@
+import numpy as np
+
+from game.game import Game
+from game.actors.random_peasant import RandomPeasant
+
+
+def test_actions_are_not_reused():
+    np.random.seed(0)
+    peasant = RandomPeasant(10)
+    state = Game([peasant]).state()
+
+    actions = [peasant.action(state) for _ in range(20)]
+    kept = [(action.attack, action.defence) for action in actions]
+
+    assert len({id(action) for action in actions}) == len(actions)
+    assert kept == [(action.attack, action.defence) for action in actions]
+    assert len(set(kept)) > 1
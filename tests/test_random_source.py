@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from game.game import Game
+from game.random_source import RandomSource
+from game.actors.random_peasant import RandomPeasant
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 256])
+def test_draws_follow_the_generator_stream(block_size):
+    source = RandomSource(np.random.default_rng(3), block_size)
+
+    values = []
+    for count in [1, 5, 1, 1, 300, 2, 1, 40, 1]:
+        if count == 1:
+            values.append(source.uniform())
+        else:
+            values.extend(source.uniform(size=count))
+    values.extend(source.uniform(size=(3, 4)).ravel())
+
+    expected = np.random.default_rng(3).random(len(values))
+    np.testing.assert_array_equal(values, expected)
+
+
+def test_scaled_draws():
+    source = RandomSource(np.random.default_rng(4), 16)
+    expected = np.random.default_rng(4).random(21)
+
+    assert source.uniform(2, 5) == pytest.approx(2 + 3 * expected[0])
+    np.testing.assert_allclose(source.uniform(-1, 1, size=(4, 5)),
+            -1 + 2 * expected[1:].reshape(4, 5))
+
+
+def _game(seed: int):
+    sources = [RandomSource(np.random.default_rng(child), 32)
+            for child in np.random.SeedSequence(seed).spawn(9)]
+    peasants = [RandomPeasant(10, random=source) for source in sources[1:]]
+    return Game(peasants, random=sources[0]).run()
+
+
+def test_buffered_games_are_reproducible():
+    assert _game(11).equals(_game(11))
+    assert not _game(11).equals(_game(12))
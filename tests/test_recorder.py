@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from game.game import Game, COLUMNS
+from game.recorder import Recorder
+from game.options import TELEMETRY_LEVELS
+from game.actors.random_peasant import RandomPeasant
+
+
+def test_recorder_keeps_rows_across_growth():
+    recorder = Recorder([("turn", int), ("mean", float)], capacity=2)
+
+    recorder.append(0, 0.5)
+    recorder.record({"mean": 1.5, "turn": 1})
+    recorder.extend(np.array([[turn, turn + 0.5] for turn in range(2, 7)]))
+    recorder.append(7, 7.5)
+
+    assert len(recorder) == 8
+    assert recorder.capacity == 8
+
+    array = recorder.array()
+    np.testing.assert_array_equal(array["turn"], np.arange(8))
+    np.testing.assert_array_equal(array["mean"], np.arange(8) + 0.5)
+
+    frame = recorder.dataframe()
+    assert list(frame.columns) == ["turn", "mean"]
+    assert frame["turn"].dtype == int
+    assert frame["mean"].dtype == float
+
+
+def test_recorder_rebuilds_dataframe_after_recording():
+    recorder = Recorder([("turn", int)])
+    recorder.append(0)
+
+    frame = recorder.dataframe()
+    assert recorder.dataframe() is frame
+
+    recorder.append(1)
+    assert recorder.dataframe()["turn"].tolist() == [0, 1]
+    assert frame["turn"].tolist() == [0]
+
+
+def _play(telemetry: str):
+    np.random.seed(2)
+    peasants = [RandomPeasant(10) for _ in range(8)]
+    return Game(peasants, telemetry=telemetry).run()
+
+
+def test_game_records_every_column():
+    results = _play("turn")
+
+    assert list(results.columns) == [name for name, _ in COLUMNS]
+    for name, dtype in COLUMNS:
+        assert results[name].dtype == dtype
+    assert results["turn"].tolist() == list(range(len(results)))
+
+
+@pytest.mark.parametrize("telemetry", TELEMETRY_LEVELS)
+def test_telemetry_levels_record_subsets_of_turns(telemetry):
+    turns = _play("turn")
+    results = _play(telemetry)
+
+    # A round's row is its last turn's; the game's last turn ends one too
+    rounds = turns["round"].to_numpy()
+    last = np.append(rounds[1:] != rounds[:-1], True)
+    expected = {
+        "none": turns.iloc[:0],
+        "final": turns.iloc[-1:],
+        "round": turns[last],
+        "turn": turns,
+    }[telemetry]
+
+    assert results.reset_index(drop=True).equals(
+            expected.reset_index(drop=True))
+
+
+def test_game_rejects_unknown_telemetry():
+    with pytest.raises(ValueError):
+        Game([RandomPeasant(10)], telemetry="everything")
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from game.game import Game
+from game.options import REWARD_SCHEMES
+from game.actors.random_peasant import RandomPeasant
+
+
+def reference_reward(game: Game, peasant, action) -> float:
+    """ Game.evaluate_reward as it was before the RewardEvaluator, one
+    criterion at a time """
+
+    monster = game.monster
+    group_attack = game.action.attack
+    group_defence = game.action.defence
+
+    potential_attack = min(peasant.stamina, peasant.attack)
+    potential_defence = min(peasant.stamina, peasant.defence)
+
+    killed_monster = (group_attack < monster.health
+            and group_attack + action.attack >= monster.health)
+    saved_group = (killed_monster
+            or (monster.attack > group_defence
+                and group_defence + action.defence >= monster.attack))
+
+    monster_killed = group_attack >= monster.health
+    group_saved = monster_killed or monster.attack <= group_defence
+
+    monster_killable = not monster_killed and (monster.health <=
+            group_attack + potential_attack)
+    group_saveable = not group_saved and (monster.attack <=
+            group_defence + potential_defence)
+
+    acted = action.attack or action.defence
+
+    group_size = len(game.cohort.peasants)
+    position = len(game.combatants) + len(game.abstainers)
+    completion_percentage = group_size / position if position else 0
+
+    health_low = monster.health * 0.5 >= peasant.health
+    stamina_low = monster.attack * 0.5 >= peasant.stamina
+
+    criteria = [
+        health_low or stamina_low,
+        killed_monster or saved_group,
+        acted and completion_percentage < 1 / group_size,
+        acted and (health_low or stamina_low),
+        (not monster_killed
+            and not group_saved
+            and (action.attack + action.defence) >= 0.5 * peasant.stamina),
+        -int((not monster_killed and monster_killable)
+            or (not group_saved and group_saveable)),
+        -int((action.attack and monster_killed)
+            or (action.defence and group_saved)),
+    ]
+    return sum(weight * criterion
+            for weight, criterion in zip(game.weights, criteria))
+
+
+class CheckingGame(Game):
+    """ Checks every reward the game evaluates against the reference, and
+    against the batched evaluation of the same action """
+
+    checked = 0
+
+    def evaluate_reward(self, peasant, action) -> float:
+        reward = super().evaluate_reward(peasant, action)
+        assert reward == pytest.approx(reference_reward(self, peasant, action))
+
+        # The same action for the whole cohort, judged against the group
+        attacks = np.full(len(self.cohort.peasants), action.attack)
+        defences = np.full(len(self.cohort.peasants), action.defence)
+        rewards = self.evaluate_rewards(attacks, defences)
+        assert rewards[peasant.index] == pytest.approx(reward)
+
+        # The action alone, judged against the group and position given
+        store = self.cohort.gather()
+        place = slice(peasant.index, peasant.index + 1)
+        position = len(self.combatants) + len(self.abstainers)
+        sequence = self.evaluator.evaluate_batch(store.stamina[place],
+                store.health[place],
+                store.attack[place],
+                store.defence[place],
+                np.array([action.attack]),
+                np.array([action.defence]),
+                group_attack=np.array([self.action.attack]),
+                group_defence=np.array([self.action.defence]),
+                position=np.array([position]))
+        assert sequence[0] == pytest.approx(reward)
+
+        CheckingGame.checked += 1
+        return reward
+
+
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+def test_rewards_match_reference(reward_scheme):
+    random = np.random.default_rng(1)
+    CheckingGame.checked = 0
+
+    for seed in range(10):
+        np.random.seed(seed)
+        weights = random.uniform(0, 2, 7).tolist()
+        peasants = [RandomPeasant(10) for _ in range(1 + seed)]
+
+        game = CheckingGame(peasants,
+                reward_scheme=reward_scheme,
+                reward_weights=weights)
+        game.run()
+
+    assert CheckingGame.checked > 100
+
+
+def test_rejects_wrong_weight_count():
+    with pytest.raises(AssertionError):
+        Game([RandomPeasant(10)], reward_weights=[1] * 6)
+
+
+def test_game_rejects_unknown_reward_scheme():
+    with pytest.raises(ValueError):
+        Game([RandomPeasant(10)], reward_scheme="combat-uniform")
@@ -0,0 +1,46 @@
+import numpy as np
+
+from game.runner import Runner, simulate
+
+
+def lifespan(results) -> float:
+    return results["lifetime-mean"].iloc[-1]
+
+
+CONFIGURATIONS = [
+    {"group_size": 4 + index % 5,
+        "experience_factor": 0.5 + index / 20,
+        "reward_scheme": "combatant-uniform"}
+    for index in range(12)
+]
+
+
+def test_results_are_independent_of_workers():
+    results = [Runner(workers, seed=7).run(CONFIGURATIONS)
+            for workers in (1, 2, 3)]
+
+    for other in results[1:]:
+        for result, expected in zip(other, results[0]):
+            assert result.equals(expected)
+
+
+def test_summaries_match_results():
+    runner = Runner(1, seed=7)
+
+    summaries = runner.run(CONFIGURATIONS, summarise=lifespan)
+    results = runner.run(CONFIGURATIONS)
+    assert summaries == [lifespan(result) for result in results]
+
+    assert Runner(2, seed=7).run(CONFIGURATIONS, summarise=lifespan) == summaries
+
+
+def test_games_depend_only_on_their_seed():
+    seed = np.random.SeedSequence(7).spawn(3)[2]
+    expected = simulate((CONFIGURATIONS[2], seed, None))
+
+    # Drawing from the global state in between changes nothing
+    np.random.random(100)
+    assert Runner(1, seed=7).run(CONFIGURATIONS[:3])[2].equals(expected)
+
+    other = Runner(1, seed=8).run(CONFIGURATIONS)
+    assert not all(result.equals(expected) for result in other)
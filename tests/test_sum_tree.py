@@ -0,0 +1,110 @@
+import numpy as np
+
+from learning.sum_tree import SumTree
+from learning.prioritized_buffer import PrioritizedExperienceBuffer
+
+
+def _assert_sums(tree: SumTree):
+    """ Checks every node holds the sum of its children """
+
+    nodes = np.arange(1, tree.size)
+    np.testing.assert_allclose(tree.tree[nodes],
+            tree.tree[2 * nodes] + tree.tree[2 * nodes + 1])
+
+
+def test_update_sets_the_total():
+    tree = SumTree(8, size=8)
+    priorities = np.array([1.0, 2.0, 0.5, 4.0, 3.0, 0.25, 1.5, 2.0])
+    tree.update(np.arange(8), priorities)
+    assert tree.total() == priorities.sum()
+    _assert_sums(tree)
+
+    # Repeated indices take their last priority
+    tree.update(np.array([2, 5, 2]), np.array([7.0, 1.0, 6.0]))
+    priorities[[2, 5]] = 6.0, 1.0
+    assert tree.total() == priorities.sum()
+    np.testing.assert_array_equal(tree.priorities(np.arange(8)), priorities)
+    _assert_sums(tree)
+
+    tree.set(7, 0.0)
+    assert tree.total() == priorities.sum() - 2.0
+    _assert_sums(tree)
+
+
+def test_find_picks_leaves_in_proportion():
+    tree = SumTree(4, size=4)
+    tree.update(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+
+    # Running totals end at 1, 3, 6 and 10; a value on a boundary belongs
+    # to the leaf it closes
+    values = [0.0, 0.5, 1.0, 1.5, 3.0, 3.5, 6.0, 6.5, 9.99]
+    np.testing.assert_array_equal(tree.find(values),
+            [0, 0, 0, 1, 1, 2, 2, 3, 3])
+
+    # Evenly spread values land on each leaf as often as its share
+    values = (np.arange(1000) + 0.5) * tree.total() / 1000
+    counts = np.bincount(tree.find(values), minlength=4)
+    np.testing.assert_array_equal(counts, [100, 200, 300, 400])
+
+
+def test_reserve_keeps_priorities():
+    tree = SumTree(100, size=4)
+    assert tree.size == 4
+
+    tree.update(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+    tree.set(10, 5.0)
+    assert tree.size == 16
+    assert tree.total() == 15.0
+    np.testing.assert_array_equal(tree.priorities([0, 1, 2, 3, 10]),
+            [1.0, 2.0, 3.0, 4.0, 5.0])
+    _assert_sums(tree)
+
+
+def _record(buffer: PrioritizedExperienceBuffer, random, count: int):
+    for _ in range(count):
+        buffer.record(random.random(4), random.random(2), 0, random.random(4))
+
+
+def test_writes_wrap_around_the_tree():
+    random = np.random.default_rng(0)
+    capacity = 10
+    buffer = PrioritizedExperienceBuffer(2, 4, capacity=capacity)
+    buffer.tree = SumTree(capacity, size=4)
+
+    _record(buffer, random, capacity)
+    assert buffer.tree.size == 16
+    buffer.update_priorities(np.arange(capacity), np.arange(capacity) + 1.0)
+
+    # Writes past the capacity wrap around to the oldest slots, taking the
+    # highest priority yet, without growing the tree further
+    _record(buffer, random, 3)
+    assert buffer.tree.size == 16
+
+    expected = (np.arange(capacity) + 1.0 + buffer.epsilon) ** buffer.alpha
+    expected[:3] = buffer.maximum
+    np.testing.assert_allclose(buffer.tree.priorities(np.arange(capacity)),
+            expected)
+    assert np.isclose(buffer.tree.total(), expected.sum())
+    _assert_sums(buffer.tree)
+
+
+def test_importance_sampling_weights():
+    random = np.random.default_rng(1)
+    buffer = PrioritizedExperienceBuffer(2, 4, capacity=20,
+            beta=0.5, beta_increment=0.1)
+    _record(buffer, random, 12)
+    buffer.update_priorities(np.arange(12), random.random(12) * 3)
+
+    beta = buffer.beta
+    indices, weights = buffer.draw(8, np.random.default_rng(2))
+
+    probabilities = buffer.tree.priorities(indices) / buffer.tree.total()
+    expected = (12 * probabilities) ** -beta
+    np.testing.assert_allclose(weights, expected / expected.max())
+    assert weights.max() == 1.0
+
+    # Each draw anneals beta towards 1
+    assert buffer.beta == beta + 0.1
+    for _ in range(10):
+        buffer.draw(8, np.random.default_rng(3))
+    assert buffer.beta == 1.0
@@ -0,0 +1,108 @@
+import numpy as np
+
+from game.actors.policy_peasant import PolicyPeasant, STATE_COUNT
+from game.actors.random_peasant import RandomPeasant
+from learning.vector_environment import Body, VectorEnvironment
+from learning.ornstein_uhlenbeck_noise import OrnsteinUhlenbeckNoise
+
+
+class StubLearner(PolicyPeasant):
+    """ Stands in for a DDPG peasant: acts on a fixed policy, and counts its
+    forward passes, recorded transitions and updates """
+
+    def __init__(self):
+        self.batches = []
+        self.transitions = 0
+        self.update_count = 0
+        self.train = True
+        super().__init__(10,
+                policy=self.act,
+                noise_generator=OrnsteinUhlenbeckNoise(deviation=0.1))
+
+    def act(self, state_vectors: np.ndarray) -> np.ndarray:
+        self.batches.append(state_vectors.shape)
+        return np.full((len(state_vectors), 2), 0.5)
+
+    def record(self, state, action, reward, new_state):
+        self.transitions += 1
+
+    def optimise(self):
+        self.update_count += 1
+
+
+def _environment(count: int = 4, **arguments) -> tuple:
+    np.random.seed(0)
+    learner = StubLearner()
+    environment = VectorEnvironment(learner,
+            lambda: [RandomPeasant(10) for _ in range(3)],
+            count=count,
+            round_limit=3,
+            **arguments)
+    return learner, environment
+
+
+def test_each_step_makes_one_decision_per_game(monkeypatch):
+    learner, environment = _environment()
+
+    decisions = []
+    decide = Body.decide
+
+    def counting_decide(body, *arguments):
+        decisions.append(body)
+        return decide(body, *arguments)
+
+    monkeypatch.setattr(Body, "decide", counting_decide)
+
+    for step in range(1, 11):
+        environment.step()
+        assert len(learner.batches) == step
+        assert learner.batches[-1] == (4, STATE_COUNT)
+
+        decided = decisions[-4:]
+        assert len(decisions) == 4 * step
+        assert [id(body) for body in decided] == [
+                id(body) for body in environment.bodies]
+
+
+def test_updates_default_to_one_per_game():
+    learner, environment = _environment(count=5)
+    for step in range(1, 4):
+        environment.step()
+        assert learner.update_count == 5 * step
+
+    learner, environment = _environment(count=5, updates=2)
+    environment.step()
+    assert learner.update_count == 2
+
+    learner, environment = _environment()
+    learner.train = False
+    environment.step()
+    assert learner.update_count == 0
+
+
+def test_finished_games_are_replaced():
+    learner, environment = _environment()
+
+    replaced = 0
+    for _ in range(100):
+        games = list(environment.games)
+        environment.step()
+        replaced += sum(game is not new_game
+                for game, new_game in zip(games, environment.games))
+    assert replaced > 0
+
+    # Every replacement kept its episode's statistics
+    assert len(environment.finished) == replaced
+    for reward, lifespan, average_lifespan in environment.finished:
+        assert np.isfinite(reward)
+        assert 0 <= lifespan < 3
+        assert np.isfinite(average_lifespan)
+
+    # Each body is still in its own game, new or not
+    for game, body in zip(environment.games, environment.bodies):
+        assert game.round < 3
+        assert body in game.cohort.peasants
+
+    finished = list(environment.finished)
+    assert environment.run(2) == finished[:2]
+    assert environment.finished[:len(finished) - 2] == finished[2:]
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from game.game import Game
+from game.action import Action
+from game.options import REWARD_SCHEMES
+from game.actors.random_peasant import RandomPeasant
+
+
+class SteadyPeasant(RandomPeasant):
+    """ A stateless peasant whose decisions depend only on its attributes,
+    so whole turns and single steps can be compared exactly """
+
+    __slots__ = ()
+
+    def action(self, state) -> Action:
+        attacks, defences = self.actions([self],
+                np.array([self.stamina]),
+                np.array([self.attack]),
+                np.array([self.defence]))
+        return Action(attacks.item(0), defences.item(0))
+
+    @staticmethod
+    def actions(peasants: list,
+            stamina: np.ndarray,
+            attack: np.ndarray,
+            defence: np.ndarray) -> tuple:
+
+        attacks = np.where(stamina > 1.5, 0.5 * attack, 0.0)
+        defences = np.where(stamina > defence, 0.3 * defence, 0.0)
+
+        stamina_needed = (attacks + defences) * 1.01
+        ratio = np.divide(stamina, stamina_needed,
+                out=np.ones_like(stamina_needed),
+                where=stamina_needed > stamina)
+        return attacks * ratio, defences * ratio
+
+
+class RewardGame(Game):
+    """ Keeps every turn's rewards, by the peasants' starting places """
+
+    def __init__(self, peasants: list, **arguments):
+        self.starting = list(peasants)
+        self.turn_rewards = []
+        super().__init__(peasants, **arguments)
+
+    def end_turn(self) -> tuple:
+        self.turn_rewards.append([self.rewards.get(peasant.id)
+                for peasant in self.starting])
+        return super().end_turn()
+
+
+def _play(seed: int, vectorize: bool, reward_scheme: str):
+    np.random.seed(seed)
+    peasants = [SteadyPeasant(10) for _ in range(40)]
+    game = RewardGame(peasants, reward_scheme=reward_scheme, vectorize=vectorize)
+    return game, game.run()
+
+
+@pytest.mark.parametrize("reward_scheme", REWARD_SCHEMES)
+def test_whole_turns_match_steps(reward_scheme):
+    for seed in range(5):
+        stepped, expected = _play(seed, False, reward_scheme)
+        vectorized, results = _play(seed, True, reward_scheme)
+
+        assert vectorized.stateless and not stepped.stateless
+        np.testing.assert_allclose(results.to_numpy(dtype=float),
+                expected.to_numpy(dtype=float))
+        assert len(vectorized.turn_rewards) == len(stepped.turn_rewards)
+        for rewards, expected_rewards in zip(vectorized.turn_rewards,
+                stepped.turn_rewards):
+            assert rewards == pytest.approx(expected_rewards)
+
+
+def test_mixed_or_small_cohorts_step():
+    peasants = [SteadyPeasant(10) for _ in range(40)] + [RandomPeasant(10)]
+    assert not Game(peasants, vectorize=True).vectorizable()
+
+    peasants = [SteadyPeasant(10) for _ in range(8)]
+    assert not Game(peasants, vectorize=True).vectorizable()
+    assert not Game([SteadyPeasant(10) for _ in range(40)]).vectorizable()
+
+
+def test_random_actions_match_in_distribution():
+    count = 20000
+    random = np.random.default_rng(0)
+    peasants = [RandomPeasant(10, random=random) for _ in range(count)]
+
+    stamina = np.full(count, 3.0)
+    attack = np.full(count, 4.0)
+    defence = np.full(count, 6.0)
+    for peasant in peasants:
+        peasant.stamina, peasant.attack, peasant.defence = 3.0, 4.0, 6.0
+
+    attacks, defences = RandomPeasant.actions(peasants, stamina, attack, defence)
+    single = np.array([(action.attack, action.defence) for action in
+            (peasant.action(None) for peasant in peasants)])
+
+    for batched, scalar in ((attacks, single[:, 0]), (defences, single[:, 1])):
+        error = np.sqrt(batched.var() / count + scalar.var() / count)
+        assert abs(batched.mean() - scalar.mean()) < 4 * error
+        assert abs(np.mean(batched == 0) - np.mean(scalar == 0)) < 0.02